@@ -1,96 +1,820 @@
 import asyncio
-from google import genai
+import functools
+import hashlib
+import json
+import random
+import sys
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
-from .config import GEMINI_API_KEY, GEMINI_MODEL_NAME
+import httpx
+from pydantic import BaseModel, create_model
+
+from .config import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL_NAME,
+    GEMINI_ASYNC_CLIENT,
+    GEMINI_HTTP_MAX_CONNECTIONS,
+    GEMINI_HTTP_MAX_KEEPALIVE,
+    GEMINI_HTTP_KEEPALIVE_SECONDS,
+    require,
+    LLM_INITIAL_CONCURRENCY,
+    LLM_MIN_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_BREAKER_THRESHOLD,
+    LLM_BREAKER_COOLDOWN_SECONDS,
+    LLM_CALL_TIMEOUT_SECONDS,
+    LLM_BACKEND,
+    LONG_TRANSCRIPT_THRESHOLD_TOKENS,
+    LONG_TRANSCRIPT_SEGMENT_TOKENS,
+    COMPACTION_ENABLED,
+    COMPACTION_MAX_TOKENS,
+    PRECLASSIFIER_ENABLED,
+    PRECLASSIFIER_MIN_CONFIDENCE,
+)
+from .compaction import compact_transcript, COMPACTION_VERSION
+from .fake_llm import fake_llm
+from .metrics import (
+    error_type,
+    observe_stage,
+    record_llm_error,
+    record_usage,
+    registry,
+    time_stage,
+    Gauge,
+)
 from .models import CallInsight, CallInsightExtended
+from .preclassifier import preclassify, PRECLASSIFIER_VERSION
+from .segmentation import estimate_tokens, segment_transcript
+from .streaming import PartialJSONObject
+
+if TYPE_CHECKING:
+    from google import genai
+
+
+T = TypeVar("T")
+
+
+# One long-lived client per process, built on first use: importing the SDK
+# alone takes about half a second, which a worker that never calls Gemini
+# (LLM_BACKEND=fake, tools, tests) should not pay at startup. client.aio
+# shares a single httpx connection pool, so keep-alive connections are
+# reused across requests.
+client: Optional["genai.Client"] = None
+
+
+def get_client() -> "genai.Client":
+    global client
+    if client is None:
+        from google import genai
+        from google.genai import types
+
+        client = genai.Client(
+            api_key=require("GEMINI_API_KEY", GEMINI_API_KEY),
+            http_options=types.HttpOptions(
+                # Milliseconds; keeps a hung request from holding a dispatcher slot
+                timeout=int(LLM_CALL_TIMEOUT_SECONDS * 1000),
+                async_client_args={
+                    "limits": httpx.Limits(
+                        max_connections=GEMINI_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=GEMINI_HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=GEMINI_HTTP_KEEPALIVE_SECONDS,
+                    ),
+                },
+            ),
+        )
+    return client
+
+
+SYSTEM_INSTRUCTIONS = (
+    "You are an expert analyzing customer debt collection calls. "
+    "Given a single raw call transcript, extract exactly these fields:\n"
+    "- customer_intent: what the customer wants or plans to do.\n"
+    "- sentiment: one of 'Negative', 'Neutral', 'Positive'.\n"
+    "- action_required: boolean, true if follow-up is needed.\n"
+    "- summary: short summary of the call.\n"
+    "Return output strictly in the provided schema."
+)
+
+EXTENDED_FIELD_DESCRIPTIONS = {
+    "customer_intent": "what the customer plans or wants to do.",
+    "sentiment": "overall sentiment of the call (Negative, Neutral, Positive).",
+    "action_required": "true if follow-up is required by the agent.",
+    "summary": "brief summary of the call.",
+    "primary_purpose": "the main purpose of the call from the agent's side.",
+    "objective_met": "boolean, whether the agent's call objective was met.",
+    "key_results": "list of key outcomes (e.g. promise to pay, settlement request, dispute raised, hardship disclosed).",
+    "customer_intentions": "describe what the customer intends to do next.",
+    "circumstances": "summarize important situational context (job loss, accident, salary delay, etc.).",
+    "reasons_non_payment": "reasons for non-payment, if any (or null).",
+    "financial_hardship": "description of hardship if mentioned (or null).",
+    "start_sentiment": "sentiment at the beginning of the call (Negative, Neutral, Positive).",
+    "end_sentiment": "sentiment at the end of the call (Negative, Neutral, Positive).",
+    "agent_performance_rating": "integer 1 to 5 based on professionalism, clarity, and empathy.",
+    "agent_performance_notes": "short justification for the rating.",
+}
+
+
+def _extended_instructions(fields) -> str:
+    return (
+        "You are analyzing debt-collection calls. "
+        "Return a structured JSON object with these exact fields:\n"
+        + "".join(f"- {name}: {EXTENDED_FIELD_DESCRIPTIONS[name]}\n" for name in fields)
+        + "Return JSON strictly matching the given schema."
+    )
+
+
+SYSTEM_INSTRUCTIONS_EXTENDED = _extended_instructions(EXTENDED_FIELD_DESCRIPTIONS)
+
+# Several short calls in one request; see generate_insights_packed
+PACKED_INSTRUCTIONS = (
+    "You are an expert analyzing customer debt collection calls. "
+    "You are given several separate call transcripts, each starting with a "
+    "'### Transcript <n>' header. Analyze each transcript on its own and "
+    "return one item per transcript, with index set to its <n>, and exactly "
+    "these fields:\n"
+    "- customer_intent: what the customer wants or plans to do.\n"
+    "- sentiment: one of 'Negative', 'Neutral', 'Positive'.\n"
+    "- action_required: boolean, true if follow-up is needed.\n"
+    "- summary: short summary of the call.\n"
+    "Return output strictly in the provided schema."
+)
+
 
+class PackedCallInsight(CallInsight):
+    index: int
 
-client = genai.Client(api_key=GEMINI_API_KEY)
 
+class PackedCallInsights(BaseModel):
+    items: List[PackedCallInsight]
 
-def _call_llm_sync(transcript: str) -> CallInsight:
+
+# Map step of the long-transcript path: one prompt per segment
+SEGMENT_INSTRUCTIONS_EXTENDED = (
+    "The transcript below is segment {index} of {total} of one long call; "
+    "analyze this segment only. start_sentiment and end_sentiment refer to "
+    "the start and end of this segment.\n" + SYSTEM_INSTRUCTIONS_EXTENDED
+)
+
+# Reduce step: merge the per-segment analyses into one
+REDUCE_INSTRUCTIONS_EXTENDED = (
+    "You are given JSON analyses of consecutive segments of one long "
+    "debt-collection call, in call order. Merge them into a single analysis "
+    "of the whole call: combine key_results without duplicates, and base the "
+    "overall sentiment, objective_met and agent rating on the call as a whole. "
+    "Use these exact fields:\n"
+    + "".join(f"- {name}: {desc}\n" for name, desc in EXTENDED_FIELD_DESCRIPTIONS.items())
+    + "Return JSON strictly matching the given schema."
+)
+
+
+def _prompt_fingerprint(instructions: str, schema: type) -> str:
+    """
+    Short hash of the instructions + response schema. Changes whenever
+    either is edited, so cached insights from an older prompt are not reused.
+    """
+    payload = instructions + json.dumps(schema.model_json_schema(), sort_keys=True)
+    if COMPACTION_ENABLED:
+        payload += f"compaction-v{COMPACTION_VERSION}"
+    if PRECLASSIFIER_ENABLED and schema is CallInsight:
+        payload += f"preclassifier-v{PRECLASSIFIER_VERSION}-{PRECLASSIFIER_MIN_CONFIDENCE}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+PROMPT_VERSIONS = {
+    "basic": _prompt_fingerprint(SYSTEM_INSTRUCTIONS, CallInsight),
+    "extended": _prompt_fingerprint(SYSTEM_INSTRUCTIONS_EXTENDED, CallInsightExtended),
+}
+
+
+class CircuitOpenError(RuntimeError):
     """
-    Synchronous call to Gemini using structured output with CallInsight schema.
-    Runs in a separate thread via asyncio.to_thread.
+    Raised without calling Gemini while the circuit breaker is open.
     """
-    system_instructions = (
-        "You are an expert analyzing customer debt collection calls. "
-        "Given a single raw call transcript, extract exactly these fields:\n"
-        "- customer_intent: what the customer wants or plans to do.\n"
-        "- sentiment: one of 'Negative', 'Neutral', 'Positive'.\n"
-        "- action_required: boolean, true if follow-up is needed.\n"
-        "- summary: short summary of the call.\n"
-        "Return output strictly in the provided schema."
+
+
+class StreamInterrupted(RuntimeError):
+    """
+    A streamed response failed after part of it was passed on. Never
+    retried: a second answer could contradict fields the caller has
+    already sent.
+    """
+
+
+def _genai_errors():
+    # Not imported here: until the SDK is loaded (by get_client, or by the
+    # fake backend raising its errors) no exception can be one of these
+    return sys.modules.get("google.genai.errors")
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    genai_errors = _genai_errors()
+    return (
+        genai_errors is not None
+        and isinstance(exc, genai_errors.APIError)
+        and (exc.code == 429 or exc.status == "RESOURCE_EXHAUSTED")
     )
 
-    prompt = (
-        f"{system_instructions}\n\n"
-        f"Transcript:\n{transcript}"
+
+def is_transient(exc: BaseException) -> bool:
+    if is_rate_limited(exc):
+        return True
+    genai_errors = _genai_errors()
+    if genai_errors is not None and isinstance(exc, genai_errors.ServerError):
+        return True
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class LLMDispatcher:
+    """
+    Gatekeeper for every Gemini call.
+
+    - In-flight limit tracked with AIMD: halved on RESOURCE_EXHAUSTED,
+      grown by ~1 per limit's worth of successful calls.
+    - Transient failures retried with full-jitter exponential backoff
+      (the slot is released while sleeping).
+    - Circuit breaker opens after LLM_BREAKER_THRESHOLD consecutive
+      transient failures; after the cooldown a single probe is let through.
+    - Each attempt is bounded by LLM_CALL_TIMEOUT_SECONDS; a timeout counts
+      as a transient failure.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = LLM_INITIAL_CONCURRENCY,
+        min_limit: int = LLM_MIN_CONCURRENCY,
+        max_limit: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        base_delay: float = LLM_RETRY_BASE_DELAY,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+        breaker_threshold: int = LLM_BREAKER_THRESHOLD,
+        breaker_cooldown: float = LLM_BREAKER_COOLDOWN_SECONDS,
+        call_timeout: float = LLM_CALL_TIMEOUT_SECONDS,
+    ) -> None:
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.call_timeout = call_timeout
+
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._last_decrease = 0.0
+
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self._probe_in_flight = False
+
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.rejected = 0
+
+    # ---- AIMD slots -----------------------------------------------------
+
+    async def _acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _on_rate_limited(self) -> None:
+        # One multiplicative decrease per backoff window, not one per 429:
+        # a burst of concurrent rejections should only halve the limit once.
+        now = time.monotonic()
+        if now - self._last_decrease >= self.base_delay:
+            self.limit = max(self.min_limit, self.limit / 2)
+            self._last_decrease = now
+
+    # ---- circuit breaker ------------------------------------------------
+
+    @property
+    def breaker_state(self) -> str:
+        if self.opened_until == 0.0:
+            return "closed"
+        if time.monotonic() < self.opened_until:
+            return "open"
+        return "half_open"
+
+    def _check_breaker(self) -> bool:
+        """
+        Return True if this call is the half-open probe.
+        """
+        state = self.breaker_state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.rejected += 1
+        raise CircuitOpenError("LLM circuit breaker is open; Gemini calls are paused")
+
+    def _record_outcome(self, transient_failure: bool) -> None:
+        if not transient_failure:
+            self.consecutive_failures = 0
+            self.opened_until = 0.0
+            return
+
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.breaker_threshold or self.opened_until:
+            self.opened_until = time.monotonic() + self.breaker_cooldown
+
+    # ---- public API -----------------------------------------------------
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run one LLM call under the in-flight limit, retrying transient failures.
+        """
+        attempt = 0
+        while True:
+            if self.breaker_state == "open":
+                # Fail fast instead of queueing for a slot
+                self.rejected += 1
+                record_llm_error("CircuitOpen")
+                raise CircuitOpenError("LLM circuit breaker is open; Gemini calls are paused")
+
+            waited = time.perf_counter()
+            await self._acquire()
+            observe_stage("llm_slot_wait", time.perf_counter() - waited)
+            # The half-open probe is only claimed once a slot is held, so a
+            # caller cancelled while waiting can never leave it claimed.
+            try:
+                probe = self._check_breaker()
+            except CircuitOpenError:
+                self._release()
+                raise
+
+            self.calls += 1
+            try:
+                result = await asyncio.wait_for(call(), self.call_timeout)
+            except Exception as e:
+                record_llm_error(error_type(e))
+                transient = is_transient(e)
+                if is_rate_limited(e):
+                    self.rate_limited += 1
+                    self._on_rate_limited()
+                self._record_outcome(transient)
+
+                if not transient or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+            else:
+                self._on_success()
+                self._record_outcome(False)
+                return result
+            finally:
+                if probe:
+                    self._probe_in_flight = False
+                self._release()
+
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "breaker": self.breaker_state,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+dispatcher = LLMDispatcher()
+
+
+def _dispatcher_gauge() -> dict:
+    return {
+        ("limit",): dispatcher.limit,
+        ("in_flight",): dispatcher.in_flight,
+        ("waiting",): len(dispatcher._waiters),
+    }
+
+
+registry.register(
+    Gauge(
+        "insights_llm_dispatcher",
+        "LLM dispatcher AIMD limit, in-flight and queued calls.",
+        _dispatcher_gauge,
+        ("state",),
     )
+)
+
+
+def _generation_config(schema: type) -> dict:
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+    }
+
+
+def _generate_structured_sync(prompt: str, schema: type, submitted: float) -> BaseModel:
+    """
+    Synchronous call to Gemini using structured output with `schema`.
+    Runs in a separate thread via asyncio.to_thread; `submitted` is when
+    it was handed to the executor, to measure the wait for a free thread.
+    """
+    observe_stage("thread_wait", time.perf_counter() - submitted)
+    with time_stage("llm_call"):
+        response = get_client().models.generate_content(
+            model=GEMINI_MODEL_NAME,
+            contents=prompt,
+            config=_generation_config(schema),
+        )
+    record_usage(schema, response)
+    return response.parsed
+
 
-    response = client.models.generate_content(
-        model=GEMINI_MODEL_NAME,
-        contents=prompt,
-        config={
-            "response_mime_type": "application/json",
-            "response_schema": CallInsight,
-        },
+async def _generate_structured_async(prompt: str, schema: type) -> BaseModel:
+    """
+    Same as _generate_structured_sync, but on the SDK's native async
+    surface: no executor thread is held while waiting on Gemini.
+    """
+    with time_stage("llm_call"):
+        response = await get_client().aio.models.generate_content(
+            model=GEMINI_MODEL_NAME,
+            contents=prompt,
+            config=_generation_config(schema),
+        )
+    record_usage(schema, response)
+    return response.parsed
+
+
+async def _generate_structured_threaded(prompt: str, schema: type) -> BaseModel:
+    get_client()  # built here, not by racing executor threads
+    return await asyncio.to_thread(
+        _generate_structured_sync, prompt, schema, time.perf_counter()
     )
 
-    insight: CallInsight = response.parsed
-    return insight
 
+async def _generate_fake(prompt: str, schema: type) -> BaseModel:
+    with time_stage("llm_call"):
+        return await fake_llm.generate(prompt, schema)
 
-async def generate_insights(transcript: str) -> CallInsight:
+
+async def generate_structured(prompt: str, schema: type) -> BaseModel:
     """
-    Async wrapper for FastAPI.
+    Run a structured-output prompt through the dispatcher (limit, retries,
+    breaker). GEMINI_ASYNC_CLIENT=false falls back to the thread-offloaded
+    sync client (kept for benchmarking). LLM_BACKEND=fake answers from
+    the local stand-in instead of Gemini.
     """
-    return await asyncio.to_thread(_call_llm_sync, transcript)
+    if LLM_BACKEND == "fake":
+        call = _generate_fake
+    elif GEMINI_ASYNC_CLIENT:
+        call = _generate_structured_async
+    else:
+        call = _generate_structured_threaded
 
+    # Includes slot waits and retries; llm_call is a single attempt
+    with time_stage("llm_total"):
+        return await dispatcher.run(functools.partial(call, prompt, schema))
 
 
+async def _stream_attempt(prompt: str, schema: type, on_text: Callable[[str], None]) -> str:
+    """
+    One streamed structured-output call; returns the full JSON text.
+    """
+    chunks: List[str] = []
+    try:
+        with time_stage("llm_call"):
+            if LLM_BACKEND == "fake":
+                async for text in fake_llm.stream(prompt, schema):
+                    chunks.append(text)
+                    on_text(text)
+            else:
+                last = None
+                async for last in await get_client().aio.models.generate_content_stream(
+                    model=GEMINI_MODEL_NAME,
+                    contents=prompt,
+                    config=_generation_config(schema),
+                ):
+                    if last.text:
+                        chunks.append(last.text)
+                        on_text(last.text)
+                # Token counts come with the final chunk
+                record_usage(schema, last)
+    except Exception as e:
+        if chunks:
+            raise StreamInterrupted(f"LLM stream failed after partial output: {e}") from e
+        raise
+    return "".join(chunks)
 
 
-def _call_llm_sync_extended(transcript: str) -> CallInsightExtended:
+async def stream_structured(
+    prompt: str, schema: type, on_text: Callable[[str], None]
+) -> BaseModel:
     """
-    Synchronous call to Gemini for extended analysis.
+    generate_structured with the response streamed: on_text gets each
+    chunk of JSON as Gemini produces it. Same dispatcher limit, retries
+    and breaker, except that nothing is retried once output has been
+    passed on (StreamInterrupted). Always on the async client.
     """
-    system_instructions = (
-        "You are analyzing debt-collection calls. "
-        "Return a structured JSON object with these exact fields:\n"
-        "- customer_intent: what the customer plans or wants to do.\n"
-        "- sentiment: overall sentiment of the call (Negative, Neutral, Positive).\n"
-        "- action_required: true if follow-up is required by the agent.\n"
-        "- summary: brief summary of the call.\n"
-        "- primary_purpose: the main purpose of the call from the agent's side.\n"
-        "- objective_met: boolean, whether the agent's call objective was met.\n"
-        "- key_results: list of key outcomes (e.g. promise to pay, settlement request, dispute raised, hardship disclosed).\n"
-        "- customer_intentions: describe what the customer intends to do next.\n"
-        "- circumstances: summarize important situational context (job loss, accident, salary delay, etc.).\n"
-        "- reasons_non_payment: reasons for non-payment, if any (or null).\n"
-        "- financial_hardship: description of hardship if mentioned (or null).\n"
-        "- start_sentiment: sentiment at the beginning of the call (Negative, Neutral, Positive).\n"
-        "- end_sentiment: sentiment at the end of the call (Negative, Neutral, Positive).\n"
-        "- agent_performance_rating: integer 1 to 5 based on professionalism, clarity, and empathy.\n"
-        "- agent_performance_notes: short justification for the rating.\n"
-        "Return JSON strictly matching the given schema."
+    forwarded = False
+
+    def forward(text: str) -> None:
+        nonlocal forwarded
+        forwarded = True
+        on_text(text)
+
+    async def attempt() -> str:
+        # Reached again after a timeout mid-stream, which the dispatcher retries
+        if forwarded:
+            raise StreamInterrupted("LLM stream timed out after partial output")
+        return await _stream_attempt(prompt, schema, forward)
+
+    with time_stage("llm_total"):
+        text = await dispatcher.run(attempt)
+    return schema.model_validate_json(text)
+
+
+def _transcript_prompt(instructions: str, transcript: str) -> str:
+    return f"{instructions}\n\nTranscript:\n{transcript}"
+
+
+def prepare_transcript(transcript: str, max_tokens: int = COMPACTION_MAX_TOKENS) -> str:
+    """
+    The transcript as it goes into the prompt: compacted unless
+    COMPACTION_ENABLED is off.
+    """
+    if not COMPACTION_ENABLED:
+        return transcript
+    return compact_transcript(transcript, max_tokens).text
+
+
+async def generate_insights(transcript: str) -> CallInsight:
+    """
+    Async entry point for FastAPI. With PRECLASSIFIER_ENABLED, scripted
+    calls the rule-based classifier is confident about skip the LLM.
+    """
+    if PRECLASSIFIER_ENABLED:
+        insight = preclassify(transcript)
+        if insight is not None:
+            return insight
+
+    return await generate_insights_llm(transcript)
+
+
+async def generate_insights_llm(transcript: str, prepared: bool = False) -> CallInsight:
+    """
+    Basic analysis by the LLM, without the rule-based fast path.
+    prepared=True: `transcript` already went through prepare_transcript.
+    """
+    if not prepared:
+        transcript = prepare_transcript(transcript)
+    return await generate_structured(
+        _transcript_prompt(SYSTEM_INSTRUCTIONS, transcript), CallInsight
     )
 
-    prompt = f"{system_instructions}\n\nTranscript:\n{transcript}"
 
-    response = client.models.generate_content(
-        model=GEMINI_MODEL_NAME,
-        contents=prompt,
-        config={
-            "response_mime_type": "application/json",
-            "response_schema": CallInsightExtended,
-        },
+async def generate_insights_packed(
+    transcripts: Sequence[str], prepared: bool = False
+) -> List[CallInsight]:
+    """
+    Basic analysis of several short transcripts in one LLM call, returned
+    in input order. Transcripts the model skipped (missing, duplicated or
+    out-of-range index) fall back to one generate_insights_llm call each.
+    prepared=True: the transcripts already went through prepare_transcript.
+    """
+    if not prepared:
+        transcripts = [prepare_transcript(t) for t in transcripts]
+    prompt = PACKED_INSTRUCTIONS + "".join(
+        f"\n\n### Transcript {n}\n{t}" for n, t in enumerate(transcripts, start=1)
     )
+    packed = await generate_structured(prompt, PackedCallInsights)
 
-    insight: CallInsightExtended = response.parsed
-    return insight
+    by_index: dict = {}
+    duplicated = set()
+    for item in packed.items if packed is not None else []:
+        if item.index in by_index:
+            duplicated.add(item.index)
+        by_index[item.index] = CallInsight.model_validate(item.model_dump(exclude={"index"}))
+
+    results: List[Optional[CallInsight]] = [
+        None if n in duplicated else by_index.get(n)
+        for n in range(1, len(transcripts) + 1)
+    ]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        retried = await _gather_or_cancel(
+            [generate_insights_llm(transcripts[i], prepared=True) for i in missing]
+        )
+        for i, insight in zip(missing, retried):
+            results[i] = insight
+    return results
 
 
 async def generate_insights_extended(transcript: str) -> CallInsightExtended:
-    return await asyncio.to_thread(_call_llm_sync_extended, transcript)
+    """
+    Extended analysis; transcripts over LONG_TRANSCRIPT_THRESHOLD_TOKENS go
+    through generate_insights_extended_long instead of a single call.
+    """
+    long_mode = LONG_TRANSCRIPT_THRESHOLD_TOKENS > 0
+    # With map-reduce available, long calls are segmented rather than cut
+    # down to the compaction budget
+    transcript = prepare_transcript(transcript, 0 if long_mode else COMPACTION_MAX_TOKENS)
+
+    if long_mode and estimate_tokens(transcript) > LONG_TRANSCRIPT_THRESHOLD_TOKENS:
+        return await generate_insights_extended_long(transcript)
+
+    return await generate_structured(
+        _transcript_prompt(SYSTEM_INSTRUCTIONS_EXTENDED, transcript), CallInsightExtended
+    )
+
+
+async def stream_insights(
+    mode: str, transcript: str, on_field: Callable[[str, Any], None]
+) -> BaseModel:
+    """
+    generate_insights ("basic") or generate_insights_extended ("extended")
+    with the answer streamed: on_field(name, value) is called for each
+    top-level field as soon as its value is complete in the partial JSON,
+    in schema order (sentiment and action_required before the summary).
+
+    Answers that are not a single generation (the rule-based fast path,
+    map-reduce over long transcripts) are returned without any on_field
+    calls.
+    """
+    if mode == "extended":
+        long_mode = LONG_TRANSCRIPT_THRESHOLD_TOKENS > 0
+        prepared = prepare_transcript(transcript, 0 if long_mode else COMPACTION_MAX_TOKENS)
+        if long_mode and estimate_tokens(prepared) > LONG_TRANSCRIPT_THRESHOLD_TOKENS:
+            return await generate_insights_extended_long(prepared)
+        instructions, schema = SYSTEM_INSTRUCTIONS_EXTENDED, CallInsightExtended
+    else:
+        if PRECLASSIFIER_ENABLED:
+            insight = preclassify(transcript)
+            if insight is not None:
+                return insight
+        prepared = prepare_transcript(transcript)
+        instructions, schema = SYSTEM_INSTRUCTIONS, CallInsight
+
+    parser = PartialJSONObject()
+
+    def on_text(text: str) -> None:
+        for name, value in parser.feed(text):
+            if name in schema.model_fields:
+                on_field(name, value)
+
+    return await stream_structured(_transcript_prompt(instructions, prepared), schema, on_text)
+
+
+async def _gather_or_cancel(calls: Sequence[Awaitable[T]]) -> list:
+    """
+    asyncio.gather that cancels the remaining calls as soon as one fails,
+    instead of letting them spend quota on a result that is thrown away.
+    """
+    tasks = [asyncio.ensure_future(c) for c in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def generate_insights_extended_long(
+    transcript: str, segment_tokens: Optional[int] = None
+) -> CallInsightExtended:
+    """
+    Map-reduce extended analysis for long calls: split by speaker turns into
+    ~segment_tokens segments, analyze the segments in parallel (bounded by
+    the dispatcher), then merge the partial analyses in one reduce call.
+    start_sentiment comes from the first segment, end_sentiment from the last.
+    """
+    segments = segment_transcript(transcript, segment_tokens or LONG_TRANSCRIPT_SEGMENT_TOKENS)
+    total = len(segments)
+
+    partials = await _gather_or_cancel(
+        [
+            generate_structured(
+                _transcript_prompt(
+                    SEGMENT_INSTRUCTIONS_EXTENDED.format(index=i + 1, total=total),
+                    segment,
+                ),
+                CallInsightExtended,
+            )
+            for i, segment in enumerate(segments)
+        ]
+    )
+    if total == 1:
+        return partials[0]
+
+    analyses = json.dumps(
+        [{"segment": i + 1, **p.model_dump()} for i, p in enumerate(partials)],
+        ensure_ascii=False,
+    )
+    merged = await generate_structured(
+        f"{REDUCE_INSTRUCTIONS_EXTENDED}\n\nSegment analyses:\n{analyses}",
+        CallInsightExtended,
+    )
+    return merged.model_copy(
+        update={
+            "start_sentiment": partials[0].start_sentiment,
+            "end_sentiment": partials[-1].end_sentiment,
+        }
+    )
+
+
+CORE_FIELDS = tuple(CallInsight.model_fields)
+
+
+@functools.lru_cache(maxsize=64)
+def partial_extended_model(fields: Tuple[str, ...]) -> type:
+    """
+    CallInsightExtended restricted to `fields` (in schema order).
+    """
+    source = CallInsightExtended.model_fields
+    return create_model(
+        "CallInsightPartial",
+        **{name: (source[name].annotation, source[name]) for name in fields},
+    )
+
+
+def selected_extended_fields(fields: Sequence[str]) -> Tuple[str, ...]:
+    """
+    The core CallInsight fields plus the requested extended fields.
+    Raises ValueError for unknown field names.
+    """
+    unknown = set(fields) - set(EXTENDED_FIELD_DESCRIPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return tuple(
+        name
+        for name in EXTENDED_FIELD_DESCRIPTIONS
+        if name in CORE_FIELDS or name in fields
+    )
+
+
+async def generate_insights_extended_fields(
+    transcript: str, fields: Sequence[str]
+) -> BaseModel:
+    """
+    Extended analysis limited to the core fields + `fields`, so both the
+    prompt and the model output stay small.
+    """
+    selected = selected_extended_fields(fields)
+    return await generate_structured(
+        _transcript_prompt(_extended_instructions(selected), prepare_transcript(transcript)),
+        partial_extended_model(selected),
+    )
+
+
+async def close_client() -> None:
+    """
+    Release the shared async connection pool (called on app shutdown), if
+    the client was ever built.
+    """
+    if client is not None:
+        await client.aio.aclose()
 
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .ai_client import PROMPT_VERSIONS
+from .config import (
+    CACHE_DB_ENABLED,
+    CACHE_ENABLED,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    GEMINI_MODEL_NAME,
+)
+from .db import db
+from .models import CallInsight, CallInsightExtended
+
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_MODELS = {
+    "basic": CallInsight,
+    "extended": CallInsightExtended,
+}
+
+
+def normalize_transcript(transcript: str) -> str:
+    """
+    Collapse whitespace so trivially re-formatted copies of a transcript
+    share a cache entry.
+    """
+    return " ".join(transcript.split())
+
+
+def cache_key(mode: str, transcript: str) -> str:
+    """
+    Content address for an insight: normalized transcript + model + prompt version.
+    """
+    material = "\x1f".join(
+        (
+            mode,
+            GEMINI_MODEL_NAME,
+            PROMPT_VERSIONS[mode],
+            normalize_transcript(transcript),
+        )
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class InsightCache:
+    """
+    Two-tier cache in front of generate_insights / generate_insights_extended.
+
+    Tier one is an in-process LRU bounded by size and TTL; tier two is the
+    insight_cache table, shared by every worker process.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl_seconds: float = CACHE_TTL_SECONDS,
+        enabled: bool = CACHE_ENABLED,
+        db_enabled: bool = CACHE_DB_ENABLED,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.db_enabled = db_enabled
+
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.llm_seconds = 0.0
+
+    # ---- tier one -------------------------------------------------------
+
+    def _memory_get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return payload
+
+    def _memory_put(self, key: str, payload: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    # ---- tier two -------------------------------------------------------
+
+    async def _db_get(self, key: str) -> Optional[dict]:
+        if not self.db_enabled:
+            return None
+
+        try:
+            async with db.acquire() as conn:
+                raw = await conn.fetchval(
+                    "SELECT insights FROM insight_cache WHERE cache_key = $1", key
+                )
+        except Exception:
+            logger.exception("insight_cache lookup failed")
+            return None
+
+        return json.loads(raw) if raw is not None else None
+
+    async def _db_put(self, key: str, mode: str, payload: dict) -> None:
+        if not self.db_enabled:
+            return
+
+        try:
+            async with db.acquire() as conn:
+                await conn.execute(
+                    """
+                    INSERT INTO insight_cache (cache_key, mode, model_name, prompt_version, insights)
+                    VALUES ($1, $2, $3, $4, $5::jsonb)
+                    ON CONFLICT (cache_key) DO NOTHING;
+                    """,
+                    key,
+                    mode,
+                    GEMINI_MODEL_NAME,
+                    PROMPT_VERSIONS[mode],
+                    json.dumps(payload),
+                )
+        except Exception:
+            logger.exception("insight_cache store failed")
+
+    # ---- public API -----------------------------------------------------
+
+    async def get_or_generate(
+        self,
+        mode: str,
+        transcript: str,
+        generate: Callable[[str], Awaitable[BaseModel]],
+    ) -> Tuple[BaseModel, bool]:
+        """
+        Return (insight, cached). On a hit the LLM is skipped entirely.
+        """
+        if not self.enabled:
+            return await generate(transcript), False
+
+        model = INSIGHT_MODELS[mode]
+        key = cache_key(mode, transcript)
+
+        payload = self._memory_get(key)
+        if payload is not None:
+            self.memory_hits += 1
+            return model.model_validate(payload), True
+
+        payload = await self._db_get(key)
+        if payload is not None:
+            self.db_hits += 1
+            self._memory_put(key, payload)
+            return model.model_validate(payload), True
+
+        self.misses += 1
+        started = time.perf_counter()
+        insight = await generate(transcript)
+        self.llm_seconds += time.perf_counter() - started
+
+        payload = insight.model_dump()
+        self._memory_put(key, payload)
+        await self._db_put(key, mode, payload)
+        return insight, False
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.db_hits
+        lookups = hits + self.misses
+        avg_llm_seconds = self.llm_seconds / self.misses if self.misses else 0.0
+
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            # Every hit is one Gemini request (and its latency) not paid for
+            "llm_calls_saved": hits,
+            "llm_seconds_saved_estimate": hits * avg_llm_seconds,
+        }
+
+
+insight_cache = InsightCache()
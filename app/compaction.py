@@ -0,0 +1,178 @@
+"""
+Deterministic transcript compaction, applied before the LLM prompt is built.
+
+Removes what costs tokens without carrying meaning for the analysis:
+ASR timestamps and noise tags, filler words, stuttered repeats, repeated
+speaker labels and whitespace. Long speaker labels are shortened to a
+legend (A = Agent, C = Customer). When COMPACTION_MAX_TOKENS is set, the
+middle of the call is dropped to fit, keeping the opening and closing
+turns the start/end sentiment depend on.
+"""
+import logging
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from .metrics import endpoint, registry, Counter, Histogram
+from .segmentation import estimate_tokens, split_turns
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the output changes, so cached insights of the old form are not reused
+COMPACTION_VERSION = "1"
+
+COMPACTION_TOKENS = registry.register(
+    Counter(
+        "insights_compaction_tokens_total",
+        "Estimated transcript tokens before and after compaction, by endpoint.",
+        ("endpoint", "kind"),
+    )
+)
+COMPACTION_RATIO = registry.register(
+    Histogram(
+        "insights_compaction_ratio",
+        "Per-call estimated tokens after compaction over tokens before, by endpoint.",
+        ("endpoint",),
+        buckets=(0.25, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0),
+    )
+)
+
+SPEAKER_ALIASES = {
+    "agent": "A",
+    "representative": "A",
+    "executive": "A",
+    "customer": "C",
+    "caller": "C",
+}
+
+# [00:01:23], (12:03), <00:05.120> anywhere; bare 00:01:23 at line start
+BRACKETED_TIMESTAMP = re.compile(r"[\[(<]\s*\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?\s*[\])>]")
+LEADING_TIMESTAMP = re.compile(r"^\s*\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?\s*[-–]?\s*")
+NOISE_TAG = re.compile(
+    r"[\[(<]\s*(?:inaudible|noise|music|silence|crosstalk|laughs?|pause|unk|beep|"
+    r"background noise|overlapping)\s*[\])>]",
+    re.IGNORECASE,
+)
+# Takes the comma before the filler with it: "report, you know." -> "report."
+FILLER = re.compile(
+    r",?\s*(?<![\w'])(?:u+m+|u+h+|h+m+|e+r+m+|a+h+|you know|i mean)(?![\w'])",
+    re.IGNORECASE,
+)
+# "haan haan haan" -> "haan", "theek hai, theek hai" -> "theek hai";
+# words only, so repeated amounts or dates are never merged
+REPEATED_PHRASE = re.compile(
+    r"\b([^\W\d_]+(?: [^\W\d_]+)?)([,.?!]?)(?: \1\b[,.?!]?)+", re.IGNORECASE
+)
+LABEL = re.compile(r"^([A-Za-z][\w .'-]{0,40}):\s*(.*)$", re.DOTALL)
+
+
+class Compaction(NamedTuple):
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+
+def _clean(text: str) -> str:
+    text = BRACKETED_TIMESTAMP.sub(" ", text)
+    text = NOISE_TAG.sub(" ", text)
+    text = FILLER.sub(" ", text)
+    text = REPEATED_PHRASE.sub(r"\1\2", text)
+    text = re.sub(r"\s+([,.?!])", r"\1", text)
+    text = re.sub(r"([,.?!])[,.?!]+", r"\1", text)
+    text = re.sub(r"^[,.\s]+|[,\s]+$", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _speaker_turns(transcript: str) -> List[Tuple[Optional[str], str]]:
+    # Timestamps first, so "[00:01] Agent: ..." is seen as a new turn
+    lines = (
+        LEADING_TIMESTAMP.sub("", BRACKETED_TIMESTAMP.sub("", line).strip())
+        for line in transcript.splitlines()
+    )
+
+    turns: List[Tuple[Optional[str], str]] = []
+    for turn in split_turns("\n".join(lines)):
+        match = LABEL.match(turn)
+        speaker, text = (match.group(1).strip(), match.group(2)) if match else (None, turn)
+        text = _clean(text)
+        if not text:
+            continue
+
+        if turns and turns[-1][0] == speaker:
+            # Same speaker again: one label, and drop an exact repeat
+            if text != turns[-1][1]:
+                turns[-1] = (speaker, _clean(f"{turns[-1][1]} {text}"))
+            continue
+        turns.append((speaker, text))
+    return turns
+
+
+def _fit(lines: List[str], max_tokens: int) -> List[str]:
+    """
+    Keep turns from both ends until the budget is used, replacing the
+    middle with a marker.
+    """
+    head: List[str] = []
+    tail: List[str] = []
+    used = 0
+    i, j = 0, len(lines) - 1
+    while i <= j:
+        take_head = len(head) <= len(tail)
+        line = lines[i] if take_head else lines[j]
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        used += cost
+        if take_head:
+            head.append(line)
+            i += 1
+        else:
+            tail.append(line)
+            j -= 1
+
+    omitted = j - i + 1
+    if omitted <= 0:
+        return lines
+    return head + [f"[... {omitted} turns omitted ...]"] + tail[::-1]
+
+
+def compact_transcript(transcript: str, max_tokens: int = 0) -> Compaction:
+    """
+    Compacted transcript plus estimated token counts before and after.
+    max_tokens > 0 enforces a budget on the result.
+    """
+    turns = _speaker_turns(transcript)
+
+    legend = sorted(
+        {
+            (SPEAKER_ALIASES[s.lower()], s)
+            for s, _ in turns
+            if s and s.lower() in SPEAKER_ALIASES
+        }
+    )
+    lines = [
+        f"{SPEAKER_ALIASES.get(speaker.lower(), speaker)}: {text}" if speaker else text
+        for speaker, text in turns
+    ]
+    if legend:
+        lines.insert(0, "(" + ", ".join(f"{short} = {full}" for short, full in legend) + ")")
+
+    if max_tokens > 0 and estimate_tokens("\n".join(lines)) > max_tokens:
+        header, body = (lines[:1], lines[1:]) if legend else ([], lines)
+        lines = header + _fit(body, max_tokens - sum(estimate_tokens(h) + 1 for h in header))
+
+    text = "\n".join(lines)
+    result = Compaction(text, estimate_tokens(transcript), estimate_tokens(text))
+
+    route = endpoint.get()
+    COMPACTION_TOKENS.inc(result.tokens_before, endpoint=route, kind="before")
+    COMPACTION_TOKENS.inc(result.tokens_after, endpoint=route, kind="after")
+    if result.tokens_before:
+        COMPACTION_RATIO.observe(result.tokens_after / result.tokens_before, endpoint=route)
+    logger.debug(
+        "%s: compacted transcript from %d to %d tokens",
+        route,
+        result.tokens_before,
+        result.tokens_after,
+    )
+    return result
@@ -1,15 +1,167 @@
 from dotenv import load_dotenv
 import os
+from typing import Optional
 
 # Load .env from project root in dev
 load_dotenv()
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def require(name: str, value: Optional[str]) -> str:
+    """
+    `value` of a required setting, checked where it is first needed rather
+    than at import, so tools and the fake backend start without it.
+    """
+    if not value:
+        raise RuntimeError(f"{name} is not set (check your .env)")
+    return value
+
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash-lite")
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set (check your .env)")
+# Use the SDK's native async client (client.aio) instead of to_thread offloading
+GEMINI_ASYNC_CLIENT = _env_bool("GEMINI_ASYNC_CLIENT", True)
+# Shared keep-alive connection pool for the async client
+GEMINI_HTTP_MAX_CONNECTIONS = int(os.getenv("GEMINI_HTTP_MAX_CONNECTIONS", "100"))
+GEMINI_HTTP_MAX_KEEPALIVE = int(os.getenv("GEMINI_HTTP_MAX_KEEPALIVE", "20"))
+GEMINI_HTTP_KEEPALIVE_SECONDS = float(os.getenv("GEMINI_HTTP_KEEPALIVE_SECONDS", "60"))
+
+# Postgres pool (app/db.py). MIN_SIZE connections are opened and warmed at
+# startup and kept through idle periods; callers wait at most
+# DB_POOL_ACQUIRE_TIMEOUT_SECONDS for a connection (0 = no limit).
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", "30"))
+DB_POOL_MAX_INACTIVE_SECONDS = float(os.getenv("DB_POOL_MAX_INACTIVE_SECONDS", "300"))
+DB_COMMAND_TIMEOUT_SECONDS = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "60"))
+# Per-connection cache of prepared statements (0 disables it); the insert
+# statements are prepared into it when a connection opens
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# Behind PgBouncer in transaction pooling mode: no named prepared statements
+# and no statement cache, since consecutive transactions may run on
+# different server connections
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)
+# The pool is opened, and pending schema migrations applied, on first use;
+# true does it at app startup instead (fails fast on a bad DATABASE_URL)
+DB_INIT_ON_STARTUP = _env_bool("DB_INIT_ON_STARTUP", False)
+
+if DB_POOL_MIN_SIZE > DB_POOL_MAX_SIZE:
+    raise RuntimeError("DB_POOL_MIN_SIZE must not exceed DB_POOL_MAX_SIZE")
+
+# LLM backend: "gemini", or "fake" for load tests (app/fake_llm.py).
+# The fake answers after a lognormal delay (median FAKE_LLM_LATENCY_MS) and
+# injects 503s / 429s at the given rates.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.4"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+FAKE_LLM_SEED = int(os.environ["FAKE_LLM_SEED"]) if os.getenv("FAKE_LLM_SEED") else None
+
+# LLM dispatcher: AIMD in-flight limit, retry backoff and circuit breaker
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+# Per-attempt timeout for one Gemini call; a timed-out attempt is retried
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+
+# Transcript compaction before prompting (app/compaction.py). Off until
+# scripts/compaction_regression.py shows field agreement holds against the
+# real model. A positive COMPACTION_MAX_TOKENS also caps the transcript,
+# dropping the middle turns.
+COMPACTION_ENABLED = _env_bool("COMPACTION_ENABLED", False)
+COMPACTION_MAX_TOKENS = int(os.getenv("COMPACTION_MAX_TOKENS", "0"))
+
+# Long transcripts: extended analysis above LONG_TRANSCRIPT_THRESHOLD_TOKENS
+# (estimated) is map-reduced over segments of ~LONG_TRANSCRIPT_SEGMENT_TOKENS,
+# cut between speaker turns. 0 disables it.
+LONG_TRANSCRIPT_THRESHOLD_TOKENS = int(os.getenv("LONG_TRANSCRIPT_THRESHOLD_TOKENS", "8000"))
+LONG_TRANSCRIPT_SEGMENT_TOKENS = int(os.getenv("LONG_TRANSCRIPT_SEGMENT_TOKENS", "3000"))
+
+# Packing: batch and queued basic analyses of short transcripts (at most
+# PACKING_MAX_ITEM_TOKENS) that arrive within PACKING_MAX_WAIT_MS of each other
+# share one LLM call, up to PACKING_MAX_ITEMS transcripts per call.
+PACKING_ENABLED = _env_bool("PACKING_ENABLED", False)
+PACKING_MAX_ITEMS = int(os.getenv("PACKING_MAX_ITEMS", "10"))
+PACKING_MAX_ITEM_TOKENS = int(os.getenv("PACKING_MAX_ITEM_TOKENS", "500"))
+PACKING_MAX_WAIT_MS = float(os.getenv("PACKING_MAX_WAIT_MS", "50"))
+
+# Rule-based fast path (app/preclassifier.py): basic analyses of short calls
+# (at most PRECLASSIFIER_MAX_TOKENS) whose cues give one signal a confidence
+# of at least PRECLASSIFIER_MIN_CONFIDENCE skip the LLM. Off by default.
+PRECLASSIFIER_ENABLED = _env_bool("PRECLASSIFIER_ENABLED", False)
+PRECLASSIFIER_MIN_CONFIDENCE = float(os.getenv("PRECLASSIFIER_MIN_CONFIDENCE", "0.8"))
+PRECLASSIFIER_MAX_TOKENS = int(os.getenv("PRECLASSIFIER_MAX_TOKENS", "400"))
+
+# Batch analysis: max concurrent LLM calls per batch and max items per request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "5"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Read API (GET /calls, /calls_extended): default and max rows per page
+CALLS_PAGE_SIZE = int(os.getenv("CALLS_PAGE_SIZE", "50"))
+CALLS_MAX_PAGE_SIZE = int(os.getenv("CALLS_MAX_PAGE_SIZE", "500"))
+
+# Search (GET /search): minimum pg_trgm word similarity for a fuzzy match.
+# "thik" vs "theek" scores 0.4, above pg_trgm's own 0.6 default.
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.3"))
+
+# Export (GET /export, scripts/export_insights.py): concurrent exports, each on
+# its own connection, and rows per Parquet row group
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+EXPORT_PARQUET_ROW_GROUP_ROWS = int(os.getenv("EXPORT_PARQUET_ROW_GROUP_ROWS", "10000"))
+
+# Streaming NDJSON ingestion: max transcripts in flight per stream, max line size
+STREAM_CONCURRENCY = int(os.getenv("STREAM_CONCURRENCY", "16"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "1000000"))
+
+# Insight cache: in-process LRU (tier one) + Postgres table (tier two)
+CACHE_ENABLED = _env_bool("CACHE_ENABLED", True)
+CACHE_DB_ENABLED = _env_bool("CACHE_DB_ENABLED", True)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+
+# Single-flight: concurrent identical requests share one in-flight LLM call.
+# SINGLE_FLIGHT_ROWS="per_request" stores a row per request; "shared" stores
+# one row and returns its id to every deduplicated request.
+SINGLE_FLIGHT_ENABLED = _env_bool("SINGLE_FLIGHT_ENABLED", True)
+SINGLE_FLIGHT_ROWS = os.getenv("SINGLE_FLIGHT_ROWS", "per_request")
+
+# Async job mode: analysis_jobs queue + worker pool.
+# JOB_WORKERS > 0 also runs workers inside the API process (python -m app.worker
+# runs them standalone).
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "10"))
+
+# Rollup triggers append delta rows; each API process folds them into
+# insight_rollups this often (GET /stats reads both, so it is never stale)
+ROLLUP_MERGE_INTERVAL_SECONDS = float(os.getenv("ROLLUP_MERGE_INTERVAL_SECONDS", "5"))
+
+# Write-behind writer: buffer insight rows and flush them in batches (COPY).
+# Off by default: a request waits up to WRITER_FLUSH_INTERVAL_MS for its row.
+WRITE_BEHIND_ENABLED = _env_bool("WRITE_BEHIND_ENABLED", False)
+WRITER_MAX_BATCH = int(os.getenv("WRITER_MAX_BATCH", "200"))
+WRITER_FLUSH_INTERVAL_MS = float(os.getenv("WRITER_FLUSH_INTERVAL_MS", "10"))
+
+if LLM_BACKEND not in ("gemini", "fake"):
+    raise RuntimeError(f"LLM_BACKEND must be 'gemini' or 'fake', got {LLM_BACKEND!r}")
 
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY is not set (check your .env)")
+if SINGLE_FLIGHT_ROWS not in ("per_request", "shared"):
+    raise RuntimeError(
+        f"SINGLE_FLIGHT_ROWS must be 'per_request' or 'shared', got {SINGLE_FLIGHT_ROWS!r}"
+    )
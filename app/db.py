@@ -1,63 +1,1207 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
 import asyncpg
-from typing import Optional
 
-from .config import DATABASE_URL
+from .config import (
+    DATABASE_URL,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_ACQUIRE_TIMEOUT_SECONDS,
+    DB_POOL_MAX_INACTIVE_SECONDS,
+    DB_COMMAND_TIMEOUT_SECONDS,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_PGBOUNCER,
+    require,
+)
+from .metrics import observe_stage, registry, Gauge
+from .models import CallInsight, CallInsightExtended
+
+
+logger = logging.getLogger(__name__)
+
+
+class InsightsConnection(asyncpg.Connection):
+    """
+    asyncpg connection that can prepare statements ahead of use.
+
+    asyncpg keeps a per-connection cache of named server-side prepared
+    statements keyed by query text (DB_STATEMENT_CACHE_SIZE): once a query
+    is in it, fetch() / fetchval() send only Bind/Execute with the
+    arguments. warm() puts the hot insert statements there before the
+    first request needs them.
+    """
+
+    async def warm(self, queries: Sequence[str]) -> None:
+        for query in queries:
+            try:
+                # The cache-populating variant of prepare(); private, so
+                # asyncpg is pinned to a tested minor release
+                await self._prepare(query, use_cache=True)
+            except (AttributeError, TypeError):
+                # Warming is only an optimization: without it the statements
+                # are prepared and cached on first use
+                logger.warning("asyncpg %s cannot prewarm statements", asyncpg.__version__)
+                return
 
 
 class DB:
     pool: Optional[asyncpg.pool.Pool] = None
+    # Callers currently blocked in acquire() (asyncpg does not expose this)
+    waiting: int = 0
+    # pg_trgm is installed (fuzzy search); set by init_db
+    trigram: bool = False
+    # Migrations applied, so new connections can prepare the insert
+    # statements; until then acquire() runs init_db first
+    schema_ready: bool = False
+    init_lock: asyncio.Lock = asyncio.Lock()
+
+    # Pool wait reporting, for sizing DB_POOL_MAX_SIZE per deployment
+    acquires: int = 0
+    acquire_timeouts: int = 0
+    acquire_wait_total: float = 0.0
+    acquire_wait_max: float = 0.0
+    recent_waits: Deque[float] = deque(maxlen=1024)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """
+        pool.acquire() that records how long the caller waited for a
+        connection (stage db_acquire), giving up after
+        DB_POOL_ACQUIRE_TIMEOUT_SECONDS. The first call opens the pool.
+        """
+        if not self.schema_ready:
+            await init_db()
+
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            conn = await self.pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT_SECONDS or None)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        self._record_wait(time.perf_counter() - started)
+
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    def _record_wait(self, waited: float) -> None:
+        observe_stage("db_acquire", waited)
+        self.acquires += 1
+        self.acquire_wait_total += waited
+        self.acquire_wait_max = max(self.acquire_wait_max, waited)
+        self.recent_waits.append(waited)
 
 
 db = DB()
 
 
+def connect_kwargs() -> dict:
+    """
+    asyncpg connection settings shared by the pool and standalone
+    connections (exports).
+    """
+    return {
+        "command_timeout": DB_COMMAND_TIMEOUT_SECONDS or None,
+        "statement_cache_size": 0 if DB_PGBOUNCER else DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def pool_stats() -> dict:
+    """
+    Connection pool occupancy and how long callers waited for a
+    connection; in_use == max_size and a growing wait mean the pool is too
+    small for the load.
+    """
+    if db.pool is None:
+        return {"initialized": False}
+
+    size = db.pool.get_size()
+    idle = db.pool.get_idle_size()
+    waits = sorted(db.recent_waits)
+
+    def recent_ms(q: float) -> float:
+        return round(waits[min(int(q * len(waits)), len(waits) - 1)] * 1000, 3) if waits else 0.0
+
+    return {
+        "initialized": True,
+        "min_size": db.pool.get_min_size(),
+        "max_size": db.pool.get_max_size(),
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "waiting": db.waiting,
+        "pgbouncer": DB_PGBOUNCER,
+        "statement_cache_size": connect_kwargs()["statement_cache_size"],
+        "acquires": db.acquires,
+        "acquire_timeouts": db.acquire_timeouts,
+        "acquire_wait_ms": {
+            "avg": round(db.acquire_wait_total / db.acquires * 1000, 3) if db.acquires else 0.0,
+            "max": round(db.acquire_wait_max * 1000, 3),
+            # Over the last len(recent_waits) acquires
+            "p50": recent_ms(0.5),
+            "p95": recent_ms(0.95),
+            "p99": recent_ms(0.99),
+        },
+    }
+
+
+def _pool_gauge() -> dict:
+    stats = pool_stats()
+    if not stats["initialized"]:
+        return {}
+    return {
+        (state,): stats[state]
+        for state in ("size", "in_use", "idle", "waiting", "max_size")
+    }
+
+
+registry.register(
+    Gauge(
+        "insights_db_pool_connections",
+        "Postgres pool connections by state (in_use, idle, waiting callers, max).",
+        _pool_gauge,
+        ("state",),
+    )
+)
+
+
 async def init_db() -> None:
-    if db.pool is not None:
+    """
+    Open the pool and apply pending schema migrations. Called by the first
+    db.acquire() (or at startup with DB_INIT_ON_STARTUP); a no-op once done.
+    """
+    async with db.init_lock:
+        if db.schema_ready:
+            return
+
+        if db.pool is None:
+            # Connections opened before _prewarm_pool() sets schema_ready
+            # are not warmed: the migrations may still be creating tables
+            db.pool = await asyncpg.create_pool(
+                require("DATABASE_URL", DATABASE_URL),
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_SECONDS,
+                connection_class=InsightsConnection,
+                init=_init_connection,
+                **connect_kwargs(),
+            )
+
+        async with db.pool.acquire() as conn:
+            await migrate(conn)
+            db.trigram = await conn.fetchval(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm');"
+            )
+
+        await _prewarm_pool()
+
+
+async def close_db() -> None:
+    """
+    Close the pool (app shutdown); the next db.acquire() opens a new one.
+    """
+    pool, db.pool = db.pool, None
+    db.schema_ready = False
+    db.init_lock = asyncio.Lock()
+    if pool is not None:
+        await pool.close()
+
+
+async def applied_migrations(conn: asyncpg.Connection) -> List[int]:
+    try:
+        rows = await conn.fetch("SELECT version FROM schema_migrations ORDER BY version;")
+    except asyncpg.UndefinedTableError:
+        return []
+    return [r["version"] for r in rows]
+
+
+async def migrate(conn: asyncpg.Connection) -> List[int]:
+    """
+    Apply the MIGRATIONS not yet recorded in schema_migrations, in version
+    order, each in its own transaction (NON_TRANSACTIONAL_MIGRATIONS run
+    outside one). Returns the versions applied.
+
+    With the schema up to date this is a single SELECT: no DDL and no
+    locks, so many workers starting at once do not queue on each other.
+    Otherwise each migration's transaction takes a transaction-scoped
+    advisory lock and re-reads schema_migrations under it, so only one
+    worker applies it. Being released at commit / rollback on the same
+    server connection, the lock cannot leak behind PgBouncer in
+    transaction mode (DB_PGBOUNCER), unlike a session lock.
+    """
+    if set(MIGRATIONS) <= set(await applied_migrations(conn)):
+        return []
+
+    applied = []
+    for version, apply in sorted(MIGRATIONS.items()):
+        if version in NON_TRANSACTIONAL_MIGRATIONS:
+            # Earlier versions have created schema_migrations by now
+            if version in await applied_migrations(conn):
+                continue
+            await apply(conn)
+            await conn.execute(
+                """
+                INSERT INTO schema_migrations (version, name) VALUES ($1, $2)
+                ON CONFLICT (version) DO NOTHING;
+                """,
+                version,
+                apply.__name__.lstrip("_"),
+            )
+            logger.info("Applied schema migration %d (%s)", version, apply.__name__)
+            applied.append(version)
+            continue
+
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext('init_db'));")
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+            if version in await applied_migrations(conn):
+                continue
+            await apply(conn)
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);",
+                version,
+                apply.__name__.lstrip("_"),
+            )
+        logger.info("Applied schema migration %d (%s)", version, apply.__name__)
+        applied.append(version)
+    return applied
+
+
+async def _create_tables(conn: asyncpg.Connection) -> None:
+    """
+    The tables and indexes that predate versioned migrations. IF NOT EXISTS
+    throughout, so databases created by earlier versions adopt it as-is.
+    """
+    # Original table
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS call_records (
+            id SERIAL PRIMARY KEY,
+            transcript TEXT NOT NULL,
+            intent TEXT NOT NULL,
+            sentiment TEXT NOT NULL,
+            action_required BOOLEAN NOT NULL,
+            summary TEXT NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """
+    )
+
+    # New extended analysis table
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS call_records_extended (
+            id SERIAL PRIMARY KEY,
+            transcript TEXT NOT NULL,
+
+            customer_intent TEXT NOT NULL,
+            sentiment TEXT NOT NULL,
+            action_required BOOLEAN NOT NULL,
+            summary TEXT NOT NULL,
+
+            primary_purpose TEXT NOT NULL,
+            objective_met BOOLEAN NOT NULL,
+            key_results TEXT NOT NULL, -- stored as joined string
+            customer_intentions TEXT NOT NULL,
+            circumstances TEXT NOT NULL,
+            reasons_non_payment TEXT,
+            financial_hardship TEXT,
+            start_sentiment TEXT NOT NULL,
+            end_sentiment TEXT NOT NULL,
+            agent_performance_rating INT NOT NULL,
+            agent_performance_notes TEXT NOT NULL,
+
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """
+    )
+
+    # Tier-two insight cache, keyed by content hash
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS insight_cache (
+            cache_key TEXT PRIMARY KEY,
+            mode TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            insights JSONB NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """
+    )
+
+    # Async job queue, claimed by workers with FOR UPDATE SKIP LOCKED
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            mode TEXT NOT NULL,
+            transcript TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued', -- queued | running | done | failed
+            attempts INT NOT NULL DEFAULT 0,
+            run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            locked_by TEXT,
+            locked_until TIMESTAMPTZ,
+            record_id INT,
+            result JSONB,
+            error TEXT,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+
+        CREATE INDEX IF NOT EXISTS analysis_jobs_pending_idx
+            ON analysis_jobs (id)
+            WHERE status IN ('queued', 'running');
+        """
+    )
+
+    # Content-addressed transcript bodies, shared by both insight tables.
+    # toast_tuple_target=128 makes Postgres compress bodies well below
+    # the default ~2KB threshold.
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            id BIGSERIAL PRIMARY KEY,
+            sha256 BYTEA NOT NULL UNIQUE,
+            body TEXT NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        ) WITH (toast_tuple_target = 128);
+        """
+    )
+
+    # Dashboard rollups per hour and day, kept current by the triggers
+    # created in _ensure_rollups. Columns of extended-only metrics stay
+    # NULL for call_records.
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS insight_rollups (
+            source TEXT NOT NULL, -- call_records | call_records_extended
+            granularity TEXT NOT NULL, -- hour | day
+            bucket TIMESTAMPTZ NOT NULL, -- UTC start of the hour / day
+            calls BIGINT NOT NULL,
+            negative BIGINT NOT NULL,
+            neutral BIGINT NOT NULL,
+            positive BIGINT NOT NULL,
+            action_required BIGINT NOT NULL,
+            objective_met BIGINT,
+            rating_sum BIGINT,
+            PRIMARY KEY (source, granularity, bucket)
+        );
+        """
+    )
+
+    # The read API's indexes on call_records / call_records_extended are
+    # built by migration 6 (_create_read_indexes), without blocking writes.
+
+
+# Statements every insert path runs; prepared on each pooled connection.
+# Filled in next to the statements below.
+PREPARED_SQL: List[str] = []
+
+
+def _use_prepared() -> bool:
+    return not DB_PGBOUNCER and DB_STATEMENT_CACHE_SIZE > 0
+
+
+async def _init_connection(conn: InsightsConnection) -> None:
+    # Connections the pool opens after startup (growth, or replacing ones
+    # closed after DB_POOL_MAX_INACTIVE_SECONDS) arrive warm too
+    if db.schema_ready and _use_prepared():
+        await conn.warm(PREPARED_SQL)
+
+
+async def _prewarm_pool() -> None:
+    """
+    Prepare the insert statements on the min_size connections opened with
+    the pool, once the schema exists, so the first burst of requests pays
+    neither connection setup nor Parse.
+    """
+    db.schema_ready = True
+    if not _use_prepared():
         return
 
-    db.pool = await asyncpg.create_pool(DATABASE_URL, min_size=1, max_size=5)
+    # Holding min_size connections at once reaches every idle one
+    async with contextlib.AsyncExitStack() as stack:
+        conns = [
+            await stack.enter_async_context(db.acquire())
+            for _ in range(db.pool.get_min_size())
+        ]
+        await asyncio.gather(*(conn.warm(PREPARED_SQL) for conn in conns))
+
+
+# Read-side views with the original transcript text joined back in (legacy
+# rows that still carry inline text are returned as-is)
+CALL_RECORDS_FULL_VIEW = """
+    CREATE VIEW call_records_full AS
+        SELECT r.id, COALESCE(r.transcript, t.body) AS transcript,
+               r.intent, r.sentiment, r.action_required, r.summary,
+               r.created_at, r.transcript_id
+        FROM call_records r
+        LEFT JOIN transcripts t ON t.id = r.transcript_id;
+"""
 
-    async with db.pool.acquire() as conn:
-        # Original table
+CALL_RECORDS_EXTENDED_FULL_VIEW = """
+    CREATE VIEW call_records_extended_full AS
+        SELECT r.id, COALESCE(r.transcript, t.body) AS transcript,
+               r.customer_intent, r.sentiment, r.action_required, r.summary,
+               r.primary_purpose, r.objective_met, r.key_results,
+               r.customer_intentions, r.circumstances, r.reasons_non_payment,
+               r.financial_hardship, r.start_sentiment, r.end_sentiment,
+               r.agent_performance_rating, r.agent_performance_notes,
+               r.created_at, r.transcript_id, r.key_results_list
+        FROM call_records_extended r
+        LEFT JOIN transcripts t ON t.id = r.transcript_id;
+"""
+
+
+async def _ensure_key_results_list(conn: asyncpg.Connection) -> None:
+    """
+    One-time change: key results as a TEXT[] column with a GIN index, so
+    calls can be filtered by outcome (key_results_list @> ARRAY[...])
+    without LIKE scans. The joined key_results string is still written for
+    existing readers; older rows are backfilled by migrate_key_results.
+    """
+    has_column = await conn.fetchval(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'call_records_extended'
+              AND column_name = 'key_results_list'
+        );
+        """
+    )
+    if not has_column:
         await conn.execute(
+            "ALTER TABLE call_records_extended ADD COLUMN key_results_list TEXT[];"
+        )
+
+    await conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS call_records_extended_key_results_idx
+            ON call_records_extended USING gin (key_results_list);
+        """
+    )
+
+
+async def _ensure_transcript_storage(conn: asyncpg.Connection) -> None:
+    """
+    One-time schema changes for the transcripts table: lz4 compression when
+    the server supports it, transcript_id on both insight tables, and the
+    *_full views.
+    """
+    compression = await conn.fetchval(
+        """
+        SELECT attcompression FROM pg_attribute
+        WHERE attrelid = 'transcripts'::regclass AND attname = 'body';
+        """
+    )
+    # enumvals only lists lz4 when the server was built with it
+    has_lz4 = await conn.fetchval(
+        """
+        SELECT 'lz4' = ANY(enumvals) FROM pg_settings
+        WHERE name = 'default_toast_compression';
+        """
+    )
+    if has_lz4 and compression != "l":
+        await conn.execute("ALTER TABLE transcripts ALTER COLUMN body SET COMPRESSION lz4;")
+
+    for table in ("call_records", "call_records_extended"):
+        columns = {
+            r["column_name"]: r["is_nullable"]
+            for r in await conn.fetch(
+                """
+                SELECT column_name, is_nullable FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = $1;
+                """,
+                table,
+            )
+        }
+        if "transcript_id" not in columns:
+            await conn.execute(
+                f"ALTER TABLE {table} "
+                "ADD COLUMN transcript_id BIGINT REFERENCES transcripts (id);"
+            )
+        if columns["transcript"] == "NO":
+            await conn.execute(f"ALTER TABLE {table} ALTER COLUMN transcript DROP NOT NULL;")
+
+    views = {
+        r["viewname"]: r["definition"]
+        for r in await conn.fetch(
+            """
+            SELECT viewname, definition FROM pg_views
+            WHERE schemaname = current_schema()
+              AND viewname IN ('call_records_full', 'call_records_extended_full');
+            """
+        )
+    }
+    if "call_records_full" not in views:
+        await conn.execute(CALL_RECORDS_FULL_VIEW)
+
+    extended = views.get("call_records_extended_full")
+    if (
+        extended is None
+        or "transcript_text" in extended
+        or "key_results_list" not in extended
+    ):
+        # Earlier versions exposed r.* plus transcript_text, or lacked
+        # key_results_list: replace them
+        await conn.execute("DROP VIEW IF EXISTS call_records_extended_full;")
+        await conn.execute(CALL_RECORDS_EXTENDED_FULL_VIEW)
+
+
+# Search columns (app/records.py): generated tsvector columns, so Postgres
+# keeps them current on every insert path. Transcripts are Hinglish, so
+# they use the 'simple' configuration (no English stemming); summaries are
+# English. Transcripts are content-addressed: a re-analyzed call adds no
+# index entries.
+SEARCH_COLUMNS = {
+    "transcripts": ("body_tsv", "to_tsvector('simple', body)"),
+    "call_records": ("summary_tsv", "to_tsvector('english', summary)"),
+    "call_records_extended": ("summary_tsv", "to_tsvector('english', summary)"),
+}
+
+# Trigram indexes for fuzzy matching ("theek" / "thik"), when pg_trgm exists
+TRIGRAM_COLUMNS = {
+    "transcripts": "body",
+    "call_records": "summary",
+    "call_records_extended": "summary",
+}
+
+
+async def _ensure_search(conn: asyncpg.Connection) -> None:
+    """
+    One-time setup for GET /search: tsvector columns with GIN indexes,
+    transcript_id indexes to get from a matching transcript to its calls,
+    and, if the server ships pg_trgm, the extension and trigram indexes.
+    GIN indexes buffer new entries in a pending list (fastupdate), so
+    inserts do not pay for a full index update each.
+    """
+    for table, (column, expression) in SEARCH_COLUMNS.items():
+        has_column = await conn.fetchval(
             """
-            CREATE TABLE IF NOT EXISTS call_records (
-                id SERIAL PRIMARY KEY,
-                transcript TEXT NOT NULL,
-                intent TEXT NOT NULL,
-                sentiment TEXT NOT NULL,
-                action_required BOOLEAN NOT NULL,
-                summary TEXT NOT NULL,
-                created_at TIMESTAMPTZ DEFAULT NOW()
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = $1 AND column_name = $2
             );
+            """,
+            table,
+            column,
+        )
+        if not has_column:
+            # Rewrites the table once; see README before running on a large one
+            await conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN {column} tsvector "
+                f"GENERATED ALWAYS AS ({expression}) STORED;"
+            )
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{column}_idx ON {table} USING gin ({column});"
+        )
+
+    for table in ("call_records", "call_records_extended"):
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_transcript_id_idx ON {table} (transcript_id);"
+        )
+
+    available = await conn.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm');"
+    )
+    if not available:
+        logger.warning("pg_trgm is not available; search runs without fuzzy matching")
+        return
+
+    try:
+        async with conn.transaction():
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    except asyncpg.InsufficientPrivilegeError:
+        logger.warning("No privilege to create pg_trgm; search runs without fuzzy matching")
+        return
+
+    for table, column in TRIGRAM_COLUMNS.items():
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{column}_trgm_idx "
+            f"ON {table} USING gin ({column} gin_trgm_ops);"
+        )
+
+
+# Aggregate the rows inserted by one statement (a single INSERT or a whole
+# COPY batch) into insight_rollups. Buckets are upserted in key order so
+# concurrent writers touching the same buckets cannot deadlock.
+ROLLUP_SELECT = """
+    SELECT '{table}', g.granularity,
+           date_trunc(g.granularity, COALESCE(n.created_at, NOW()), 'UTC'),
+           count(*),
+           count(*) FILTER (WHERE n.sentiment = 'Negative'),
+           count(*) FILTER (WHERE n.sentiment = 'Neutral'),
+           count(*) FILTER (WHERE n.sentiment = 'Positive'),
+           count(*) FILTER (WHERE n.action_required),
+           {objective_met},
+           {rating_sum}
+    FROM {rows} n
+    CROSS JOIN (VALUES ('hour'), ('day')) AS g (granularity)
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+
+ROLLUP_METRICS = {
+    "call_records": {"objective_met": "NULL::bigint", "rating_sum": "NULL::bigint"},
+    "call_records_extended": {
+        "objective_met": "count(*) FILTER (WHERE n.objective_met)",
+        "rating_sum": "sum(n.agent_performance_rating)",
+    },
+}
+
+ROLLUP_UPSERT = """
+    INSERT INTO insight_rollups AS r (
+        source, granularity, bucket, calls, negative, neutral, positive,
+        action_required, objective_met, rating_sum
+    )
+    {select}
+    ON CONFLICT (source, granularity, bucket) DO UPDATE SET
+        calls = r.calls + EXCLUDED.calls,
+        negative = r.negative + EXCLUDED.negative,
+        neutral = r.neutral + EXCLUDED.neutral,
+        positive = r.positive + EXCLUDED.positive,
+        action_required = r.action_required + EXCLUDED.action_required,
+        objective_met = r.objective_met + EXCLUDED.objective_met,
+        rating_sum = r.rating_sum + EXCLUDED.rating_sum
+"""
+
+
+async def _ensure_rollups(conn: asyncpg.Connection) -> None:
+    """
+    One-time setup of the rollup triggers. A statement-level trigger with a
+    transition table sees every insert path (single INSERTs and COPY alike)
+    and updates the rollups in the inserting transaction. Rows that existed
+    before are rolled up once here; creating the trigger locks out inserts
+    until this transaction commits, so none are missed or counted twice.
+    """
+    existing = {
+        r["tgname"]
+        for r in await conn.fetch(
+            "SELECT tgname FROM pg_trigger WHERE tgname LIKE '%_rollup_trigger';"
+        )
+    }
+
+    for table, metrics in ROLLUP_METRICS.items():
+        if f"{table}_rollup_trigger" in existing:
+            continue
+
+        upsert = ROLLUP_UPSERT.format(
+            select=ROLLUP_SELECT.format(table=table, rows="new_rows", **metrics)
+        )
+        await conn.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_rollup() RETURNS trigger AS $$
+            BEGIN
+                {upsert};
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER {table}_rollup_trigger
+                AFTER INSERT ON {table}
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup();
             """
         )
+        await conn.execute(
+            f"DELETE FROM insight_rollups WHERE source = '{table}';"
+            + ROLLUP_UPSERT.format(
+                select=ROLLUP_SELECT.format(table=table, rows=table, **metrics)
+            )
+        )
+
+
+ROLLUP_COLUMNS = (
+    "source, granularity, bucket, calls, negative, neutral, positive, "
+    "action_required, objective_met, rating_sum"
+)
 
-        # New extended analysis table
+ROLLUP_DELTA_INSERT = """
+    INSERT INTO insight_rollup_deltas ({columns})
+    {select}
+"""
+
+# Folds the pending deltas into insight_rollups in one statement, so a
+# reader sees each delta either still pending or merged, never both
+ROLLUP_MERGE = ROLLUP_UPSERT.format(
+    select="""
+    SELECT source, granularity, bucket, sum(calls), sum(negative), sum(neutral),
+           sum(positive), sum(action_required), sum(objective_met), sum(rating_sum)
+    FROM moved
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    """
+)
+
+
+async def _ensure_rollup_deltas(conn: asyncpg.Connection) -> None:
+    """
+    Point the rollup triggers at insight_rollup_deltas. Upserting the
+    current hour / day rows directly made every concurrent insert queue
+    on those rows' locks; appending a delta row per statement takes no
+    row lock, and merge_rollup_deltas() folds them in in the background.
+    """
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS insight_rollup_deltas (
+            source TEXT NOT NULL,
+            granularity TEXT NOT NULL,
+            bucket TIMESTAMPTZ NOT NULL,
+            calls BIGINT NOT NULL,
+            negative BIGINT NOT NULL,
+            neutral BIGINT NOT NULL,
+            positive BIGINT NOT NULL,
+            action_required BIGINT NOT NULL,
+            objective_met BIGINT,
+            rating_sum BIGINT
+        );
+        """
+    )
+    for table, metrics in ROLLUP_METRICS.items():
+        insert = ROLLUP_DELTA_INSERT.format(
+            columns=ROLLUP_COLUMNS,
+            select=ROLLUP_SELECT.format(table=table, rows="new_rows", **metrics),
+        )
         await conn.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_rollup() RETURNS trigger AS $$
+            BEGIN
+                {insert};
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
             """
-            CREATE TABLE IF NOT EXISTS call_records_extended (
-                id SERIAL PRIMARY KEY,
-                transcript TEXT NOT NULL,
-
-                customer_intent TEXT NOT NULL,
-                sentiment TEXT NOT NULL,
-                action_required BOOLEAN NOT NULL,
-                summary TEXT NOT NULL,
-
-                primary_purpose TEXT NOT NULL,
-                objective_met BOOLEAN NOT NULL,
-                key_results TEXT NOT NULL, -- stored as joined string
-                customer_intentions TEXT NOT NULL,
-                circumstances TEXT NOT NULL,
-                reasons_non_payment TEXT,
-                financial_hardship TEXT,
-                start_sentiment TEXT NOT NULL,
-                end_sentiment TEXT NOT NULL,
-                agent_performance_rating INT NOT NULL,
-                agent_performance_notes TEXT NOT NULL,
-
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            );
+        )
+
+
+async def merge_rollup_deltas(conn: asyncpg.Connection) -> int:
+    """
+    Move the pending rollup deltas into insight_rollups. Returns the
+    number of delta rows merged.
+    """
+    return await conn.fetchval(
+        f"""
+        WITH moved AS (
+            DELETE FROM insight_rollup_deltas RETURNING *
+        ),
+        merged AS (
+            {ROLLUP_MERGE}
+            RETURNING 1
+        )
+        SELECT count(*) FROM moved;
+        """
+    )
+
+
+# Read API filters (app/records.py): each index ends in id, so a filtered
+# page is one range scan in cursor order. created_at only grows with id,
+# which a tiny BRIN index covers.
+READ_INDEXES = {
+    "call_records_sentiment_idx": "call_records (sentiment, id)",
+    "call_records_action_required_idx": "call_records (action_required, id)",
+    "call_records_created_at_idx": "call_records USING brin (created_at)",
+    "call_records_extended_sentiment_idx": "call_records_extended (sentiment, id)",
+    "call_records_extended_action_required_idx": "call_records_extended (action_required, id)",
+    "call_records_extended_objective_met_idx": "call_records_extended (objective_met, id)",
+    "call_records_extended_rating_idx": "call_records_extended (agent_performance_rating, id)",
+    "call_records_extended_created_at_idx": "call_records_extended USING brin (created_at)",
+}
+
+
+async def _create_index_concurrently(conn: asyncpg.Connection, name: str, definition: str) -> None:
+    """
+    Build index `name` without blocking writes to the table. Waits for a
+    build another worker has started, and rebuilds an INVALID index left by
+    one that was interrupted.
+    """
+    while True:
+        building = await conn.fetchval(
             """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_stat_progress_create_index
+                WHERE index_relid = to_regclass($1)
+            );
+            """,
+            name,
+        )
+        if building:
+            await asyncio.sleep(1.0)
+            continue
+
+        valid = await conn.fetchval(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1);", name
+        )
+        if valid:
+            return
+        if valid is False:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+        try:
+            await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition};")
+        except asyncpg.UniqueViolationError:
+            pass  # another worker created it at the same moment; checked again above
+
+
+async def _create_read_indexes(conn: asyncpg.Connection) -> None:
+    """
+    The read API's indexes. Once in _create_tables; databases that ran it
+    already have them, and the rest get them here without a write lock.
+    """
+    for name, definition in READ_INDEXES.items():
+        await _create_index_concurrently(conn, name, definition)
+
+
+# Schema versions, applied once each by migrate() and recorded in
+# schema_migrations. Append new versions; never renumber or edit one that
+# has shipped. The first five predate the table and check the catalog
+# before changing anything, so existing databases adopt them safely.
+MIGRATIONS: Dict[int, Callable[[asyncpg.Connection], Awaitable[None]]] = {
+    1: _create_tables,
+    2: _ensure_key_results_list,
+    3: _ensure_transcript_storage,
+    4: _ensure_rollups,
+    5: _ensure_search,
+    6: _create_read_indexes,
+    7: _ensure_rollup_deltas,
+}
+
+# Run outside a transaction (and without the migration lock): CREATE INDEX
+# CONCURRENTLY cannot run inside one. They must be safe to run repeatedly
+# and concurrently.
+NON_TRANSACTIONAL_MIGRATIONS = {6}
+
+
+CALL_RECORDS_COLUMNS = (
+    "transcript",
+    "intent",
+    "sentiment",
+    "action_required",
+    "summary",
+)
+
+CALL_RECORDS_EXTENDED_COLUMNS = (
+    "transcript",
+    "customer_intent",
+    "sentiment",
+    "action_required",
+    "summary",
+    "primary_purpose",
+    "objective_met",
+    "key_results",
+    "key_results_list",
+    "customer_intentions",
+    "circumstances",
+    "reasons_non_payment",
+    "financial_hardship",
+    "start_sentiment",
+    "end_sentiment",
+    "agent_performance_rating",
+    "agent_performance_notes",
+)
+
+
+TABLE_COLUMNS = {
+    "call_records": CALL_RECORDS_COLUMNS,
+    "call_records_extended": CALL_RECORDS_EXTENDED_COLUMNS,
+}
+
+
+def call_record_row(transcript: str, insight: CallInsight) -> tuple:
+    """
+    Row for call_records, in CALL_RECORDS_COLUMNS order.
+    """
+    return (
+        transcript,
+        insight.customer_intent,
+        insight.sentiment,
+        insight.action_required,
+        insight.summary,
+    )
+
+
+def call_record_extended_row(transcript: str, insight: CallInsightExtended) -> tuple:
+    """
+    Row for call_records_extended, in CALL_RECORDS_EXTENDED_COLUMNS order.
+    """
+    key_results = [r.strip() for r in insight.key_results if r.strip()]
+    key_results_str = "; ".join(key_results)
+
+    return (
+        transcript,
+        insight.customer_intent,
+        insight.sentiment,
+        insight.action_required,
+        insight.summary,
+        insight.primary_purpose,
+        insight.objective_met,
+        key_results_str,
+        key_results,
+        insight.customer_intentions,
+        insight.circumstances,
+        insight.reasons_non_payment,
+        insight.financial_hardship,
+        insight.start_sentiment,
+        insight.end_sentiment,
+        insight.agent_performance_rating,
+        insight.agent_performance_notes,
+    )
+
+
+UPSERT_TRANSCRIPTS_SQL = """
+    INSERT INTO transcripts (sha256, body)
+    SELECT DISTINCT ON (h) h, body
+    FROM (
+        SELECT sha256(convert_to(body, 'UTF8')) AS h, body
+        FROM unnest($1::text[]) AS body
+    ) AS input
+    ON CONFLICT (sha256) DO NOTHING;
+"""
+
+TRANSCRIPT_IDS_SQL = """
+    SELECT t.id
+    FROM unnest($1::text[]) WITH ORDINALITY AS input (body, ord)
+    JOIN transcripts t ON t.sha256 = sha256(convert_to(input.body, 'UTF8'))
+    ORDER BY input.ord;
+"""
+
+INSERT_CALL_RECORD_SQL = """
+    INSERT INTO call_records (transcript_id, intent, sentiment, action_required, summary)
+    VALUES ($1, $2, $3, $4, $5)
+    RETURNING id;
+"""
+
+INSERT_CALL_RECORD_EXTENDED_SQL = """
+    INSERT INTO call_records_extended (
+        transcript_id,
+        customer_intent,
+        sentiment,
+        action_required,
+        summary,
+        primary_purpose,
+        objective_met,
+        key_results,
+        key_results_list,
+        customer_intentions,
+        circumstances,
+        reasons_non_payment,
+        financial_hardship,
+        start_sentiment,
+        end_sentiment,
+        agent_performance_rating,
+        agent_performance_notes
+    )
+    VALUES (
+        $1,$2,$3,$4,$5,
+        $6,$7,$8,$9,$10,
+        $11,$12,$13,$14,$15,$16,$17
+    )
+    RETURNING id;
+"""
+
+PREPARED_SQL.extend(
+    (
+        UPSERT_TRANSCRIPTS_SQL,
+        TRANSCRIPT_IDS_SQL,
+        INSERT_CALL_RECORD_SQL,
+        INSERT_CALL_RECORD_EXTENDED_SQL,
+    )
+)
+
+
+async def upsert_transcripts(
+    conn: asyncpg.Connection, transcripts: Sequence[str]
+) -> List[int]:
+    """
+    Store each distinct transcript body once and return transcript ids in
+    input order. Bodies are addressed by sha256, so re-analyzed transcripts
+    (or the same call sent to both endpoints) reuse the existing row.
+    """
+    if not transcripts:
+        return []
+
+    await conn.execute(UPSERT_TRANSCRIPTS_SQL, list(transcripts))
+
+    rows = await conn.fetch(TRANSCRIPT_IDS_SQL, list(transcripts))
+    return [r["id"] for r in rows]
+
+
+async def fetch_transcripts(
+    conn: asyncpg.Connection, transcript_ids: Sequence[int]
+) -> Dict[int, str]:
+    """
+    Original transcript text for the given transcript ids.
+    """
+    rows = await conn.fetch(
+        "SELECT id, body FROM transcripts WHERE id = ANY($1::bigint[])",
+        list(transcript_ids),
+    )
+    return {r["id"]: r["body"] for r in rows}
+
+
+async def insert_call_record(
+    conn: asyncpg.Connection, transcript: str, insight: CallInsight
+) -> int:
+    transcript_id, = await upsert_transcripts(conn, [transcript])
+    row = call_record_row(transcript, insight)
+    return await conn.fetchval(INSERT_CALL_RECORD_SQL, transcript_id, *row[1:])
+
+
+async def insert_call_record_extended(
+    conn: asyncpg.Connection, transcript: str, insight: CallInsightExtended
+) -> int:
+    transcript_id, = await upsert_transcripts(conn, [transcript])
+    row = call_record_extended_row(transcript, insight)
+    return await conn.fetchval(INSERT_CALL_RECORD_EXTENDED_SQL, transcript_id, *row[1:])
+
+
+async def insert_insight_rows(
+    conn: asyncpg.Connection, table: str, rows: Sequence[tuple]
+) -> List[int]:
+    """
+    Bulk-insert rows built by call_record_row / call_record_extended_row.
+    The transcript text (first column) goes to the transcripts table and
+    the insight row stores its transcript_id instead.
+    """
+    transcript_ids = await upsert_transcripts(conn, [row[0] for row in rows])
+    stored = [(tid, *row[1:]) for tid, row in zip(transcript_ids, rows)]
+
+    return await bulk_insert(
+        conn, table, ("transcript_id", *TABLE_COLUMNS[table][1:]), stored
+    )
+
+
+async def migrate_transcripts(table: str, batch_size: int = 1000) -> int:
+    """
+    Move inline transcript text of existing rows in `table` into the
+    transcripts table, one batch per transaction. Safe to re-run and to
+    run alongside live traffic. Returns the number of rows migrated.
+    """
+    migrated = 0
+    while True:
+        async with db.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    f"""
+                    SELECT id, transcript
+                    FROM {table}
+                    WHERE transcript_id IS NULL AND transcript IS NOT NULL
+                    ORDER BY id
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED;
+                    """,
+                    batch_size,
+                )
+                if not rows:
+                    return migrated
+
+                transcript_ids = await upsert_transcripts(
+                    conn, [r["transcript"] for r in rows]
+                )
+                await conn.execute(
+                    f"""
+                    UPDATE {table} AS r
+                    SET transcript_id = m.transcript_id, transcript = NULL
+                    FROM unnest($1::int[], $2::bigint[]) AS m (id, transcript_id)
+                    WHERE r.id = m.id;
+                    """,
+                    [r["id"] for r in rows],
+                    transcript_ids,
+                )
+                migrated += len(rows)
+
+
+async def migrate_key_results(batch_size: int = 1000) -> int:
+    """
+    Fill key_results_list for call_records_extended rows stored before it
+    existed, by splitting the joined key_results string on "; ". Best
+    effort: a key result that itself contained "; " is split in two.
+    Safe to re-run and to run alongside live traffic. Returns the number
+    of rows migrated.
+    """
+    migrated = 0
+    while True:
+        async with db.acquire() as conn:
+            status = await conn.execute(
+                """
+                UPDATE call_records_extended AS r
+                SET key_results_list = ARRAY(
+                    SELECT btrim(item)
+                    FROM unnest(string_to_array(r.key_results, '; ')) AS item
+                    WHERE btrim(item) <> ''
+                )
+                WHERE r.id IN (
+                    SELECT id
+                    FROM call_records_extended
+                    WHERE key_results_list IS NULL
+                    ORDER BY id
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                );
+                """,
+                batch_size,
+            )
+        count = int(status.split()[-1])
+        if count == 0:
+            return migrated
+        migrated += count
+
+
+async def bulk_insert(
+    conn: asyncpg.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[tuple],
+) -> List[int]:
+    """
+    Insert many rows with a single COPY and return their ids in row order.
+
+    COPY cannot RETURNING, so ids are reserved from the table's SERIAL
+    sequence first and written explicitly.
+    """
+    if not rows:
+        return []
+
+    ids = [
+        r["id"]
+        for r in await conn.fetch(
+            "SELECT nextval(pg_get_serial_sequence($1, 'id')) AS id "
+            "FROM generate_series(1, $2)",
+            table,
+            len(rows),
         )
+    ]
+
+    await conn.copy_records_to_table(
+        table,
+        records=[(record_id, *row) for record_id, row in zip(ids, rows)],
+        columns=["id", *columns],
+    )
+    return ids
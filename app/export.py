@@ -0,0 +1,224 @@
+"""
+Streaming export of stored insights (GET /export, scripts/export_insights.py).
+
+CSV is streamed straight from COPY ... TO STDOUT. Parquet (needs pyarrow)
+is written from a server-side cursor, one row group per
+EXPORT_PARQUET_ROW_GROUP_ROWS rows, since COPY has no columnar format.
+Either way memory stays bounded by a few chunks / one row group.
+
+Each export runs on its own connection, outside the pool, so a long
+export never holds a connection the insert path is waiting for; at most
+EXPORT_MAX_CONCURRENT exports run at once.
+"""
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional, Sequence
+
+import asyncpg
+
+from .config import (
+    DATABASE_URL,
+    EXPORT_MAX_CONCURRENT,
+    EXPORT_PARQUET_ROW_GROUP_ROWS,
+    require,
+)
+from .db import connect_kwargs
+from .records import RECORD_FIELDS, selected_fields
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# CSV renderings for types COPY would write in Postgres' own syntax
+# (t / f, {a,b}); Parquet keeps the native types
+CSV_COLUMNS = {
+    "action_required": "r.action_required::text",
+    "objective_met": "r.objective_met::text",
+    "key_results_list": "to_json(r.key_results_list)",
+}
+
+# COPY chunks buffered between Postgres and a slow reader
+COPY_QUEUE_CHUNKS = 16
+
+_export_slots = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
+
+class ExportQuery(NamedTuple):
+    table: str
+    fmt: str
+    columns: List[str]
+    sql: str
+    args: tuple
+
+
+def export_query(
+    table: str,
+    fmt: str = "csv",
+    fields: Optional[Sequence[str]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> ExportQuery:
+    """
+    SELECT for an export of `table` in `fmt`, in id order; all columns
+    (transcript included) unless `fields` is given. Raises ValueError on
+    unknown fields.
+    """
+    columns = selected_fields(table, fields or RECORD_FIELDS[table])
+
+    where, args = [], []
+    for condition, value in (
+        ("r.created_at >= {}", created_after),
+        ("r.created_at < {}", created_before),
+    ):
+        if value is not None:
+            args.append(value)
+            where.append(condition.format(f"${len(args)}"))
+
+    expressions = {"transcript": "COALESCE(r.transcript, t.body)"}
+    if fmt == "csv":
+        expressions.update(CSV_COLUMNS)
+    select = [f"{expressions[c]} AS {c}" if c in expressions else f"r.{c}" for c in columns]
+    join = "LEFT JOIN transcripts t ON t.id = r.transcript_id" if "transcript" in columns else ""
+    sql = f"""
+        SELECT {", ".join(select)}
+        FROM {table} r {join}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY r.id
+    """
+    return ExportQuery(table, fmt, columns, sql, tuple(args))
+
+
+def require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+
+async def _connect() -> asyncpg.Connection:
+    # Timestamps in UTC, whatever the server default
+    return await asyncpg.connect(
+        require("DATABASE_URL", DATABASE_URL),
+        server_settings={"application_name": "insights-export", "TimeZone": "UTC"},
+        **connect_kwargs(),
+    )
+
+
+async def iter_export(query: ExportQuery) -> AsyncIterator[bytes]:
+    """
+    Export chunks of `query` in its format, read from Postgres only as
+    fast as the caller consumes them.
+    """
+    async with _export_slots:
+        conn = await _connect()
+        try:
+            iter_chunks = _iter_csv if query.fmt == "csv" else _iter_parquet
+            async for chunk in iter_chunks(conn, query):
+                yield chunk
+        finally:
+            await conn.close()
+
+
+async def _iter_csv(conn: asyncpg.Connection, query: ExportQuery) -> AsyncIterator[bytes]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=COPY_QUEUE_CHUNKS)
+    done = object()
+
+    async def copy() -> None:
+        try:
+            # A full queue blocks the output callback, which stops asyncpg
+            # reading the socket: Postgres waits instead of us buffering
+            await conn.copy_from_query(
+                query.sql, *query.args, output=queue.put, format="csv", header=True
+            )
+        finally:
+            await queue.put(done)
+
+    task = asyncio.create_task(copy())
+    try:
+        while (chunk := await queue.get()) is not done:
+            yield bytes(chunk)
+        await task  # re-raise a COPY error
+    finally:
+        task.cancel()
+
+
+def _arrow_schema(columns: Sequence[str]):
+    import pyarrow as pa
+
+    types = {
+        "id": pa.int64(),
+        "action_required": pa.bool_(),
+        "objective_met": pa.bool_(),
+        "agent_performance_rating": pa.int32(),
+        "created_at": pa.timestamp("us", tz="UTC"),
+        "key_results_list": pa.list_(pa.string()),
+    }
+    return pa.schema([(c, types.get(c, pa.string())) for c in columns])
+
+
+class _ChunkSink:
+    """
+    Write-only file for ParquetWriter that hands the written bytes back
+    in chunks, keeping the running offset the footer needs.
+    """
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def _iter_parquet(
+    conn: asyncpg.Connection, query: ExportQuery
+) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(query.columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    def write(rows: List[asyncpg.Record]) -> bytes:
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array([r[i] for r in rows], type=f.type) for i, f in enumerate(schema)],
+            schema=schema,
+        )
+        writer.write_batch(batch)
+        return sink.take()
+
+    rows: List[asyncpg.Record] = []
+    async with conn.transaction(readonly=True):
+        cursor = conn.cursor(query.sql, *query.args, prefetch=EXPORT_PARQUET_ROW_GROUP_ROWS)
+        async for row in cursor:
+            rows.append(row)
+            if len(rows) >= EXPORT_PARQUET_ROW_GROUP_ROWS:
+                # Encoding and compression are CPU-bound: keep them off the loop
+                yield await asyncio.to_thread(write, rows)
+                rows = []
+
+    if rows:
+        yield await asyncio.to_thread(write, rows)
+    await asyncio.to_thread(writer.close)
+    yield sink.take()
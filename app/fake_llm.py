@@ -0,0 +1,152 @@
+"""
+Local stand-in for Gemini, for load tests and capacity planning.
+
+Enabled with LLM_BACKEND=fake. Calls still go through the dispatcher, so
+limits, retries and the breaker behave as they would against Gemini.
+Responses are schema-valid and derived from a hash of the prompt (the
+same prompt always gets the same answer); latency is drawn from a
+lognormal distribution, and errors / 429s are injected at configured rates.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import re
+import typing
+from typing import AsyncIterator, Literal, Optional
+
+from pydantic import BaseModel
+
+from .config import (
+    FAKE_LLM_LATENCY_MS,
+    FAKE_LLM_LATENCY_SIGMA,
+    FAKE_LLM_ERROR_RATE,
+    FAKE_LLM_RATE_LIMIT_RATE,
+    FAKE_LLM_SEED,
+)
+
+
+# Streamed responses arrive in chunks of this many characters
+STREAM_CHUNK_CHARS = 32
+
+# Packed prompts (generate_insights_packed) number their transcripts
+PACKED_HEADER = re.compile(r"^### Transcript (\d+)$", re.MULTILINE)
+
+
+def _is_model(annotation) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _fake_value(name: str, annotation, digest: bytes, position: int, prompt: str):
+    byte = digest[position % len(digest)]
+    origin = typing.get_origin(annotation)
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+
+    if origin in (list, typing.List) and _is_model(args[0]):
+        # One item per packed transcript, answering with its index
+        items = []
+        for n in [int(n) for n in PACKED_HEADER.findall(prompt)] or [1]:
+            item = fake_response(f"{prompt}#{n}", args[0])
+            if "index" in args[0].model_fields:
+                item = item.model_copy(update={"index": n})
+            items.append(item)
+        return items
+    if origin is Literal:
+        return args[byte % len(args)]
+    if annotation is bool:
+        return bool(byte & 1)
+    if annotation is int:
+        return byte % 5 + 1  # agent_performance_rating is 1-5
+    if origin in (list, typing.List):
+        return [f"{name} {i + 1}" for i in range(byte % 3 + 1)]
+    if args and len(args) == 1:
+        # Optional[X]
+        return _fake_value(name, args[0], digest, position, prompt)
+    return f"fake {name.replace('_', ' ')} {digest.hex()[:8]}"
+
+
+def fake_response(prompt: str, schema: type) -> BaseModel:
+    """
+    Deterministic, schema-valid instance of `schema` for `prompt`.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    return schema.model_validate(
+        {
+            name: _fake_value(name, field.annotation, digest, i, prompt)
+            for i, (name, field) in enumerate(schema.model_fields.items())
+        }
+    )
+
+
+class FakeLLM:
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LLM_LATENCY_MS,
+        latency_sigma: float = FAKE_LLM_LATENCY_SIGMA,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        rate_limit_rate: float = FAKE_LLM_RATE_LIMIT_RATE,
+        seed: Optional[int] = FAKE_LLM_SEED,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+
+    def _latency(self) -> float:
+        """
+        Seconds; lognormal with median latency_ms (sigma 0 = constant).
+        """
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms / 1000 * math.exp(self._random.gauss(0, self.latency_sigma))
+
+    async def generate(self, prompt: str, schema: type) -> BaseModel:
+        await asyncio.sleep(self._latency())
+        self._maybe_fail()
+        return fake_response(prompt, schema)
+
+    async def stream(self, prompt: str, schema: type) -> AsyncIterator[str]:
+        """
+        The JSON of generate()'s answer in STREAM_CHUNK_CHARS pieces. The
+        first piece comes after a fifth of the drawn latency, the rest are
+        spread over the remainder; errors are injected before the first.
+        """
+        latency = self._latency()
+        await asyncio.sleep(latency / 5)
+        self._maybe_fail()
+
+        text = fake_response(prompt, schema).model_dump_json()
+        size = STREAM_CHUNK_CHARS
+        chunks = [text[i : i + size] for i in range(0, len(text), size)]
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(latency * 4 / 5 / (len(chunks) - 1))
+            yield chunk
+
+    def _maybe_fail(self) -> None:
+        roll = self._random.random()
+        if roll >= self.rate_limit_rate + self.error_rate:
+            return
+
+        # Imported only to inject an error: the SDK is slow to load
+        from google.genai import errors as genai_errors
+
+        if roll < self.rate_limit_rate:
+            raise genai_errors.ClientError(
+                429,
+                {
+                    "error": {
+                        "code": 429,
+                        "status": "RESOURCE_EXHAUSTED",
+                        "message": "fake quota exhausted",
+                    }
+                },
+            )
+        raise genai_errors.ServerError(
+            503,
+            {"error": {"code": 503, "status": "UNAVAILABLE", "message": "fake outage"}},
+        )
+
+
+fake_llm = FakeLLM()
@@ -0,0 +1,181 @@
+import json
+from typing import List, Optional
+
+import asyncpg
+
+from .config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY_SECONDS
+from .db import db
+
+
+class LostLeaseError(RuntimeError):
+    """
+    The job's lease expired and another worker reclaimed it.
+    """
+
+
+async def enqueue_job(mode: str, transcript: str) -> int:
+    """
+    Queue a transcript for analysis and return the job id.
+    """
+    async with db.acquire() as conn:
+        return await conn.fetchval(
+            "INSERT INTO analysis_jobs (mode, transcript) VALUES ($1, $2) RETURNING id;",
+            mode,
+            transcript,
+        )
+
+
+async def get_job(job_id: int) -> Optional[dict]:
+    async with db.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT id, mode, status, attempts, record_id, result, error,
+                   created_at, updated_at
+            FROM analysis_jobs
+            WHERE id = $1;
+            """,
+            job_id,
+        )
+
+    if row is None:
+        return None
+
+    return {
+        "id": row["id"],
+        "mode": row["mode"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "record_id": row["record_id"],
+        "insights": json.loads(row["result"]) if row["result"] is not None else None,
+        "error": row["error"],
+        "created_at": row["created_at"].isoformat(),
+        "updated_at": row["updated_at"].isoformat(),
+    }
+
+
+async def claim_jobs(
+    conn: asyncpg.Connection, worker_id: str, limit: int = 1
+) -> List[asyncpg.Record]:
+    """
+    Claim up to `limit` runnable jobs for this worker.
+
+    Runnable means queued (and due), or running with an expired lease,
+    i.e. left behind by a worker that crashed. SKIP LOCKED lets any number
+    of workers, in any number of processes, poll the table concurrently.
+    """
+    return await conn.fetch(
+        """
+        WITH next AS (
+            SELECT id
+            FROM analysis_jobs
+            WHERE (status = 'queued' AND run_after <= NOW())
+               OR (status = 'running' AND locked_until < NOW())
+            ORDER BY id
+            LIMIT $2
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE analysis_jobs AS j
+        SET status = 'running',
+            attempts = j.attempts + 1,
+            locked_by = $1,
+            locked_until = NOW() + make_interval(secs => $3),
+            updated_at = NOW()
+        FROM next
+        WHERE j.id = next.id
+        RETURNING j.id, j.mode, j.transcript, j.attempts;
+        """,
+        worker_id,
+        limit,
+        JOB_LEASE_SECONDS,
+    )
+
+
+async def extend_lease(conn: asyncpg.Connection, job_id: int, worker_id: str) -> bool:
+    """
+    Push a running job's lease JOB_LEASE_SECONDS into the future. False if
+    this worker no longer holds it.
+    """
+    status = await conn.execute(
+        """
+        UPDATE analysis_jobs
+        SET locked_until = NOW() + make_interval(secs => $3),
+            updated_at = NOW()
+        WHERE id = $1 AND locked_by = $2 AND status = 'running';
+        """,
+        job_id,
+        worker_id,
+        JOB_LEASE_SECONDS,
+    )
+    return status == "UPDATE 1"
+
+
+async def complete_job(
+    conn: asyncpg.Connection,
+    job_id: int,
+    worker_id: str,
+    record_id: int,
+    insights: dict,
+) -> None:
+    """
+    Mark a job done. Must run in the same transaction as the record insert:
+    if this worker lost its lease meanwhile, raising rolls the insert back
+    so the job is not stored twice.
+    """
+    status = await conn.execute(
+        """
+        UPDATE analysis_jobs
+        SET status = 'done',
+            record_id = $3,
+            result = $4::jsonb,
+            error = NULL,
+            locked_by = NULL,
+            locked_until = NULL,
+            updated_at = NOW()
+        WHERE id = $1 AND locked_by = $2 AND status = 'running';
+        """,
+        job_id,
+        worker_id,
+        record_id,
+        json.dumps(insights),
+    )
+
+    if status != "UPDATE 1":
+        raise LostLeaseError(f"Lost lease on job {job_id}")
+
+
+async def fail_job(
+    conn: asyncpg.Connection,
+    job_id: int,
+    worker_id: str,
+    attempts: int,
+    error: str,
+    retryable: bool,
+) -> None:
+    """
+    Requeue a job with exponential delay, or mark it failed for good once
+    it is not retryable or has used up JOB_MAX_ATTEMPTS.
+    """
+    if retryable and attempts < JOB_MAX_ATTEMPTS:
+        status = "queued"
+        delay = JOB_RETRY_DELAY_SECONDS * (2 ** (attempts - 1))
+    else:
+        status = "failed"
+        delay = 0.0
+
+    await conn.execute(
+        """
+        UPDATE analysis_jobs
+        SET status = $3,
+            error = $4,
+            run_after = NOW() + make_interval(secs => $5),
+            locked_by = NULL,
+            locked_until = NULL,
+            updated_at = NOW()
+        WHERE id = $1 AND locked_by = $2;
+        """,
+        job_id,
+        worker_id,
+        status,
+        error,
+        delay,
+    )
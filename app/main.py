@@ -1,63 +1,209 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Literal, Optional
 
-from .db import init_db, db
-from .models import TranscriptIn, CallInsight, CallInsightExtended
-from .ai_client import generate_insights, generate_insights_extended
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from .config import (
+    BATCH_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    CALLS_PAGE_SIZE,
+    CALLS_MAX_PAGE_SIZE,
+    DB_INIT_ON_STARTUP,
+    STREAM_CONCURRENCY,
+    STREAM_MAX_LINE_BYTES,
+    SINGLE_FLIGHT_ROWS,
+    WRITE_BEHIND_ENABLED,
+)
+from .db import (
+    init_db,
+    close_db,
+    db,
+    insert_insight_rows,
+    insert_call_record,
+    insert_call_record_extended,
+    call_record_row,
+    call_record_extended_row,
+    pool_stats,
+)
+from .models import (
+    AnalysisMode,
+    TranscriptIn,
+    BatchTranscriptsIn,
+    CombinedAnalysisIn,
+    JobIn,
+    CallInsight,
+    CallInsightExtended,
+    Sentiment,
+)
+from .ai_client import (
+    generate_insights,
+    generate_insights_extended,
+    generate_insights_extended_fields,
+    stream_insights,
+    selected_extended_fields,
+    CORE_FIELDS,
+    close_client,
+    dispatcher,
+    is_rate_limited,
+    CircuitOpenError,
+)
+from .cache import insight_cache, cache_key
+from .singleflight import single_flight
+from .jobs import enqueue_job, get_job
+from .worker import start_worker_pool, stop_worker_pool
+from .writer import batch_writer
+from .rollups import rollup_merger
+from .packing import insight_packer
+from .records import list_records, read_rollups, search_records
+from .export import export_query, iter_export, require_pyarrow, EXPORT_FORMATS
+from .metrics import registry, time_stage, MetricsMiddleware
+from .streaming import (
+    iter_ndjson_lines,
+    bounded_unordered,
+    sse_event,
+    DuplexStreamingResponse,
+)
 
 
 app = FastAPI(title="Conversational Insights Generator")
+app.add_middleware(MetricsMiddleware)
+
+
+def llm_http_error(e: Exception) -> HTTPException:
+    """
+    Map an LLM failure (after the dispatcher's retries) to an HTTP error:
+    429 when Gemini quota is exhausted, 503 while the breaker is open.
+    """
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=f"LLM unavailable: {e}",
+            headers={"Retry-After": str(int(dispatcher.breaker_cooldown))},
+        )
+    if is_rate_limited(e):
+        return HTTPException(
+            status_code=429,
+            detail=f"LLM error: {e}",
+            headers={"Retry-After": str(int(dispatcher.max_delay))},
+        )
+    return HTTPException(status_code=500, detail=f"LLM error: {e}")
 
 
 @app.on_event("startup")
 async def on_startup() -> None:
-    await init_db()
+    # Otherwise the pool is opened by the first request that needs it
+    if DB_INIT_ON_STARTUP:
+        await init_db()
+    await start_worker_pool()
+    rollup_merger.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await stop_worker_pool()
+    await rollup_merger.stop()
+    await batch_writer.close()
+    await close_client()
+    await close_db()
+
+
+async def store_call_record(transcript: str, insight: CallInsight) -> int:
+    if WRITE_BEHIND_ENABLED:
+        with time_stage("db_insert"):
+            return await batch_writer.write(
+                "call_records", call_record_row(transcript, insight)
+            )
+
+    async with db.acquire() as conn:
+        # Started once the connection is held: the pool wait is db_acquire
+        with time_stage("db_insert"):
+            async with conn.transaction():
+                return await insert_call_record(conn, transcript, insight)
+
+
+async def store_call_record_extended(
+    transcript: str, insight: CallInsightExtended
+) -> int:
+    if WRITE_BEHIND_ENABLED:
+        with time_stage("db_insert"):
+            return await batch_writer.write(
+                "call_records_extended", call_record_extended_row(transcript, insight)
+            )
+
+    async with db.acquire() as conn:
+        # Started once the connection is held: the pool wait is db_acquire
+        with time_stage("db_insert"):
+            async with conn.transaction():
+                return await insert_call_record_extended(conn, transcript, insight)
+
+
+async def analyze_cached(mode: str, transcript: str):
+    """
+    Insights for `mode` from the cache, or the LLM on a miss.
+    Returns (insight, cached); LLM failures surface as HTTP errors.
+    """
+    generate = generate_insights_extended if mode == "extended" else generate_insights
+
+    try:
+        return await insight_cache.get_or_generate(mode, transcript, generate)
+    except Exception as e:
+        # In real life you'd log this
+        raise llm_http_error(e)
+
+
+async def run_analysis(mode: str, transcript: str) -> dict:
+    """
+    Shared pipeline behind /analyze_call and /analyze_call_extended:
+    cache / LLM lookup (single-flighted), then insert, then response body.
+    """
+    store = store_call_record_extended if mode == "extended" else store_call_record
+
+    async def analyze():
+        return await analyze_cached(mode, transcript)
+
+    async def analyze_and_store():
+        insight, cached = await analyze()
+        return await store(transcript, insight), insight, cached
+
+    key = cache_key(mode, transcript)
+
+    if SINGLE_FLIGHT_ROWS == "shared":
+        # Deduplicated requests get the leader's row. Namespaced apart from
+        # ("insight", key): the two flights return differently shaped results.
+        (record_id, insight, cached), deduplicated = await single_flight.do(
+            ("stored", key), analyze_and_store
+        )
+    else:
+        (insight, cached), deduplicated = await single_flight.do(
+            ("insight", key), analyze
+        )
+        record_id = await store(transcript, insight)
+
+    return {
+        "id": record_id,
+        "cached": cached,
+        "deduplicated": deduplicated,
+        "insights": insight.model_dump(),
+    }
 
 
 @app.post("/analyze_call")
 async def analyze_call(payload: TranscriptIn):
     """
     1. Take transcript
-    2. Get structured insights from LLM
+    2. Get structured insights from the cache, or the LLM on a miss
+       (concurrent identical requests share one LLM call)
     3. Save to Postgres
-    4. Return id + insights
+    4. Return id + insights (+ whether they came from cache)
     """
     transcript = payload.transcript.strip()
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript cannot be empty")
 
-    try:
-        insight: CallInsight = await generate_insights(transcript)
-    except Exception as e:
-        # In real life you'd log this
-        raise HTTPException(status_code=500, detail=f"LLM error: {e}")
-
-    if db.pool is None:
-        raise HTTPException(status_code=500, detail="Database is not initialized")
-
-    insert_sql = """
-        INSERT INTO call_records (transcript, intent, sentiment, action_required, summary)
-        VALUES ($1, $2, $3, $4, $5)
-        RETURNING id;
-    """
-
-    async with db.pool.acquire() as conn:
-        async with conn.transaction():
-            record_id = await conn.fetchval(
-                insert_sql,
-                transcript,
-                insight.customer_intent,
-                insight.sentiment,
-                insight.action_required,
-                insight.summary,
-            )
-
-    return JSONResponse(
-        {
-            "id": record_id,
-            "insights": insight.model_dump(),
-        }
-    )
+    return JSONResponse(await run_analysis("basic", transcript))
 
 
 @app.post("/analyze_call_extended")
@@ -75,68 +221,558 @@ async def analyze_call_extended(payload: TranscriptIn):
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript cannot be empty")
 
+    return JSONResponse(await run_analysis("extended", transcript))
+
+
+async def iter_insight_events(mode: str, transcript: str) -> AsyncIterator[str]:
+    """
+    Server-sent events for one streamed analysis:
+    - `field` {"field", "value"}: a top-level insight field, as soon as the
+      model has finished writing it
+    - `done` {"id", "cached", "insights"}: the validated insights, once
+      stored; any field not streamed (cache hit, rule-based fast path,
+      map-reduce of a long call) is sent just before it
+    - `error` {"status", "detail"}: the analysis or the insert failed
+
+    Not single-flighted: every stream gets its own generation on a cache miss.
+    """
+    store = store_call_record_extended if mode == "extended" else store_call_record
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def on_field(name: str, value) -> None:
+        queue.put_nowait(("field", name, value))
+
+    async def analyze_and_store():
+        try:
+            try:
+                insight, cached = await insight_cache.get_or_generate(
+                    mode, transcript, lambda t: stream_insights(mode, t, on_field)
+                )
+            except Exception as e:
+                raise llm_http_error(e)
+            return await store(transcript, insight), insight, cached
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.create_task(analyze_and_store())
     try:
-        insight: CallInsightExtended = await generate_insights_extended(transcript)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM error: {e}")
-
-    if db.pool is None:
-        raise HTTPException(status_code=500, detail="Database is not initialized")
-
-    insert_sql = """
-        INSERT INTO call_records_extended (
-            transcript,
-            customer_intent,
-            sentiment,
-            action_required,
-            summary,
-            primary_purpose,
-            objective_met,
-            key_results,
-            customer_intentions,
-            circumstances,
-            reasons_non_payment,
-            financial_hardship,
-            start_sentiment,
-            end_sentiment,
-            agent_performance_rating,
-            agent_performance_notes
-        )
-        VALUES (
-            $1,$2,$3,$4,$5,
-            $6,$7,$8,$9,$10,
-            $11,$12,$13,$14,$15,$16
+        sent = set()
+        while (item := await queue.get()) is not done:
+            _, name, value = item
+            sent.add(name)
+            yield sse_event("field", {"field": name, "value": value})
+
+        try:
+            record_id, insight, cached = await task
+        except HTTPException as e:
+            yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+            return
+        except Exception as e:
+            yield sse_event("error", {"status": 500, "detail": f"Storage error: {e}"})
+            return
+
+        insights = insight.model_dump()
+        for name, value in insights.items():
+            if name not in sent:
+                yield sse_event("field", {"field": name, "value": value})
+        yield sse_event("done", {"id": record_id, "cached": cached, "insights": insights})
+    finally:
+        # The client went away mid-stream: stop generating
+        task.cancel()
+
+
+def insight_event_stream(mode: str, transcript: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_insight_events(mode, transcript),
+        media_type="text/event-stream",
+        # Proxies must pass each event on as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze_call/stream")
+async def analyze_call_stream(payload: TranscriptIn):
+    """
+    /analyze_call as server-sent events: fields are sent while Gemini
+    generates them, and the stored row's id comes with the final `done`.
+    """
+    transcript = payload.transcript.strip()
+    if not transcript:
+        raise HTTPException(status_code=400, detail="Transcript cannot be empty")
+
+    return insight_event_stream("basic", transcript)
+
+
+@app.post("/analyze_call_extended/stream")
+async def analyze_call_extended_stream(payload: TranscriptIn):
+    """
+    /analyze_call_extended as server-sent events (see /analyze_call/stream).
+    """
+    transcript = payload.transcript.strip()
+    if not transcript:
+        raise HTTPException(status_code=400, detail="Transcript cannot be empty")
+
+    return insight_event_stream("extended", transcript)
+
+
+@app.post("/analyze_call_combined")
+async def analyze_call_combined(payload: CombinedAnalysisIn):
+    """
+    Basic + extended analysis from a single LLM call:
+    - runs the extended analysis once and derives the CallInsight from it
+    - writes call_records and call_records_extended in one transaction
+    - `fields` asks only for the listed extended fields (core fields are
+      always included); since the extended row needs every field, only
+      call_records is written in that case
+    """
+    transcript = payload.transcript.strip()
+    if not transcript:
+        raise HTTPException(status_code=400, detail="Transcript cannot be empty")
+
+    if payload.fields is None:
+        (extended, cached), deduplicated = await single_flight.do(
+            ("insight", cache_key("extended", transcript)),
+            lambda: analyze_cached("extended", transcript),
         )
-        RETURNING id;
-    """
-
-    key_results_str = "; ".join(insight.key_results) if insight.key_results else ""
-
-    async with db.pool.acquire() as conn:
-        async with conn.transaction():
-            record_id = await conn.fetchval(
-                insert_sql,
-                transcript,
-                insight.customer_intent,
-                insight.sentiment,
-                insight.action_required,
-                insight.summary,
-                insight.primary_purpose,
-                insight.objective_met,
-                key_results_str,
-                insight.customer_intentions,
-                insight.circumstances,
-                insight.reasons_non_payment,
-                insight.financial_hardship,
-                insight.start_sentiment,
-                insight.end_sentiment,
-                insight.agent_performance_rating,
-                insight.agent_performance_notes,
-            )
+    else:
+        try:
+            selected_extended_fields(payload.fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            extended = await generate_insights_extended_fields(transcript, payload.fields)
+        except Exception as e:
+            raise llm_http_error(e)
+        cached, deduplicated = False, False
+
+    insight = CallInsight.model_validate(extended.model_dump(include=set(CORE_FIELDS)))
+
+    async with db.acquire() as conn:
+        with time_stage("db_insert"):
+            async with conn.transaction():
+                record_id = await insert_call_record(conn, transcript, insight)
+                extended_id = (
+                    await insert_call_record_extended(conn, transcript, extended)
+                    if isinstance(extended, CallInsightExtended)
+                    else None
+                )
 
     return JSONResponse(
         {
             "id": record_id,
+            "extended_id": extended_id,
+            "cached": cached,
+            "deduplicated": deduplicated,
             "insights": insight.model_dump(),
+            "insights_extended": extended.model_dump(),
+        }
+    )
+
+
+@app.post("/analyze_calls_batch")
+async def analyze_calls_batch(payload: BatchTranscriptsIn):
+    """
+    Batch analysis (basic or extended mode):
+    1. Fan transcripts out to the LLM with bounded concurrency
+    2. Bulk insert every successful result with a single COPY
+    3. Return a per-item result, so one bad transcript doesn't fail the batch
+    """
+    if not payload.transcripts:
+        raise HTTPException(status_code=400, detail="Transcripts cannot be empty")
+
+    if len(payload.transcripts) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large (max {BATCH_MAX_ITEMS} transcripts)",
+        )
+
+    if payload.mode == "extended":
+        generate = generate_insights_extended
+        table, to_row = "call_records_extended", call_record_extended_row
+    elif insight_packer.enabled:
+        generate = insight_packer.generate
+        table, to_row = "call_records", call_record_row
+    else:
+        generate = generate_insights
+        table, to_row = "call_records", call_record_row
+
+    concurrency = min(payload.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    if generate is insight_packer.generate:
+        # Each LLM call carries up to max_items transcripts
+        concurrency *= insight_packer.max_items
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def analyze_one(index: int, raw: str) -> dict:
+        transcript = raw.strip()
+        if not transcript:
+            return {"index": index, "ok": False, "error": "Transcript cannot be empty"}
+
+        async with semaphore:
+            try:
+                (insight, cached), _ = await single_flight.do(
+                    ("insight", cache_key(payload.mode, transcript)),
+                    lambda: insight_cache.get_or_generate(
+                        payload.mode, transcript, generate
+                    ),
+                )
+            except Exception as e:
+                return {"index": index, "ok": False, "error": f"LLM error: {e}"}
+
+        return {
+            "index": index,
+            "ok": True,
+            "cached": cached,
+            "transcript": transcript,
+            "insight": insight,
         }
+
+    outcomes = await asyncio.gather(
+        *(analyze_one(i, t) for i, t in enumerate(payload.transcripts))
+    )
+
+    succeeded = [o for o in outcomes if o["ok"]]
+    rows = [to_row(o["transcript"], o["insight"]) for o in succeeded]
+
+    async with db.acquire() as conn:
+        with time_stage("db_insert"):
+            async with conn.transaction():
+                ids = await insert_insight_rows(conn, table, rows)
+
+    for outcome, record_id in zip(succeeded, ids):
+        outcome["id"] = record_id
+        outcome["insights"] = outcome.pop("insight").model_dump()
+        del outcome["transcript"]
+
+    return JSONResponse(
+        {
+            "mode": payload.mode,
+            "succeeded": len(succeeded),
+            "failed": len(outcomes) - len(succeeded),
+            "results": outcomes,
+        }
+    )
+
+
+@app.post("/analyze_calls_stream")
+async def analyze_calls_stream(
+    request: Request,
+    mode: AnalysisMode = "basic",
+    concurrency: int | None = None,
+):
+    """
+    Streaming bulk ingestion for backfills.
+
+    Request body: NDJSON, one {"id": ..., "transcript": ...} per line, where
+    `id` is the caller's correlation id (defaults to the line number).
+    Response: NDJSON, one result per input line in completion order, each
+    tagged with that id. Input is parsed incrementally and read only as
+    fast as transcripts are processed, so memory stays flat.
+    """
+    store = store_call_record_extended if mode == "extended" else store_call_record
+    limit = min(concurrency or STREAM_CONCURRENCY, STREAM_CONCURRENCY)
+
+    async def items():
+        line_no = 0
+        async for line in iter_ndjson_lines(request.stream(), STREAM_MAX_LINE_BYTES):
+            line_no += 1
+            yield line_no, line
+
+    async def handle(item) -> dict:
+        line_no, line = item
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return {"id": line_no, "ok": False, "error": "Invalid JSON line"}
+        if not isinstance(obj, dict):
+            return {"id": line_no, "ok": False, "error": "Expected a JSON object"}
+
+        correlation_id = obj.get("id", line_no)
+        transcript = str(obj.get("transcript") or "").strip()
+        if not transcript:
+            return {"id": correlation_id, "ok": False, "error": "Transcript cannot be empty"}
+
+        try:
+            (insight, cached), _ = await single_flight.do(
+                ("insight", cache_key(mode, transcript)),
+                lambda: analyze_cached(mode, transcript),
+            )
+            record_id = await store(transcript, insight)
+        except HTTPException as e:
+            return {"id": correlation_id, "ok": False, "error": e.detail}
+        except Exception as e:
+            return {"id": correlation_id, "ok": False, "error": f"Storage error: {e}"}
+
+        return {
+            "id": correlation_id,
+            "ok": True,
+            "record_id": record_id,
+            "cached": cached,
+            "insights": insight.model_dump(),
+        }
+
+    async def body():
+        try:
+            async for result in bounded_unordered(items(), handle, limit):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            # The status line is already sent; report the abort in-band
+            yield json.dumps({"ok": False, "error": f"Stream aborted: {e}"}) + "\n"
+
+    return DuplexStreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(payload: JobIn):
+    """
+    Async mode: queue the transcript and return a job id right away.
+    A worker runs the analysis; poll GET /jobs/{id} for the result.
+    """
+    transcript = payload.transcript.strip()
+    if not transcript:
+        raise HTTPException(status_code=400, detail="Transcript cannot be empty")
+
+    job_id = await enqueue_job(payload.mode, transcript)
+
+    return JSONResponse(
+        {"job_id": job_id, "status": "queued"},
+        status_code=202,
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def read_job(job_id: int):
+    """
+    Job status (queued / running / done / failed), with the record id and
+    insights once done.
+    """
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JSONResponse(job)
+
+
+async def read_records(table: str, fields: Optional[str], **filters) -> JSONResponse:
+    try:
+        page = await list_records(
+            table,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            **filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(page)
+
+
+@app.get("/calls")
+async def list_calls(
+    fields: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(CALLS_PAGE_SIZE, ge=1, le=CALLS_MAX_PAGE_SIZE),
+    sentiment: Optional[Sentiment] = None,
+    action_required: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+):
+    """
+    Stored basic insights, newest first, one page at a time:
+    - `cursor`: the previous page's next_cursor (null on the last page)
+    - `fields`: comma-separated columns to return; the transcript is only
+      included when listed
+    - filters on sentiment, action_required and a created_at window
+      [created_after, created_before)
+    """
+    return await read_records(
+        "call_records",
+        fields,
+        cursor=cursor,
+        limit=limit,
+        sentiment=sentiment,
+        action_required=action_required,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
+
+@app.get("/calls_extended")
+async def list_calls_extended(
+    fields: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(CALLS_PAGE_SIZE, ge=1, le=CALLS_MAX_PAGE_SIZE),
+    sentiment: Optional[Sentiment] = None,
+    action_required: Optional[bool] = None,
+    objective_met: Optional[bool] = None,
+    min_rating: Optional[int] = Query(None, ge=1, le=5),
+    max_rating: Optional[int] = Query(None, ge=1, le=5),
+    key_result: Optional[List[str]] = Query(None),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+):
+    """
+    Stored extended insights, paginated and projected like GET /calls, with
+    extra filters on objective_met, an agent rating range and outcomes
+    (`key_result`, repeatable: calls with all of the listed key results).
+    """
+    return await read_records(
+        "call_records_extended",
+        fields,
+        cursor=cursor,
+        limit=limit,
+        sentiment=sentiment,
+        action_required=action_required,
+        objective_met=objective_met,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        key_results=key_result,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
+
+@app.get("/search")
+async def search_calls(
+    q: str = Query(..., min_length=1),
+    mode: AnalysisMode = "basic",
+    fuzzy: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = Query(CALLS_PAGE_SIZE, ge=1, le=CALLS_MAX_PAGE_SIZE),
+):
+    """
+    Ranked full-text search over transcripts and summaries of stored calls
+    (call_records, or call_records_extended with mode=extended):
+    - `q` in web search syntax: words, "quoted phrases", or, -excluded
+    - `fuzzy` also matches spelling variants ("thik" / "theek") when the
+      server has pg_trgm; the response says whether it was used
+    - paginate with `cursor` = the previous page's next_cursor
+    """
+    table = "call_records_extended" if mode == "extended" else "call_records"
+    try:
+        page = await search_records(table, q, fuzzy=fuzzy, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(page)
+
+
+@app.get("/export")
+async def export_calls(
+    mode: AnalysisMode = "basic",
+    fmt: Literal["csv", "parquet"] = Query("csv", alias="format"),
+    fields: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+):
+    """
+    Download call_records (or call_records_extended with mode=extended) as
+    CSV or Parquet, streamed from Postgres with constant memory:
+    - `fields`: comma-separated columns; all, transcript included, by default
+    - `created_after` / `created_before`: created_at window
+    """
+    table = "call_records_extended" if mode == "extended" else "call_records"
+    try:
+        query = export_query(
+            table,
+            fmt,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fmt == "parquet":
+        try:
+            require_pyarrow()
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+
+    return StreamingResponse(
+        iter_export(query),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
+
+
+@app.get("/stats")
+async def dashboard_stats(
+    mode: AnalysisMode = "extended",
+    granularity: Literal["hour", "day"] = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Dashboard aggregates per hour or day: sentiment mix, action-required
+    and objective-met rates, average agent rating (extended only).
+    Served from the rollup tables, so the cost does not grow with history.
+    `since` defaults to 30 days (day) or 48 hours (hour) ago.
+    """
+    if since is None:
+        window = timedelta(days=30) if granularity == "day" else timedelta(hours=48)
+        since = datetime.now(timezone.utc) - window
+
+    table = "call_records_extended" if mode == "extended" else "call_records"
+    return JSONResponse(await read_rollups(table, granularity, since, until))
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters for the insight cache, plus the LLM calls and
+    latency the hits saved.
+    """
+    return JSONResponse(insight_cache.stats())
+
+
+@app.get("/writer/stats")
+async def writer_stats():
+    """
+    Write-behind writer: flush count, batch-size histogram and flush latency.
+    """
+    return JSONResponse(batch_writer.stats())
+
+
+@app.get("/packing/stats")
+async def packing_stats():
+    """
+    Packed LLM calls, transcripts per pack and the calls saved.
+    """
+    return JSONResponse(insight_packer.stats())
+
+
+@app.get("/llm/stats")
+async def llm_stats():
+    """
+    Dispatcher state: current AIMD limit, in-flight/waiting calls,
+    breaker state and retry counters.
+    """
+    return JSONResponse(dispatcher.stats())
+
+
+@app.get("/singleflight/stats")
+async def singleflight_stats():
+    """
+    How many requests started an LLM call vs. joined one already in flight.
+    """
+    return JSONResponse(single_flight.stats())
+
+
+@app.get("/db/stats")
+async def db_stats():
+    """
+    Postgres pool size, idle and in-use connections.
+    """
+    return JSONResponse(pool_stats())
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint: request and per-stage latency histograms,
+    LLM errors and token counts, DB pool and dispatcher gauges.
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
     )
@@ -0,0 +1,258 @@
+"""
+Prometheus-style metrics, rendered in the text exposition format on
+GET /metrics.
+
+Kept dependency-free and cheap enough to leave on: recording a sample is
+a dict lookup plus a bisect. Per-request labels come from `endpoint`, a
+context variable set by MetricsMiddleware, so code deep in the pipeline
+(dispatcher, DB helpers) can time its stage without being passed the route.
+"""
+import bisect
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Route template of the request being served; "background" for job workers
+# and other work not started by an HTTP request
+endpoint: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "endpoint", default="background"
+)
+
+# Seconds; covers a fast pool acquire up to a slow, retried LLM call
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0.0)
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {value:g}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(labels[n] for n in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{bound:g}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            cumulative += counts[-1]
+            inf = _labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{inf} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {total:g}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class Gauge:
+    """
+    Read at scrape time from `read`, which returns {label values: value}.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in self.read().items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {value:g}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(
+    Histogram(
+        "insights_request_seconds",
+        "HTTP request latency by route template and status.",
+        ("endpoint", "method", "status"),
+    )
+)
+STAGE_SECONDS = registry.register(
+    Histogram(
+        "insights_stage_seconds",
+        "Time spent per pipeline stage: llm_slot_wait, thread_wait, llm_call, "
+        "llm_total, db_acquire, db_insert.",
+        ("endpoint", "stage"),
+    )
+)
+LLM_ERRORS = registry.register(
+    Counter(
+        "insights_llm_errors_total",
+        "Failed LLM attempts by endpoint and error type (Gemini status or exception class).",
+        ("endpoint", "type"),
+    )
+)
+LLM_TOKENS = registry.register(
+    Counter(
+        "insights_llm_tokens_total",
+        "Prompt and response tokens reported in Gemini usage metadata, by endpoint.",
+        ("endpoint", "schema", "kind"),
+    )
+)
+
+
+def time_stage(stage: str):
+    """
+    Context manager timing `stage` for the current request's endpoint.
+    """
+    return STAGE_SECONDS.time(endpoint=endpoint.get(), stage=stage)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, endpoint=endpoint.get(), stage=stage)
+
+
+def record_usage(schema: type, response) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    labels = {"endpoint": endpoint.get(), "schema": schema.__name__}
+    LLM_TOKENS.inc(usage.prompt_token_count or 0, kind="prompt", **labels)
+    LLM_TOKENS.inc(usage.candidates_token_count or 0, kind="response", **labels)
+
+
+def record_llm_error(exc_type: str) -> None:
+    LLM_ERRORS.inc(endpoint=endpoint.get(), type=exc_type)
+
+
+def error_type(exc: BaseException) -> str:
+    status = getattr(exc, "status", None)
+    return status if isinstance(status, str) and status else type(exc).__name__
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request and sets the `endpoint` context variable to
+    the matched route template (e.g. /jobs/{job_id}) for stage metrics.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    def _route(self, scope: Scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        token = endpoint.set(route)
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                endpoint=route,
+                method=scope["method"],
+                status=status,
+            )
+            endpoint.reset(token)
@@ -2,6 +2,7 @@ from typing import Literal, List
 from pydantic import BaseModel
 
 Sentiment = Literal["Negative", "Neutral", "Positive"]
+AnalysisMode = Literal["basic", "extended"]
 
 
 class CallInsight(BaseModel):
@@ -34,3 +35,21 @@ class CallInsightExtended(BaseModel):
 
 class TranscriptIn(BaseModel):
     transcript: str
+
+
+class BatchTranscriptsIn(BaseModel):
+    transcripts: List[str]
+    mode: AnalysisMode = "basic"
+    # Optional per-request override, capped at BATCH_CONCURRENCY
+    concurrency: int | None = None
+
+
+class CombinedAnalysisIn(BaseModel):
+    transcript: str
+    # Subset of CallInsightExtended fields to extract; None means all
+    fields: List[str] | None = None
+
+
+class JobIn(BaseModel):
+    transcript: str
+    mode: AnalysisMode = "basic"
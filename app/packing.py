@@ -0,0 +1,128 @@
+import asyncio
+from typing import List, Tuple
+
+from .ai_client import (
+    generate_insights_llm,
+    generate_insights_packed,
+    prepare_transcript,
+)
+from .config import (
+    PRECLASSIFIER_ENABLED,
+    PACKING_ENABLED,
+    PACKING_MAX_ITEMS,
+    PACKING_MAX_ITEM_TOKENS,
+    PACKING_MAX_WAIT_MS,
+)
+from .models import CallInsight
+from .preclassifier import preclassify
+from .segmentation import estimate_tokens
+
+
+class InsightPacker:
+    """
+    Packs concurrent basic analyses of short transcripts into one LLM call.
+
+    Drop-in for generate_insights: generate() queues a short transcript and
+    resolves with its own CallInsight once the pack is answered. A pack is
+    sent when it holds max_items transcripts or max_wait seconds after its
+    first one, whichever comes first. Longer transcripts are analyzed on
+    their own right away.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = PACKING_ENABLED,
+        max_items: int = PACKING_MAX_ITEMS,
+        max_item_tokens: int = PACKING_MAX_ITEM_TOKENS,
+        max_wait: float = PACKING_MAX_WAIT_MS / 1000,
+    ) -> None:
+        self.enabled = enabled
+        self.max_items = max(max_items, 1)
+        self.max_item_tokens = max_item_tokens
+        self.max_wait = max_wait
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._packs: set = set()
+
+        self.packed_calls = 0
+        self.packed_items = 0
+        self.unpacked_items = 0
+
+    async def generate(self, transcript: str) -> CallInsight:
+        if PRECLASSIFIER_ENABLED:
+            insight = preclassify(transcript)
+            if insight is not None:
+                return insight
+
+        # Compacted once: sized here, then sent as is
+        text = prepare_transcript(transcript)
+        if (
+            not self.enabled
+            or self.max_items == 1
+            or estimate_tokens(text) > self.max_item_tokens
+        ):
+            self.unpacked_items += 1
+            return await generate_insights_llm(text, prepared=True)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_items:
+            self._send()
+        elif len(self._pending) == 1:
+            self._timer = loop.call_later(self.max_wait, self._send)
+
+        return await future
+
+    def _send(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pack, self._pending = self._pending, []
+        if not pack:
+            return
+
+        task = asyncio.ensure_future(self._run(pack))
+        self._packs.add(task)
+        task.add_done_callback(self._packs.discard)
+
+    async def _run(self, pack: List[Tuple[str, asyncio.Future]]) -> None:
+        transcripts = [t for t, _ in pack]
+        try:
+            if len(pack) == 1:
+                self.unpacked_items += 1
+                insights = [await generate_insights_llm(transcripts[0], prepared=True)]
+            else:
+                self.packed_calls += 1
+                self.packed_items += len(pack)
+                insights = await generate_insights_packed(transcripts, prepared=True)
+        except Exception as e:
+            for _, future in pack:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), insight in zip(pack, insights):
+            if not future.done():
+                future.set_result(insight)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_items": self.max_items,
+            "pending": len(self._pending),
+            "packed_calls": self.packed_calls,
+            "packed_items": self.packed_items,
+            "unpacked_items": self.unpacked_items,
+            "avg_pack_size": (
+                self.packed_items / self.packed_calls if self.packed_calls else 0.0
+            ),
+            # LLM calls avoided by packing
+            "calls_saved": self.packed_items - self.packed_calls,
+        }
+
+
+insight_packer = InsightPacker()
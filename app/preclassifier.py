@@ -0,0 +1,236 @@
+"""
+Rule-based fast path for basic analysis, tried before the LLM
+(PRECLASSIFIER_ENABLED).
+
+Many collection calls follow a script: a pre-due reminder the customer
+confirms, a payment refused over a disputed charge. classify() scores the
+turns for a few signals (promise to pay, dispute, hardship, settlement,
+legal threat) with weighted keyword / regex cues, English and Hinglish.
+When one signal clearly dominates a short call, the CallInsight is filled
+in from that signal's template; anything else goes to Gemini.
+
+Confidence is in [0, 1]: the strength of the dominant signal, discounted
+by the strongest competing one (a refusal to pay competes with a promise
+to pay only). PRECLASSIFIER_MIN_CONFIDENCE is the cut-off;
+scripts/preclassifier_agreement.py measures how often the fast path agrees
+with stored LLM results at each threshold.
+"""
+import math
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .compaction import SPEAKER_ALIASES
+from .config import PRECLASSIFIER_MAX_TOKENS, PRECLASSIFIER_MIN_CONFIDENCE
+from .metrics import registry, Counter
+from .models import CallInsight
+from .segmentation import estimate_tokens, split_turns
+
+
+# Bump when cues or templates change, so cached fast-path insights are not reused
+PRECLASSIFIER_VERSION = "1"
+
+PRECLASSIFIER_CALLS = registry.register(
+    Counter(
+        "insights_preclassifier_total",
+        "Basic analyses answered by the rule-based fast path (hit) or sent to the LLM.",
+        ("outcome", "signal"),
+    )
+)
+
+# (speaker, pattern, weight): speaker "C" / "A" as in SPEAKER_ALIASES, or
+# None for either. Each cue counts once per call, however often it matches.
+CUES: Dict[str, List[Tuple[Optional[str], str, float]]] = {
+    "ptp": [
+        ("C", r"\b(?:will|i'll|shall)\s+(?:definitely\s+|surely\s+)?(?:pay|clear)\b", 1.0),
+        ("C", r"\bpay\b[^.?!]{0,20}\bon time\b", 0.8),
+        ("C", r"\b(?:kar|de|bhar|clear kar)\s+(?:dunga|dungi|denge)\b", 0.8),
+        ("C", r"\bpakka\b", 0.4),
+        (None, r"\bpromise to pay\b|\bptp\b", 1.0),
+    ],
+    "refusal": [
+        ("C", r"\bnahi\s+(?:de|kar|bhar)\s+(?:sakta|sakti|paunga|paungi|payenge|sakte)\b", 1.5),
+        ("C", r"\b(?:can't|cannot|won't|will not)\s+pay\b", 1.5),
+        ("C", r"\b(?:payment|paisa|pay)\s+nahi\s+(?:karunga|karungi|dunga|dungi)\b", 1.5),
+        ("C", r"\bnahi\s+ho\s+payega\b", 1.0),
+    ],
+    "dispute": [
+        (None, r"\bdisputes?\b|\bdisputed\b", 1.0),
+        ("C", r"\bfraud\b", 1.0),
+        ("C", r"\b(?:wrong|galat)\s+(?:charge|transaction|amount)\b", 1.0),
+        ("C", r"\bnot my transaction\b", 1.0),
+    ],
+    "hardship": [
+        (None, r"\bhardship\b", 1.0),
+        ("C", r"\bjob\s+(?:chali gayi|chali gai|lost)\b|\blost my job\b", 1.0),
+        ("C", r"\bhospital\b|\bmedical\b|\billness\b", 0.8),
+        ("C", r"\brestructur\w*\b", 0.8),
+        ("C", r"\bemergency\b", 0.5),
+    ],
+    "settlement": [
+        (None, r"\bsettlement\b|\bsettle\b|\bone[- ]time settlement\b|\bots\b", 1.0),
+        (None, r"\bwaive\w*\b|\bwaiver\b", 0.6),
+    ],
+    "legal_threat": [
+        (None, r"\blegal\s+(?:notice|action|department|team|proceedings?)\b", 1.0),
+        (None, r"\bcourt\b|\barbitration\b|\bpolice\b|\bfir\b", 1.0),
+        ("C", r"\blawyer\b|\bvakil\b", 1.0),
+        ("A", r"\bexternal agency\b|\bfield visit\b|\bvisit karne\b", 0.6),
+    ],
+}
+
+COMPILED_CUES = {
+    signal: [(speaker, re.compile(p, re.IGNORECASE), weight) for speaker, p, weight in cues]
+    for signal, cues in CUES.items()
+}
+
+# Insight per dominant signal; a promise to pay is filled in by _template
+TEMPLATES = {
+    "dispute": CallInsight(
+        customer_intent="Get a disputed charge resolved before paying",
+        sentiment="Negative",
+        action_required=True,
+        summary="Collection call. The customer disputes a charge and will not pay until "
+        "it is resolved.",
+    ),
+    "hardship": CallInsight(
+        customer_intent="Get relief on the dues due to financial hardship",
+        sentiment="Negative",
+        action_required=True,
+        summary="Collection call. The customer reported financial hardship and asked for relief.",
+    ),
+    "settlement": CallInsight(
+        customer_intent="Settle the outstanding dues",
+        sentiment="Neutral",
+        action_required=True,
+        summary="Collection call. The customer asked about settling the outstanding dues.",
+    ),
+    "legal_threat": CallInsight(
+        customer_intent="Respond to escalation over unpaid dues",
+        sentiment="Negative",
+        action_required=True,
+        summary="Collection call escalated to legal action over the unpaid dues.",
+    ),
+}
+
+# A cue preceded by a negation in the same clause counts as refusal instead
+# ("main payment nahi karunga", "I will not pay")
+NEGATION = re.compile(r"\b(?:nahi|nahin|not|never|mat|won't|can't)\b", re.IGNORECASE)
+CLAUSE_BREAK = re.compile(r"[.?!,;]")
+
+# Whether the call is before the due date (the promise is to pay on time)
+# or after it (the promise settles an overdue amount and needs follow-up)
+OVERDUE = re.compile(
+    r"\boverdue\b|\b\d+\s+(?:days|din)\b|\bpending\b|\blate fees?\b|\bpenalty\b|"
+    r"\bnpa\b|\bdefault\b",
+    re.IGNORECASE,
+)
+WHEN = re.compile(
+    r"\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday|tomorrow|kal|"
+    r"next week|next month|\d{1,2}(?:st|nd|rd|th))\b",
+    re.IGNORECASE,
+)
+
+
+class Classification(NamedTuple):
+    # Dominant signal, or None when nothing matched
+    signal: Optional[str]
+    confidence: float
+    # Summed cue weights per signal
+    evidence: Dict[str, float]
+    # Template insight for the dominant signal (None for refusal / no signal)
+    insight: Optional[CallInsight]
+
+
+def _speaker_turns(transcript: str) -> List[Tuple[Optional[str], str]]:
+    turns = []
+    for turn in split_turns(transcript.replace("’", "'")):
+        label, sep, text = turn.partition(":")
+        speaker = SPEAKER_ALIASES.get(label.strip().lower()) if sep else None
+        turns.append((speaker, text if speaker else turn))
+    return turns
+
+
+def _negated(text: str, start: int) -> bool:
+    clause = CLAUSE_BREAK.split(text[:start])[-1]
+    return bool(NEGATION.search(clause))
+
+
+def _evidence(turns: List[Tuple[Optional[str], str]]) -> Dict[str, float]:
+    matched: Dict[str, set] = {signal: set() for signal in COMPILED_CUES}
+    for signal, cues in COMPILED_CUES.items():
+        for i, (speaker, pattern, weight) in enumerate(cues):
+            for turn_speaker, text in turns:
+                if speaker is not None and turn_speaker not in (speaker, None):
+                    continue
+                for match in pattern.finditer(text):
+                    if signal == "ptp" and _negated(text, match.start()):
+                        matched["refusal"].add(("negated", i, weight))
+                    else:
+                        matched[signal].add((signal, i, weight))
+    return {signal: sum(w for *_, w in cues) for signal, cues in matched.items()}
+
+
+def _strength(evidence: float) -> float:
+    return 1 - math.exp(-evidence)
+
+
+def _template(signal: str, turns: List[Tuple[Optional[str], str]]) -> Optional[CallInsight]:
+    if signal != "ptp":
+        return TEMPLATES[signal].model_copy() if signal in TEMPLATES else None
+
+    when = WHEN.search("\n".join(t for s, t in turns if s != "A"))
+    by = f" by {'tomorrow' if when.group(1).lower() == 'kal' else when.group(1)}" if when else ""
+    if OVERDUE.search("\n".join(t for _, t in turns)):
+        return CallInsight(
+            customer_intent=f"Pay the overdue amount{by}",
+            sentiment="Neutral",
+            action_required=True,
+            summary=(
+                f"Overdue payment call. The customer promised to pay{by}; "
+                "the promise to pay needs follow-up."
+            ),
+        )
+    return CallInsight(
+        customer_intent=f"Pay the upcoming due on time{by}",
+        sentiment="Positive",
+        action_required=False,
+        summary=f"Payment reminder call. The customer confirmed they will pay on time{by}.",
+    )
+
+
+def classify(transcript: str) -> Classification:
+    """
+    Score `transcript` against every signal. Calls over
+    PRECLASSIFIER_MAX_TOKENS get confidence 0: scripted calls are short,
+    and a long one likely has more going on than a keyword can see.
+    """
+    turns = _speaker_turns(transcript)
+    evidence = _evidence(turns)
+
+    # Refusal has no template of its own: it only contradicts a promise to
+    # pay, and goes along with a dispute or hardship
+    top = max((s for s in evidence if s != "refusal"), key=evidence.get)
+    if evidence[top] == 0:
+        signal = "refusal" if evidence["refusal"] else None
+        return Classification(signal, 0.0, evidence, None)
+
+    rivals = [v for s, v in evidence.items() if s != top and (s != "refusal" or top == "ptp")]
+    confidence = _strength(evidence[top]) * (1 - _strength(max(rivals)))
+    if PRECLASSIFIER_MAX_TOKENS > 0 and estimate_tokens(transcript) > PRECLASSIFIER_MAX_TOKENS:
+        confidence = 0.0
+    return Classification(top, round(confidence, 4), evidence, _template(top, turns))
+
+
+def preclassify(
+    transcript: str, min_confidence: float = PRECLASSIFIER_MIN_CONFIDENCE
+) -> Optional[CallInsight]:
+    """
+    Fast-path insight for `transcript`, or None when the LLM should
+    answer instead.
+    """
+    result = classify(transcript)
+    hit = result.insight is not None and result.confidence >= min_confidence
+    PRECLASSIFIER_CALLS.inc(
+        outcome="hit" if hit else "llm", signal=result.signal or "none"
+    )
+    return result.insight if hit else None
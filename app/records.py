@@ -0,0 +1,310 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from .config import CALLS_PAGE_SIZE, CALLS_MAX_PAGE_SIZE, SEARCH_FUZZY_THRESHOLD
+from .db import db, TABLE_COLUMNS
+
+
+# Columns the read API can return, per table; "transcript" is joined in
+# from the transcripts table only when asked for
+RECORD_FIELDS = {
+    table: ("id", *columns, "created_at")
+    for table, columns in TABLE_COLUMNS.items()
+}
+
+DEFAULT_FIELDS = {
+    table: tuple(f for f in fields if f != "transcript")
+    for table, fields in RECORD_FIELDS.items()
+}
+
+
+def selected_fields(table: str, fields: Optional[Sequence[str]]) -> List[str]:
+    """
+    Validated projection for `table`; None means every column except the
+    transcript. The id is always returned, as it is the page cursor.
+    """
+    if not fields:
+        return list(DEFAULT_FIELDS[table])
+
+    unknown = sorted(set(fields) - set(RECORD_FIELDS[table]))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return ["id", *(f for f in RECORD_FIELDS[table] if f in fields and f != "id")]
+
+
+async def list_records(
+    table: str,
+    fields: Optional[Sequence[str]] = None,
+    cursor: Optional[int] = None,
+    limit: int = CALLS_PAGE_SIZE,
+    sentiment: Optional[str] = None,
+    action_required: Optional[bool] = None,
+    objective_met: Optional[bool] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    key_results: Optional[Sequence[str]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> dict:
+    """
+    One page of `table`, newest first, with keyset pagination: pass the
+    returned next_cursor back as `cursor` for the following page. Each
+    page is an index range scan below the cursor id, so deep pages cost
+    the same as the first one (unlike OFFSET).
+
+    created_after / created_before bound created_at as [after, before).
+    objective_met, the rating range and key_results apply to
+    call_records_extended only; key_results matches calls that have every
+    listed key result (exact items, GIN-indexed).
+    """
+    columns = selected_fields(table, fields)
+    limit = max(1, min(limit, CALLS_MAX_PAGE_SIZE))
+
+    filters = {
+        "r.id < {}": cursor,
+        "r.sentiment = {}": sentiment,
+        "r.action_required = {}": action_required,
+        "r.created_at >= {}": created_after,
+        "r.created_at < {}": created_before,
+    }
+    if table == "call_records_extended":
+        filters.update(
+            {
+                "r.objective_met = {}": objective_met,
+                "r.agent_performance_rating >= {}": min_rating,
+                "r.agent_performance_rating <= {}": max_rating,
+                "r.key_results_list @> {}::text[]": list(key_results) if key_results else None,
+            }
+        )
+
+    where: List[str] = []
+    params: list = []
+    for condition, value in filters.items():
+        if value is not None:
+            params.append(value)
+            where.append(condition.format(f"${len(params)}"))
+
+    select = [
+        "COALESCE(r.transcript, t.body) AS transcript" if c == "transcript" else f"r.{c}"
+        for c in columns
+    ]
+    join = "LEFT JOIN transcripts t ON t.id = r.transcript_id" if "transcript" in columns else ""
+    params.append(limit + 1)
+
+    async with db.acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT {", ".join(select)}
+            FROM {table} r {join}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY r.id DESC
+            LIMIT ${len(params)};
+            """,
+            *params,
+        )
+
+    items = [
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        }
+        for row in rows[:limit]
+    ]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if len(rows) > limit else None,
+    }
+
+
+async def read_rollups(
+    table: str,
+    granularity: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+) -> dict:
+    """
+    Dashboard aggregates per hour or day bucket in [since, until), plus
+    totals over the window, read from insight_rollups and the deltas not
+    merged into it yet: the cost depends on the number of buckets, not on
+    how many calls are stored. Rates and the average rating are derived
+    from the summed counts.
+    """
+    async with db.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT bucket, sum(calls)::bigint AS calls, sum(negative)::bigint AS negative,
+                   sum(neutral)::bigint AS neutral, sum(positive)::bigint AS positive,
+                   sum(action_required)::bigint AS action_required,
+                   sum(objective_met)::bigint AS objective_met,
+                   sum(rating_sum)::bigint AS rating_sum
+            FROM (
+                SELECT * FROM insight_rollups
+                UNION ALL
+                SELECT * FROM insight_rollup_deltas
+            ) r
+            WHERE source = $1 AND granularity = $2
+              AND bucket >= date_trunc($2, $3::timestamptz, 'UTC')
+              AND ($4::timestamptz IS NULL OR bucket < $4)
+            GROUP BY bucket
+            ORDER BY bucket;
+            """,
+            table,
+            granularity,
+            since,
+            until,
+        )
+
+    buckets = [_rollup_stats(row, bucket=row["bucket"].isoformat()) for row in rows]
+
+    totals = {
+        key: sum(row[key] for row in rows) if rows and rows[0][key] is not None else None
+        for key in (
+            "calls",
+            "negative",
+            "neutral",
+            "positive",
+            "action_required",
+            "objective_met",
+            "rating_sum",
+        )
+    }
+    return {
+        "source": table,
+        "granularity": granularity,
+        "buckets": buckets,
+        "totals": _rollup_stats(totals),
+    }
+
+
+def _rollup_stats(counts, **extra) -> dict:
+    calls = counts["calls"] or 0
+
+    def per_call(key: str) -> Optional[float]:
+        if counts[key] is None or not calls:
+            return None
+        return round(counts[key] / calls, 4)
+
+    return {
+        **extra,
+        "calls": calls,
+        "sentiment": {
+            "Negative": counts["negative"] or 0,
+            "Neutral": counts["neutral"] or 0,
+            "Positive": counts["positive"] or 0,
+        },
+        "action_required_rate": per_call("action_required"),
+        "objective_met_rate": per_call("objective_met"),
+        "avg_agent_rating": per_call("rating_sum"),
+    }
+
+
+def _parse_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, record_id = cursor.split(":")
+        return float(rank), int(record_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+async def search_records(
+    table: str,
+    query: str,
+    fuzzy: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = CALLS_PAGE_SIZE,
+) -> dict:
+    """
+    Calls in `table` whose transcript or summary match `query`, best first.
+
+    Matching uses the tsvector columns (websearch syntax: quoted phrases,
+    OR, -word) and, with `fuzzy` and pg_trgm installed, trigram word
+    similarity so spelling variants match too. Rank weights summary hits
+    twice as high as transcript hits. Pages are keyed on (rank, id): pass
+    next_cursor back as `cursor`. Only the returned page gets snippets.
+    """
+    limit = max(1, min(limit, CALLS_MAX_PAGE_SIZE))
+    after_rank, after_id = _parse_search_cursor(cursor) if cursor else (None, None)
+
+    async with db.acquire() as conn:
+        # Read once the connection is held: the first acquire() runs
+        # init_db, which checks for pg_trgm
+        fuzzy = fuzzy and db.trigram
+
+        hits = [
+            f"""
+            SELECT r.id FROM {table} r JOIN transcripts t ON t.id = r.transcript_id
+            WHERE t.body_tsv @@ websearch_to_tsquery('simple', $1)
+            """,
+            f"SELECT id FROM {table} WHERE summary_tsv @@ websearch_to_tsquery('english', $1)",
+        ]
+        rank = [
+            "COALESCE(ts_rank_cd(t.body_tsv, websearch_to_tsquery('simple', $1), 32), 0)",
+            "2 * ts_rank_cd(r.summary_tsv, websearch_to_tsquery('english', $1), 32)",
+        ]
+        if fuzzy:
+            hits += [
+                f"""
+                SELECT r.id FROM {table} r JOIN transcripts t ON t.id = r.transcript_id
+                WHERE $1 <% t.body
+                """,
+                f"SELECT id FROM {table} WHERE $1 <% summary",
+            ]
+            rank += [
+                "COALESCE(word_similarity($1, t.body), 0) / 2",
+                "word_similarity($1, r.summary)",
+            ]
+
+        async with conn.transaction():
+            if fuzzy:
+                await conn.execute(
+                    "SELECT set_config('pg_trgm.word_similarity_threshold', $1, true);",
+                    str(SEARCH_FUZZY_THRESHOLD),
+                )
+            rows = await conn.fetch(
+                f"""
+                WITH hits AS ({" UNION ".join(hits)}),
+                ranked AS (
+                    SELECT r.id, r.created_at, r.summary, r.transcript_id,
+                           ({" + ".join(rank)})::real AS rank
+                    FROM hits
+                    JOIN {table} r USING (id)
+                    LEFT JOIN transcripts t ON t.id = r.transcript_id
+                ),
+                page AS (
+                    SELECT * FROM ranked
+                    WHERE $2::real IS NULL OR (rank, id) < ($2::real, $3::int)
+                    ORDER BY rank DESC, id DESC
+                    LIMIT $4
+                )
+                SELECT p.id, p.created_at, p.summary, p.rank,
+                       ts_headline(
+                           'simple', t.body, websearch_to_tsquery('simple', $1),
+                           'MaxFragments=2, MinWords=5, MaxWords=20'
+                       ) AS snippet
+                FROM page p
+                LEFT JOIN transcripts t ON t.id = p.transcript_id
+                ORDER BY p.rank DESC, p.id DESC;
+                """,
+                query,
+                after_rank,
+                after_id,
+                limit + 1,
+            )
+
+    items = [
+        {
+            "id": row["id"],
+            "created_at": row["created_at"].isoformat(),
+            "rank": row["rank"],
+            "summary": row["summary"],
+            "snippet": row["snippet"],
+        }
+        for row in rows[:limit]
+    ]
+    last = items[-1] if items else None
+    return {
+        "items": items,
+        "fuzzy": fuzzy,
+        "next_cursor": f"{last['rank']!r}:{last['id']}" if len(rows) > limit else None,
+    }
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .config import ROLLUP_MERGE_INTERVAL_SECONDS
+from .db import db, merge_rollup_deltas
+
+
+logger = logging.getLogger(__name__)
+
+
+class RollupMerger:
+    """
+    Background task folding insight_rollup_deltas into insight_rollups
+    every `interval` seconds. Any number of processes can run one: each
+    merge moves the deltas it deletes, and no delta is seen by two.
+    """
+
+    def __init__(self, interval: float = ROLLUP_MERGE_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.merges = 0
+        self.deltas_merged = 0
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def merge(self) -> int:
+        async with db.acquire() as conn:
+            merged = await merge_rollup_deltas(conn)
+        self.merges += 1
+        self.deltas_merged += merged
+        return merged
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Nothing to do before this process has used the database: the
+            # pool is opened lazily, and deltas from other processes are
+            # merged by theirs
+            if not db.schema_ready:
+                continue
+            try:
+                await self.merge()
+            except Exception:
+                logger.exception("failed to merge rollup deltas")
+
+
+rollup_merger = RollupMerger()
@@ -0,0 +1,83 @@
+import math
+import re
+from typing import List
+
+
+# "Agent:", "Customer:", "Mr. Sharma:" ... at the start of a line opens a turn
+TURN_START = re.compile(r"^\s*[A-Za-z][\w .'-]{0,40}:\s")
+
+SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough Gemini token count (~4 characters per token), good enough for
+    budgeting without a tokenizer round-trip.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def split_turns(transcript: str) -> List[str]:
+    """
+    Split a transcript into speaker turns; lines without a speaker label
+    belong to the turn before them.
+    """
+    turns: List[str] = []
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        if TURN_START.match(line) or not turns:
+            turns.append(line.strip())
+        else:
+            turns[-1] += "\n" + line.strip()
+    return turns
+
+
+def _split_long_turn(turn: str, max_tokens: int) -> List[str]:
+    """
+    Break a single turn that is over budget at sentence boundaries, and
+    at word boundaries when one sentence is over budget on its own.
+    """
+    pieces: List[str] = []
+    for sentence in SENTENCE_END.split(turn):
+        if estimate_tokens(sentence) <= max_tokens:
+            pieces.append(sentence)
+            continue
+        words, current = sentence.split(" "), ""
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if current and estimate_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                candidate = word
+            current = candidate
+        if current:
+            pieces.append(current)
+    return _pack(pieces, max_tokens, " ")
+
+
+def _pack(parts: List[str], max_tokens: int, separator: str) -> List[str]:
+    segments: List[str] = []
+    current = ""
+    for part in parts:
+        candidate = f"{current}{separator}{part}" if current else part
+        if current and estimate_tokens(candidate) > max_tokens:
+            segments.append(current)
+            candidate = part
+        current = candidate
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segment_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """
+    Consecutive segments of at most ~max_tokens each, cut between speaker
+    turns (a turn is only cut when it alone exceeds the budget).
+    """
+    turns: List[str] = []
+    for turn in split_turns(transcript):
+        if estimate_tokens(turn) > max_tokens:
+            turns.extend(_split_long_turn(turn, max_tokens))
+        else:
+            turns.append(turn)
+    return _pack(turns, max_tokens, "\n")
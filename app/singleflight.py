@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from .config import SINGLE_FLIGHT_ENABLED
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one in-flight task.
+
+    The first caller (leader) starts the work; callers arriving while it is
+    still running await the same task. The work runs as its own task, so a
+    leader that disconnects does not cancel it for the followers.
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED) -> None:
+        self.enabled = enabled
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.leaders = 0
+        self.followers = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Return (result, shared): shared is True when this caller piggybacked
+        on another caller's in-flight work.
+        """
+        if not self.enabled:
+            return await fn(), False
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.followers += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+
+        self.leaders += 1
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+
+single_flight = SingleFlight()
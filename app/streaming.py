@@ -0,0 +1,177 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple, TypeVar
+
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+_json_decoder = json.JSONDecoder()
+
+
+class PartialJSONObject:
+    """
+    Incremental reader of a JSON object arriving in chunks (a streamed
+    structured-output response): feed() returns the top-level fields whose
+    values have become complete, in document order, each exactly once.
+
+    A value counts as complete once the next non-blank character after it
+    has arrived, so a number or literal cut mid-chunk ("12" of "125") is
+    never reported early. Malformed input is not reported at all; the
+    caller validates the full text at the end.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        # Where the next key starts looking; None until "{" is seen
+        self._pos: Optional[int] = None
+
+    def _skip(self, pos: int, separators: str = "") -> int:
+        while pos < len(self.text) and (self.text[pos].isspace() or self.text[pos] in separators):
+            pos += 1
+        return pos
+
+    def _next_field(self) -> Optional[Tuple[str, Any]]:
+        if self._pos is None:
+            start = self.text.find("{")
+            if start < 0:
+                return None
+            self._pos = start + 1
+
+        pos = self._skip(self._pos, ",")
+        try:
+            key, pos = _json_decoder.raw_decode(self.text, pos)
+            pos = self._skip(pos)
+            if self.text[pos : pos + 1] != ":":
+                return None
+            value, end = _json_decoder.raw_decode(self.text, self._skip(pos + 1))
+        except (json.JSONDecodeError, IndexError):
+            return None
+
+        if not isinstance(key, str) or self._skip(end) >= len(self.text):
+            return None
+        self._pos = end
+        return key, value
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        fields = []
+        while (field := self._next_field()) is not None:
+            fields.append(field)
+        return fields
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    One server-sent event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is
+    still being read.
+
+    Below ASGI spec 2.4 Starlette runs a disconnect listener next to the
+    body iterator, and that listener calls receive() too, swallowing the
+    request-body messages meant for request.stream(). Here disconnects are
+    noticed by request.stream() (ClientDisconnect) and by send() instead.
+    """
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        # Never returns on its own; cancelled once the body is fully sent
+        await asyncio.Event().wait()
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into non-empty lines without buffering more than
+    one (partial) line at a time.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise LineTooLong(f"NDJSON line exceeds {max_line_bytes} bytes")
+            if line.strip():
+                yield line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLong(f"NDJSON line exceeds {max_line_bytes} bytes")
+
+    if buffer.strip():
+        yield buffer
+
+
+async def bounded_unordered(
+    items: AsyncIterator[T],
+    handle: Callable[[T], Awaitable[R]],
+    concurrency: int,
+) -> AsyncIterator[R]:
+    """
+    Map `handle` over `items` with at most `concurrency` items in flight,
+    yielding results in completion order.
+
+    The input is only read when a slot frees up, and a slot only frees up
+    once its result has been consumed, so memory stays bounded by
+    `concurrency` regardless of input size or a slow consumer.
+
+    If reading `items` fails, no further input is read, but the items
+    already in flight are finished and their results yielded before the
+    error is re-raised. `handle` should report per-item failures in its
+    result rather than raise.
+    """
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    results: asyncio.Queue = asyncio.Queue()
+    done = object()
+    tasks: Set[asyncio.Task] = set()
+    input_error: List[BaseException] = []
+
+    async def run(item: T) -> None:
+        await results.put(await handle(item))
+
+    async def produce() -> None:
+        try:
+            async for item in items:
+                await slots.acquire()
+                task = asyncio.create_task(run(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            input_error.append(e)
+        finally:
+            # Drain what was already started, even when the input broke
+            if tasks:
+                await asyncio.gather(*list(tasks), return_exceptions=True)
+            await results.put(done)
+
+    producer: Optional[asyncio.Task] = asyncio.create_task(produce())
+    try:
+        while True:
+            result = await results.get()
+            if result is done:
+                break
+            yield result
+            slots.release()
+
+        await producer
+        producer = None
+        if input_error:
+            raise input_error[0]
+    finally:
+        if producer is not None:
+            producer.cancel()
+        for task in list(tasks):
+            task.cancel()
@@ -0,0 +1,225 @@
+"""
+Job workers for the async analysis mode.
+
+Run standalone (scale by starting more processes):
+
+    python -m app.worker --workers 4
+
+or inside the API process by setting JOB_WORKERS.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import List, Optional
+
+import asyncpg
+
+from .ai_client import (
+    generate_insights,
+    generate_insights_extended,
+    is_transient,
+    CircuitOpenError,
+)
+from .cache import insight_cache
+from .config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL, JOB_WORKERS
+from .db import db, init_db, insert_call_record, insert_call_record_extended
+from .jobs import claim_jobs, complete_job, extend_lease, fail_job, LostLeaseError
+from .packing import insight_packer
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """
+    Claims one job at a time from analysis_jobs, runs the LLM analysis and
+    writes the record + job result in a single transaction.
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        heartbeat_interval: float = JOB_LEASE_SECONDS / 3,
+    ) -> None:
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run_once(self) -> int:
+        """
+        Claim and process at most one job. Returns the number processed.
+        """
+        async with db.acquire() as conn:
+            jobs = await claim_jobs(conn, self.worker_id, limit=1)
+
+        for job in jobs:
+            heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+            try:
+                await self._process(job)
+            finally:
+                heartbeat.cancel()
+        return len(jobs)
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """
+        Keep extending the lease while the job runs: with LLM retries and
+        backoff, one job can take longer than JOB_LEASE_SECONDS, and a
+        lapsed lease would let another worker run it again.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                async with db.acquire() as conn:
+                    held = await extend_lease(conn, job_id, self.worker_id)
+            except Exception:
+                logger.exception(
+                    "worker %s failed to extend the lease on job %s", self.worker_id, job_id
+                )
+                continue
+            if not held:
+                logger.warning("worker %s lost the lease on job %s", self.worker_id, job_id)
+                return
+
+    async def _process(self, job: asyncpg.Record) -> None:
+        if job["attempts"] > JOB_MAX_ATTEMPTS:
+            # Reclaimed after repeated worker crashes: give up on it
+            async with db.acquire() as conn:
+                await fail_job(
+                    conn,
+                    job["id"],
+                    self.worker_id,
+                    job["attempts"],
+                    "Exceeded max attempts",
+                    retryable=False,
+                )
+            return
+
+        if job["mode"] == "extended":
+            generate, insert = generate_insights_extended, insert_call_record_extended
+        elif insight_packer.enabled:
+            # Short jobs claimed by this process's workers share LLM calls
+            generate, insert = insight_packer.generate, insert_call_record
+        else:
+            generate, insert = generate_insights, insert_call_record
+
+        try:
+            insight, _ = await insight_cache.get_or_generate(
+                job["mode"], job["transcript"], generate
+            )
+        except Exception as e:
+            retryable = is_transient(e) or isinstance(e, CircuitOpenError)
+            async with db.acquire() as conn:
+                await fail_job(
+                    conn,
+                    job["id"],
+                    self.worker_id,
+                    job["attempts"],
+                    f"LLM error: {e}",
+                    retryable=retryable,
+                )
+            return
+
+        try:
+            async with db.acquire() as conn:
+                async with conn.transaction():
+                    record_id = await insert(conn, job["transcript"], insight)
+                    await complete_job(
+                        conn, job["id"], self.worker_id, record_id, insight.model_dump()
+                    )
+        except LostLeaseError:
+            # Another worker owns the job now; the insert was rolled back
+            logger.warning("worker %s lost the lease on job %s", self.worker_id, job["id"])
+        except Exception as e:
+            # Requeue now rather than leaving the job until its lease expires
+            async with db.acquire() as conn:
+                await fail_job(
+                    conn,
+                    job["id"],
+                    self.worker_id,
+                    job["attempts"],
+                    f"Storage error: {e}",
+                    retryable=True,
+                )
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("worker %s failed to process a job", self.worker_id)
+                processed = 0
+
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+class WorkerPool:
+    """
+    N JobWorkers sharing this process's DB pool and LLM dispatcher.
+    """
+
+    def __init__(self, size: int) -> None:
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.workers = [JobWorker(f"{prefix}:{i}") for i in range(size)]
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(w.run()) for w in self.workers]
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.stop()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+worker_pool: Optional[WorkerPool] = None
+
+
+async def start_worker_pool(size: int = JOB_WORKERS) -> None:
+    global worker_pool
+    if size <= 0 or worker_pool is not None:
+        return
+    worker_pool = WorkerPool(size)
+    worker_pool.start()
+
+
+async def stop_worker_pool() -> None:
+    global worker_pool
+    if worker_pool is not None:
+        await worker_pool.stop()
+        worker_pool = None
+
+
+async def _main(size: int) -> None:
+    await init_db()
+    await start_worker_pool(size)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("started %d job workers", size)
+    await stop.wait()
+    await stop_worker_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run analysis job workers")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 4))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.workers))
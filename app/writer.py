@@ -0,0 +1,170 @@
+import asyncio
+import time
+from typing import Dict, List, Set, Tuple
+
+from .config import WRITER_FLUSH_INTERVAL_MS, WRITER_MAX_BATCH
+from .db import db, insert_insight_rows, TABLE_COLUMNS
+
+
+# Upper bounds for the batch-size histogram
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class BatchWriter:
+    """
+    Write-behind writer for insight rows.
+
+    Rows are buffered per table and flushed with one COPY when the buffer
+    reaches max_batch rows or flush_interval seconds after its first row,
+    whichever comes first. write() resolves with the row's id once its
+    batch is committed. If the batch fails, its rows are retried one by
+    one, so write() only raises for a row that fails on its own.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = WRITER_MAX_BATCH,
+        flush_interval: float = WRITER_FLUSH_INTERVAL_MS / 1000,
+    ) -> None:
+        self.max_batch = max(max_batch, 1)
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[str, List[Tuple[tuple, asyncio.Future]]] = {
+            table: [] for table in TABLE_COLUMNS
+        }
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flushes: Set[asyncio.Task] = set()
+
+        self.flush_count = 0
+        self.rows_written = 0
+        self.flush_errors = 0
+        self.row_errors = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    async def write(self, table: str, row: tuple) -> int:
+        """
+        Queue one row for `table` and wait for its generated id.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        buffer = self._pending[table]
+        buffer.append((row, future))
+
+        if len(buffer) >= self.max_batch:
+            self._start_flush(table)
+        elif len(buffer) == 1:
+            self._timers[table] = loop.call_later(
+                self.flush_interval, self._start_flush, table
+            )
+
+        return await future
+
+    def _start_flush(self, table: str) -> None:
+        timer = self._timers.pop(table, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending[table]
+        if not batch:
+            return
+        self._pending[table] = []
+
+        task = asyncio.ensure_future(self._flush(table, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _insert(self, table: str, rows: List[tuple]) -> List[int]:
+        async with db.acquire() as conn:
+            async with conn.transaction():
+                return await insert_insight_rows(conn, table, rows)
+
+    async def _flush(self, table: str, batch: List[Tuple[tuple, asyncio.Future]]) -> None:
+        started = time.perf_counter()
+        try:
+            try:
+                ids = await self._insert(table, [row for row, _ in batch])
+            except Exception as e:
+                self.flush_errors += 1
+                if len(batch) == 1:
+                    self.row_errors += 1
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                    return
+                # One bad row fails the whole COPY: retry the rows one by
+                # one so only the offending caller sees the error
+                await self._insert_one_by_one(table, batch)
+                return
+        finally:
+            elapsed = time.perf_counter() - started
+            self.flush_count += 1
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+            self._observe_batch_size(len(batch))
+
+        self.rows_written += len(ids)
+        for (_, future), record_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(record_id)
+
+    async def _insert_one_by_one(
+        self, table: str, batch: List[Tuple[tuple, asyncio.Future]]
+    ) -> None:
+        for row, future in batch:
+            try:
+                (record_id,) = await self._insert(table, [row])
+            except Exception as e:
+                self.row_errors += 1
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            self.rows_written += 1
+            if not future.done():
+                future.set_result(record_id)
+
+    def _observe_batch_size(self, size: int) -> None:
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self.batch_size_counts[i] += 1
+                return
+        self.batch_size_counts[-1] += 1
+
+    async def close(self) -> None:
+        """
+        Flush everything still buffered and wait for in-progress flushes.
+        """
+        for table in list(self._pending):
+            self._start_flush(table)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        buckets = {
+            f"le_{bound}": count
+            for bound, count in zip(BATCH_SIZE_BUCKETS, self.batch_size_counts)
+        }
+        buckets["le_inf"] = self.batch_size_counts[-1]
+
+        return {
+            "max_batch": self.max_batch,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "pending_rows": sum(len(b) for b in self._pending.values()),
+            "flushes": self.flush_count,
+            "rows_written": self.rows_written,
+            "flush_errors": self.flush_errors,
+            "row_errors": self.row_errors,
+            "avg_batch_size": self.rows_written / self.flush_count if self.flush_count else 0.0,
+            "avg_flush_ms": (
+                self.flush_seconds_total / self.flush_count * 1000
+                if self.flush_count
+                else 0.0
+            ),
+            "max_flush_ms": self.flush_seconds_max * 1000,
+            "batch_size_histogram": buckets,
+        }
+
+
+batch_writer = BatchWriter()
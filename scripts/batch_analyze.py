@@ -0,0 +1,219 @@
+# scripts/batch_analyze.py
+"""
+Offline batch analysis for large backfills, without going through HTTP.
+
+Reads transcripts from a CSV (needs a `transcript` column, `id` optional) or
+JSONL file ({"id": ..., "transcript": ...} per line), analyzes them with
+bounded parallelism and bulk-inserts the results:
+
+    python -m scripts.batch_analyze calls.jsonl --mode extended --concurrency 16
+
+Progress is checkpointed next to the input (<input>.checkpoint). A run
+that is killed can be restarted with the same command: finished items are
+skipped, and items that were analyzed but not yet written come back from
+the insight cache instead of calling Gemini again.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Optional, Set, Tuple
+
+from app.ai_client import generate_insights, generate_insights_extended
+from app.cache import insight_cache
+from app.config import BATCH_CONCURRENCY
+from app.db import (
+    db,
+    init_db,
+    insert_insight_rows,
+    call_record_row,
+    call_record_extended_row,
+)
+from app.streaming import bounded_unordered
+
+
+def read_items(path: Path, id_field: str, transcript_field: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (key, transcript) pairs. The key is the item's id, or its line
+    number when it has none, and is what the checkpoint records.
+    """
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows = enumerate(csv.DictReader(f), start=2)  # line 1 is the header
+        else:
+            rows = (
+                (line_no, json.loads(line))
+                for line_no, line in enumerate(f, start=1)
+                if line.strip()
+            )
+
+        for line_no, row in rows:
+            key = row.get(id_field)
+            yield (
+                str(key) if key not in (None, "") else f"line:{line_no}",
+                str(row.get(transcript_field) or "").strip(),
+            )
+
+
+def load_checkpoint(path: Path) -> Set[str]:
+    if not path.exists():
+        return set()
+    with path.open(encoding="utf-8") as f:
+        return {json.loads(line)["key"] for line in f if line.strip()}
+
+
+class Progress:
+    """
+    Periodic progress line: done / total, throughput, error rate and ETA.
+    """
+
+    def __init__(self, total: int, interval: float) -> None:
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self._last_print = 0.0
+
+    def update(self, ok: bool) -> None:
+        self.done += 1
+        if not ok:
+            self.errors += 1
+
+        now = time.monotonic()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            self.print()
+
+    def print(self, final: bool = False) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.done / elapsed
+        error_rate = self.errors / self.done if self.done else 0.0
+        remaining = self.total - self.done
+        eta = f"{remaining / rate:,.0f}s" if rate and not final else "-"
+
+        print(
+            f"{self.done}/{self.total} processed, {rate:.2f} items/s, "
+            f"{error_rate:.1%} errors, ETA {eta}",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+async def run(
+    input_path: Path,
+    mode: str = "basic",
+    concurrency: int = BATCH_CONCURRENCY,
+    flush_size: int = 100,
+    checkpoint_path: Optional[Path] = None,
+    id_field: str = "id",
+    transcript_field: str = "transcript",
+    progress_interval: float = 5.0,
+) -> Progress:
+    await init_db()
+
+    checkpoint_path = checkpoint_path or input_path.with_name(input_path.name + ".checkpoint")
+    finished = load_checkpoint(checkpoint_path)
+
+    if mode == "extended":
+        generate, table, to_row = (
+            generate_insights_extended,
+            "call_records_extended",
+            call_record_extended_row,
+        )
+    else:
+        generate, table, to_row = generate_insights, "call_records", call_record_row
+
+    pending = [
+        item
+        for item in read_items(input_path, id_field, transcript_field)
+        if item[0] not in finished
+    ]
+    print(
+        f"{len(finished)} items already done, {len(pending)} to process",
+        file=sys.stderr,
+    )
+    progress = Progress(len(pending), progress_interval)
+
+    async def items() -> AsyncIterator[Tuple[str, str]]:
+        for item in pending:
+            yield item
+
+    async def analyze(item: Tuple[str, str]) -> Tuple[str, str, object]:
+        key, transcript = item
+        if not transcript:
+            return key, transcript, "Transcript cannot be empty"
+        try:
+            # Results land in the insight cache as soon as they arrive, so
+            # a run killed before the next flush does not pay for them twice
+            insight, _ = await insight_cache.get_or_generate(mode, transcript, generate)
+        except Exception as e:
+            return key, transcript, f"LLM error: {e}"
+        return key, transcript, insight
+
+    batch: List[Tuple[str, tuple]] = []
+
+    with checkpoint_path.open("a", encoding="utf-8") as checkpoint:
+
+        async def flush() -> None:
+            if not batch:
+                return
+            async with db.acquire() as conn:
+                async with conn.transaction():
+                    ids = await insert_insight_rows(conn, table, [row for _, row in batch])
+
+            # Only checkpoint what is committed
+            for (key, _), record_id in zip(batch, ids):
+                checkpoint.write(json.dumps({"key": key, "id": record_id}) + "\n")
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+            batch.clear()
+
+        async for key, transcript, result in bounded_unordered(items(), analyze, concurrency):
+            if isinstance(result, str):
+                print(f"{key}: {result}", file=sys.stderr)
+                progress.update(ok=False)
+                continue
+
+            batch.append((key, to_row(transcript, result)))
+            progress.update(ok=True)
+            if len(batch) >= flush_size:
+                await flush()
+
+        await flush()
+
+    progress.print(final=True)
+    return progress
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input", type=Path, help="CSV or JSONL file of transcripts")
+    parser.add_argument("--mode", choices=("basic", "extended"), default="basic")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--flush-size", type=int, default=100, help="rows per bulk insert")
+    parser.add_argument("--checkpoint", type=Path, default=None)
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--transcript-field", default="transcript")
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        run(
+            args.input,
+            mode=args.mode,
+            concurrency=args.concurrency,
+            flush_size=args.flush_size,
+            checkpoint_path=args.checkpoint,
+            id_field=args.id_field,
+            transcript_field=args.transcript_field,
+            progress_interval=args.progress_interval,
+        )
+    )
+    sys.exit(1 if result.errors else 0)
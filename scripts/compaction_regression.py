@@ -0,0 +1,83 @@
+# scripts/compaction_regression.py
+"""
+Check that transcript compaction does not change the insights.
+
+Runs every sample transcript through the extended analysis twice, on the
+raw and on the compacted transcript, and reports token savings and how
+often the two analyses agree:
+
+    python -m scripts.compaction_regression --min-agreement 0.9
+
+Needs a real GEMINI_API_KEY (the fake backend answers from a hash of the
+prompt, so it cannot judge quality). Exits non-zero when field agreement
+drops below --min-agreement.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.ai_client import (
+    generate_structured,
+    _transcript_prompt,
+    SYSTEM_INSTRUCTIONS_EXTENDED,
+)
+from app.compaction import compact_transcript
+from app.models import CallInsightExtended
+from scripts.run_additional_transcripts import SAMPLE_TRANSCRIPTS as EXTENDED_SAMPLES
+from scripts.run_sample_transcripts import SAMPLE_TRANSCRIPTS as BASIC_SAMPLES
+
+
+# Fields with a discrete answer that compaction must not flip
+COMPARED_FIELDS = (
+    "sentiment",
+    "action_required",
+    "objective_met",
+    "start_sentiment",
+    "end_sentiment",
+)
+
+
+async def analyze(transcript: str) -> CallInsightExtended:
+    return await generate_structured(
+        _transcript_prompt(SYSTEM_INSTRUCTIONS_EXTENDED, transcript), CallInsightExtended
+    )
+
+
+async def run(min_agreement: float) -> bool:
+    samples = BASIC_SAMPLES + EXTENDED_SAMPLES
+    compactions = [compact_transcript(t) for t in samples]
+
+    raw = await asyncio.gather(*(analyze(t) for t in samples))
+    compacted = await asyncio.gather(*(analyze(c.text) for c in compactions))
+
+    matches = {field: 0 for field in COMPARED_FIELDS}
+    rating_close = 0
+    for i, (a, b) in enumerate(zip(raw, compacted), start=1):
+        differing = [f for f in COMPARED_FIELDS if getattr(a, f) != getattr(b, f)]
+        for field in COMPARED_FIELDS:
+            matches[field] += field not in differing
+        rating_close += abs(a.agent_performance_rating - b.agent_performance_rating) <= 1
+        if differing:
+            print(f"sample {i}: differs in {', '.join(differing)}")
+
+    n = len(samples)
+    before = sum(c.tokens_before for c in compactions)
+    after = sum(c.tokens_after for c in compactions)
+    agreement = sum(matches.values()) / (n * len(COMPARED_FIELDS))
+
+    print(f"tokens: {before} -> {after} ({1 - after / before:.1%} saved)")
+    for field, count in matches.items():
+        print(f"  {field:<16} {count}/{n}")
+    print(f"  rating within 1  {rating_close}/{n}")
+    print(f"overall agreement {agreement:.1%} (min {min_agreement:.0%})")
+    return agreement >= min_agreement
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    args = parser.parse_args()
+
+    sys.exit(0 if asyncio.run(run(args.min_agreement)) else 1)
@@ -0,0 +1,68 @@
+# scripts/export_insights.py
+"""
+Export stored insights to CSV or Parquet, streamed from Postgres with
+constant memory (COPY ... TO STDOUT for CSV; Parquet needs pyarrow):
+
+    python -m scripts.export_insights calls.csv
+    python -m scripts.export_insights calls.parquet --mode extended \\
+        --fields id,sentiment,summary --since 2025-01-01
+
+The format follows the output file extension unless --format is given.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from app.export import export_query, iter_export, require_pyarrow
+
+
+async def run(
+    output_path: str,
+    mode: str,
+    fmt: str,
+    fields,
+    since,
+    until,
+) -> int:
+    table = "call_records_extended" if mode == "extended" else "call_records"
+    query = export_query(table, fmt, fields=fields, created_after=since, created_before=until)
+    if fmt == "parquet":
+        require_pyarrow()
+
+    written = 0
+    with open(output_path, "wb") as out:
+        async for chunk in iter_export(query):
+            out.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    # Naive dates/times are taken as UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--mode", choices=("basic", "extended"), default="basic")
+    parser.add_argument("--format", choices=("csv", "parquet"), default=None)
+    parser.add_argument("--fields", default=None, help="Comma-separated columns")
+    parser.add_argument("--since", type=parse_time, default=None, help="created_at >= (ISO)")
+    parser.add_argument("--until", type=parse_time, default=None, help="created_at < (ISO)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    fields = [f.strip() for f in args.fields.split(",")] if args.fields else None
+
+    try:
+        written = asyncio.run(
+            run(args.output, args.mode, fmt, fields, args.since, args.until)
+        )
+    except (ValueError, RuntimeError) as e:
+        sys.exit(f"error: {e}")
+    print(f"wrote {written} bytes to {args.output}")
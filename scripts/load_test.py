@@ -0,0 +1,279 @@
+# scripts/load_test.py
+"""
+Fixed-rate load test against a running API.
+
+Start the server on the fake LLM backend so no Gemini quota is used:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY_MS=800 uvicorn app.main:app
+
+then drive one endpoint at a fixed request rate (open loop: requests are
+sent on schedule whether or not earlier ones have finished):
+
+    python -m scripts.load_test --endpoint basic --rate 50 --duration 30
+    python -m scripts.load_test --endpoint batch --batch-size 20 --rate 2
+
+It reports throughput, p50/p95/p99 latency, errors and DB pool / LLM
+dispatcher saturation (sampled from /db/stats and /llm/stats), and saves
+the run under loadtest_results/<git sha>/. Compare saved runs with:
+
+    python -m scripts.load_test --compare
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from scripts.run_sample_transcripts import SAMPLE_TRANSCRIPTS
+
+
+RESULTS_DIR = Path("loadtest_results")
+
+ENDPOINTS = {
+    "basic": "/analyze_call",
+    "extended": "/analyze_call_extended",
+    "combined": "/analyze_call_combined",
+    "batch": "/analyze_calls_batch",
+}
+
+
+def git_sha() -> str:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def transcript(n: int) -> str:
+    # Unique per request, so the insight cache does not hide the LLM cost
+    return f"{SAMPLE_TRANSCRIPTS[n % len(SAMPLE_TRANSCRIPTS)]}\n[load-test {uuid.uuid4()}]"
+
+
+def payload(endpoint: str, n: int, batch_size: int) -> dict:
+    if endpoint == "batch":
+        return {
+            "transcripts": [transcript(n * batch_size + i) for i in range(batch_size)],
+            "mode": "basic",
+        }
+    return {"transcript": transcript(n)}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def sample_stats(client: httpx.AsyncClient, samples: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            db_resp, llm_resp = await asyncio.gather(
+                client.get("/db/stats"), client.get("/llm/stats")
+            )
+            samples.append({"db": db_resp.json(), "llm": llm_resp.json()})
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+def saturation(samples: list) -> dict:
+    pools = [s["db"] for s in samples if s["db"].get("initialized")]
+    llm = [s["llm"] for s in samples]
+    return {
+        "samples": len(samples),
+        "db_pool_max_size": pools[-1]["max_size"] if pools else None,
+        "db_pool_max_in_use": max((p["in_use"] for p in pools), default=0),
+        # Share of samples with every connection checked out
+        "db_pool_saturated_ratio": (
+            sum(p["in_use"] >= p["max_size"] for p in pools) / len(pools) if pools else 0.0
+        ),
+        "llm_max_in_flight": max((s["in_flight"] for s in llm), default=0),
+        "llm_max_waiting": max((s["waiting"] for s in llm), default=0),
+        "llm_final_limit": llm[-1]["limit"] if llm else None,
+        "llm_rate_limited": llm[-1]["rate_limited"] if llm else 0,
+        "llm_retries": llm[-1]["retries"] if llm else 0,
+    }
+
+
+async def run(
+    url: str,
+    endpoint: str,
+    rate: float,
+    duration: float,
+    batch_size: int = 10,
+    timeout: float = 120.0,
+) -> dict:
+    total = int(rate * duration)
+    path = ENDPOINTS[endpoint]
+    latencies: List[float] = []
+    statuses: dict = {}
+    late_starts = 0
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        samples: list = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_stats(client, samples, stop))
+
+        async def send(n: int) -> None:
+            started = time.perf_counter()
+            try:
+                resp = await client.post(path, json=payload(endpoint, n, batch_size))
+                status = str(resp.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                latencies.append(time.perf_counter() - started)
+
+        began = time.perf_counter()
+        tasks = []
+        for n in range(total):
+            delay = began + n / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -0.01:
+                late_starts += 1
+            tasks.append(asyncio.create_task(send(n)))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - began
+        stop.set()
+        await sampler
+
+    ok = len(latencies)
+    items = ok * (batch_size if endpoint == "batch" else 1)
+    return {
+        "git_sha": git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "endpoint": endpoint,
+        "target_rps": rate,
+        "duration_s": duration,
+        "batch_size": batch_size if endpoint == "batch" else None,
+        "requests": total,
+        "ok": ok,
+        "statuses": statuses,
+        "error_rate": (total - ok) / total if total else 0.0,
+        "late_starts": late_starts,
+        "throughput_rps": ok / elapsed,
+        "throughput_items_per_s": items / elapsed,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": max(latencies, default=0.0) * 1000,
+        },
+        "saturation": saturation(samples),
+    }
+
+
+def save(result: dict) -> Path:
+    directory = RESULTS_DIR / result["git_sha"]
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = result["timestamp"].replace(":", "").split(".")[0]
+    path = directory / f"{result['endpoint']}-{result['target_rps']:g}rps-{stamp}.json"
+    path.write_text(json.dumps(result, indent=2))
+    return path
+
+
+def compare(endpoint: Optional[str]) -> None:
+    rows = []
+    for path in sorted(RESULTS_DIR.glob("*/*.json")):
+        result = json.loads(path.read_text())
+        if endpoint and result["endpoint"] != endpoint:
+            continue
+        rows.append(result)
+
+    rows.sort(key=lambda r: (r["endpoint"], r["target_rps"], r["timestamp"]))
+    print(
+        f"{'sha':<14} {'endpoint':<9} {'rps':>6} {'tput':>7} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8} {'err%':>6} {'pool':>6}"
+    )
+    for r in rows:
+        lat = r["latency_ms"]
+        sat = r["saturation"]
+        print(
+            f"{r['git_sha']:<14} {r['endpoint']:<9} {r['target_rps']:>6g} "
+            f"{r['throughput_rps']:>7.1f} {lat['p50']:>8.0f} {lat['p95']:>8.0f} "
+            f"{lat['p99']:>8.0f} {r['error_rate'] * 100:>6.1f} "
+            f"{sat['db_pool_saturated_ratio'] * 100:>5.0f}%"
+        )
+
+
+def report(result: dict) -> None:
+    lat = result["latency_ms"]
+    sat = result["saturation"]
+    print(
+        f"{result['endpoint']} @ {result['target_rps']:g} rps for {result['duration_s']:g}s "
+        f"({result['git_sha']})"
+    )
+    print(
+        f"  throughput {result['throughput_rps']:.1f} req/s "
+        f"({result['throughput_items_per_s']:.1f} transcripts/s), "
+        f"errors {result['error_rate']:.1%} {result['statuses']}"
+    )
+    print(
+        f"  latency ms p50 {lat['p50']:.0f}  p95 {lat['p95']:.0f}  "
+        f"p99 {lat['p99']:.0f}  max {lat['max']:.0f}"
+    )
+    print(
+        f"  db pool max in use {sat['db_pool_max_in_use']}/{sat['db_pool_max_size']}, "
+        f"saturated {sat['db_pool_saturated_ratio']:.0%} of samples; "
+        f"llm max in flight {sat['llm_max_in_flight']}, max waiting {sat['llm_max_waiting']}"
+    )
+    if result["late_starts"]:
+        print(
+            f"  warning: {result['late_starts']} requests started late; "
+            "the load generator could not keep up with the target rate",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="basic")
+    parser.add_argument("--rate", type=float, default=10.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="print saved results")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.endpoint if "--endpoint" in sys.argv else None)
+        sys.exit(0)
+
+    result = asyncio.run(
+        run(args.url, args.endpoint, args.rate, args.duration, args.batch_size)
+    )
+    report(result)
+    if not args.no_save:
+        print(f"saved {save(result)}")
@@ -0,0 +1,28 @@
+# scripts/migrate_key_results.py
+"""
+Backfill key_results_list for call_records_extended rows stored before key
+results were kept as an array, by splitting the "; "-joined key_results.
+
+Safe to re-run and to run while the API is serving traffic:
+
+    python -m scripts.migrate_key_results --batch-size 1000
+"""
+import argparse
+import asyncio
+
+from app.db import init_db, migrate_key_results
+
+
+async def run(batch_size: int):
+    await init_db()
+
+    migrated = await migrate_key_results(batch_size=batch_size)
+    print(f"call_records_extended: migrated {migrated} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.batch_size))
@@ -0,0 +1,34 @@
+# scripts/migrate_transcripts.py
+"""
+Move inline transcript text of existing call_records / call_records_extended
+rows into the shared, deduplicated transcripts table.
+
+Safe to re-run and to run while the API is serving traffic:
+
+    python -m scripts.migrate_transcripts --batch-size 1000
+"""
+import argparse
+import asyncio
+
+from app.db import db, init_db, migrate_transcripts
+
+
+async def run(batch_size: int):
+    await init_db()
+
+    for table in ("call_records", "call_records_extended"):
+        migrated = await migrate_transcripts(table, batch_size=batch_size)
+        print(f"{table}: migrated {migrated} rows")
+
+    async with db.acquire() as conn:
+        distinct = await conn.fetchval("SELECT count(*) FROM transcripts")
+    print(f"transcripts: {distinct} distinct bodies stored")
+    print("Run VACUUM on both tables to reclaim the space of the inline text.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.batch_size))
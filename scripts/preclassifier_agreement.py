@@ -0,0 +1,142 @@
+# scripts/preclassifier_agreement.py
+"""
+How often the rule-based fast path (app/preclassifier.py) agrees with the
+LLM, measured on stored basic insights:
+
+    python -m scripts.preclassifier_agreement --limit 5000
+    python -m scripts.preclassifier_agreement --thresholds 0.6,0.7,0.8,0.9 --min-agreement 0.95
+
+For each confidence threshold it reports coverage (share of calls the fast
+path would answer) and, on those calls, agreement with the stored
+sentiment and action_required, both separately and together. A per-signal
+breakdown follows for PRECLASSIFIER_MIN_CONFIDENCE.
+
+Rows that hold a fast-path answer (identical to the classifier's own
+template) are skipped, so only LLM results are compared. Exits non-zero
+when combined agreement at PRECLASSIFIER_MIN_CONFIDENCE is below
+--min-agreement.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.config import PRECLASSIFIER_MIN_CONFIDENCE
+from app.db import db, init_db
+from app.preclassifier import classify
+
+
+def agreement(rows: Iterable[dict], thresholds: Sequence[float]) -> Dict[float, dict]:
+    """
+    Coverage and agreement per threshold, plus counts per signal, for rows
+    with transcript, sentiment and action_required (as stored by the LLM).
+    """
+    classified = []
+    for row in rows:
+        result = classify(row["transcript"])
+        fast = result.insight
+        if fast is not None and (fast.customer_intent, fast.summary) == (
+            row.get("intent"),
+            row.get("summary"),
+        ):
+            continue  # stored by the fast path itself
+        classified.append((row, result))
+
+    report = {}
+    for threshold in thresholds:
+        answered = [
+            (row, r)
+            for row, r in classified
+            if r.insight is not None and r.confidence >= threshold
+        ]
+        signals: Dict[str, Dict[str, int]] = {}
+        sentiment = action = both = 0
+        for row, r in answered:
+            same_sentiment = r.insight.sentiment == row["sentiment"]
+            same_action = r.insight.action_required == row["action_required"]
+            sentiment += same_sentiment
+            action += same_action
+            both += same_sentiment and same_action
+
+            counts = signals.setdefault(r.signal, {"calls": 0, "agree": 0})
+            counts["calls"] += 1
+            counts["agree"] += same_sentiment and same_action
+
+        n = len(answered)
+        report[threshold] = {
+            "calls": len(classified),
+            "answered": n,
+            "coverage": n / len(classified) if classified else 0.0,
+            "sentiment": sentiment / n if n else None,
+            "action_required": action / n if n else None,
+            "agreement": both / n if n else None,
+            "signals": signals,
+        }
+    return report
+
+
+def _pct(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1%}"
+
+
+async def load_rows(limit: int, since: Optional[datetime]) -> List[dict]:
+    await init_db()
+    async with db.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT transcript, intent, sentiment, action_required, summary
+            FROM call_records_full
+            WHERE $2::timestamptz IS NULL OR created_at >= $2
+            ORDER BY id DESC
+            LIMIT $1;
+            """,
+            limit,
+            since,
+        )
+    return [dict(r) for r in rows]
+
+
+async def run(
+    limit: int,
+    since: Optional[datetime],
+    thresholds: List[float],
+    min_agreement: float,
+) -> bool:
+    rows = await load_rows(limit, since)
+    thresholds = sorted(set(thresholds) | {PRECLASSIFIER_MIN_CONFIDENCE})
+    report = agreement(rows, thresholds)
+
+    print(f"{len(rows)} stored calls, {report[thresholds[0]]['calls']} answered by the LLM")
+    print(f"{'threshold':>9} {'coverage':>9} {'sentiment':>10} {'action':>8} {'both':>7}")
+    for threshold in thresholds:
+        r = report[threshold]
+        print(
+            f"{threshold:>9.2f} {_pct(r['coverage']):>9} {_pct(r['sentiment']):>10} "
+            f"{_pct(r['action_required']):>8} {_pct(r['agreement']):>7}"
+        )
+
+    configured = report[PRECLASSIFIER_MIN_CONFIDENCE]
+    print(f"\nper signal at {PRECLASSIFIER_MIN_CONFIDENCE:.2f}:")
+    for signal, counts in sorted(configured["signals"].items()):
+        print(f"  {signal:<13} {counts['agree']}/{counts['calls']} agree")
+
+    return configured["agreement"] is None or configured["agreement"] >= min_agreement
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--limit", type=int, default=5000, help="most recent calls to compare")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument(
+        "--thresholds",
+        type=lambda s: [float(t) for t in s.split(",")],
+        default=[0.5, 0.6, 0.7, 0.8, 0.9],
+    )
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.limit, args.since, args.thresholds, args.min_agreement))
+    sys.exit(0 if ok else 1)
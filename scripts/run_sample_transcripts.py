@@ -1,5 +1,7 @@
 # scripts/run_sample_transcripts.py
 import asyncio
+import random
+
 import httpx
 
 API_URL = "http://127.0.0.1:8000/analyze_call"
@@ -95,10 +97,15 @@ async def call_one(client: httpx.AsyncClient, idx: int, transcript: str, max_ret
         # Print error body
         print("Error body:", resp.text)
 
-        # If it's the LLM 429 case, we can retry; otherwise just give up
-        if "RESOURCE_EXHAUSTED" not in resp.text:
+        # If it's the LLM 429 / breaker-open case, we can retry; otherwise just give up
+        if resp.status_code not in (429, 503) and "RESOURCE_EXHAUSTED" not in resp.text:
             break
 
+        # Back off before retrying (server hint first, else jittered exponential)
+        retry_after = resp.headers.get("Retry-After")
+        delay = float(retry_after) if retry_after else 2 ** attempt
+        await asyncio.sleep(random.uniform(delay / 2, delay))
+
     return False
 
 
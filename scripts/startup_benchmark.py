@@ -0,0 +1,115 @@
+# scripts/startup_benchmark.py
+"""
+Cold-start latency of the API: from a fresh interpreter to the first
+served request, the way an autoscaled worker starts.
+
+    python -m scripts.startup_benchmark --runs 10
+    python -m scripts.startup_benchmark --eager   # DB_INIT_ON_STARTUP=true
+
+Each run is a new process that imports app.main, runs the app's startup
+hooks and serves one GET /calls (which needs the pool and the schema)
+in-process. It reports per phase, in ms:
+
+- import: importing app.main
+- startup: the startup hooks (opening the pool too, with --eager)
+- first_request: the first /calls response (opening the pool and checking
+  schema_migrations, unless --eager did it already)
+- ready: import + startup + first_request
+- process: the whole child process, interpreter start and exit included
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+PHASES = ("import", "startup", "first_request", "ready", "process")
+
+
+def measure() -> dict:
+    """
+    Runs in the child process: time each phase of one cold start.
+    """
+    started = time.perf_counter()
+    from app.main import app
+
+    imported = time.perf_counter()
+
+    async def serve_first_request() -> dict:
+        from httpx import AsyncClient, ASGITransport
+
+        async with app.router.lifespan_context(app):
+            up = time.perf_counter()
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://bench") as client:
+                resp = await client.get("/calls", params={"limit": 1, "fields": "id"})
+            resp.raise_for_status()
+            done = time.perf_counter()
+        return {
+            "import": imported - started,
+            "startup": up - imported,
+            "first_request": done - up,
+            "ready": done - started,
+        }
+
+    return {phase: round(s * 1000, 1) for phase, s in asyncio.run(serve_first_request()).items()}
+
+
+def run_once(eager: bool) -> dict:
+    env = dict(os.environ, DB_INIT_ON_STARTUP="true" if eager else "false")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "scripts.startup_benchmark", "--child"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"startup failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = round(elapsed * 1000, 1)
+    return timings
+
+
+def report(runs: List[dict]) -> None:
+    print(f"{'phase':<15}{'median':>10}{'min':>10}{'max':>10}   (ms, {len(runs)} runs)")
+    for phase in PHASES:
+        values = [r[phase] for r in runs]
+        print(
+            f"{phase:<15}{statistics.median(values):>10.1f}"
+            f"{min(values):>10.1f}{max(values):>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="open the pool in the startup hooks (DB_INIT_ON_STARTUP=true)",
+    )
+    parser.add_argument("--json", action="store_true", help="print raw timings as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure()))
+        return
+
+    # The first run may apply pending migrations; later ones only check
+    runs: List[Dict[str, float]] = [run_once(args.eager) for _ in range(args.runs)]
+    if args.json:
+        print(json.dumps(runs, indent=2))
+    else:
+        report(runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import pytest_asyncio
+
+from app.cache import insight_cache
+from app.db import close_db
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_db_pool():
+    # Each test runs in its own event loop, so the asyncpg pool must not outlive it
+    insight_cache.clear()
+    yield
+    await close_db()
@@ -0,0 +1,59 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db
+from app.models import CallInsight
+import app.main as main
+
+
+@pytest.mark.asyncio
+async def test_analyze_calls_batch_reports_per_item(monkeypatch):
+    async def fake_generate_insights(transcript: str) -> CallInsight:
+        if "boom" in transcript:
+            raise RuntimeError("model refused")
+        return CallInsight(
+            customer_intent="Will pay",
+            sentiment="Positive",
+            action_required=False,
+            summary=f"Summary of: {transcript}",
+        )
+
+    monkeypatch.setattr(main, "generate_insights", fake_generate_insights)
+
+    await init_db()
+    assert db.pool is not None
+
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/analyze_calls_batch",
+            json={
+                "mode": "basic",
+                "transcripts": [
+                    "Customer: I will pay on the 5th.",
+                    "Customer: boom",
+                    "   ",
+                    "Customer: Paid already.",
+                ],
+            },
+        )
+
+    assert resp.status_code == 200
+    data = resp.json()
+
+    assert data["succeeded"] == 2
+    assert data["failed"] == 2
+
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["ok"] is True and isinstance(results[0]["id"], int)
+    assert results[1]["ok"] is False and "model refused" in results[1]["error"]
+    assert results[2]["ok"] is False
+    assert results[3]["ok"] is True and results[3]["id"] != results[0]["id"]
+
+    async with db.pool.acquire() as conn:
+        summary = await conn.fetchval(
+            "SELECT summary FROM call_records WHERE id = $1", results[3]["id"]
+        )
+    assert summary == "Summary of: Customer: Paid already."
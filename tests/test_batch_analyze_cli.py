@@ -0,0 +1,58 @@
+import json
+import uuid
+
+import pytest
+
+from app.db import db
+from app.models import CallInsight
+import scripts.batch_analyze as batch_analyze
+
+
+def fake_llm(calls: list, failing: set):
+    async def fake_generate_insights(transcript: str) -> CallInsight:
+        calls.append(transcript)
+        if transcript in failing:
+            raise RuntimeError("quota exhausted")
+        return CallInsight(
+            customer_intent="Pay later",
+            sentiment="Neutral",
+            action_required=True,
+            summary=transcript,
+        )
+
+    return fake_generate_insights
+
+
+@pytest.mark.asyncio
+async def test_resumed_run_only_processes_unfinished_items(monkeypatch, tmp_path):
+    run_id = uuid.uuid4()
+    transcripts = {key: f"Customer: backfill {key} {run_id}" for key in "abcd"}
+    source = tmp_path / "calls.jsonl"
+    source.write_text(
+        "".join(json.dumps({"id": k, "transcript": t}) + "\n" for k, t in transcripts.items())
+    )
+
+    calls = []
+    monkeypatch.setattr(
+        batch_analyze, "generate_insights", fake_llm(calls, {transcripts["c"]})
+    )
+    first = await batch_analyze.run(source, concurrency=2, flush_size=2)
+
+    assert (first.done, first.errors) == (4, 1)
+    checkpoint = tmp_path / "calls.jsonl.checkpoint"
+    entries = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert sorted(e["key"] for e in entries) == ["a", "b", "d"]
+
+    calls.clear()
+    monkeypatch.setattr(batch_analyze, "generate_insights", fake_llm(calls, set()))
+    second = await batch_analyze.run(source, concurrency=2, flush_size=2)
+
+    assert (second.done, second.errors) == (1, 0)
+    assert calls == [transcripts["c"]]
+
+    async with db.pool.acquire() as conn:
+        summaries = await conn.fetch(
+            "SELECT summary FROM call_records WHERE id = ANY($1::int[])",
+            [json.loads(line)["id"] for line in checkpoint.read_text().splitlines()],
+        )
+    assert sorted(r["summary"] for r in summaries) == sorted(transcripts.values())
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.db import init_db, db, call_record_row
+from app.models import CallInsight
+from app.writer import BatchWriter
+
+
+def row(n: int) -> tuple:
+    return call_record_row(
+        f"Customer: writer test {n}",
+        CallInsight(
+            customer_intent="Pay",
+            sentiment="Neutral",
+            action_required=False,
+            summary=f"row {n}",
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_flushed_together():
+    await init_db()
+    assert db.pool is not None
+
+    writer = BatchWriter(max_batch=50, flush_interval=0.05)
+    ids = await asyncio.gather(*(writer.write("call_records", row(n)) for n in range(10)))
+
+    assert len(set(ids)) == 10
+    stats = writer.stats()
+    assert stats["flushes"] == 1
+    assert stats["rows_written"] == 10
+
+    async with db.pool.acquire() as conn:
+        summaries = await conn.fetch(
+            "SELECT id, summary FROM call_records WHERE id = ANY($1::int[])", ids
+        )
+    assert {r["id"]: r["summary"] for r in summaries} == {
+        record_id: f"row {n}" for n, record_id in enumerate(ids)
+    }
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately_and_errors_reach_only_the_bad_row():
+    await init_db()
+    assert db.pool is not None
+
+    # Interval far beyond the test: only the size trigger can flush
+    writer = BatchWriter(max_batch=3, flush_interval=60)
+    ids = await asyncio.wait_for(
+        asyncio.gather(*(writer.write("call_records", row(n)) for n in range(3))),
+        timeout=5,
+    )
+    assert len(ids) == 3
+
+    bad_row = (None,) + row(99)[1:]  # transcript is NOT NULL
+    results = await asyncio.gather(
+        writer.write("call_records", row(100)),
+        writer.write("call_records", bad_row),
+        writer.write("call_records", row(101)),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[0], int) and isinstance(results[2], int)
+
+    stats = writer.stats()
+    assert stats["flush_errors"] == 1
+    assert stats["row_errors"] == 1
+    assert stats["rows_written"] == 5
+
+    async with db.pool.acquire() as conn:
+        summaries = await conn.fetch(
+            "SELECT summary FROM call_records WHERE id = ANY($1::int[]) ORDER BY id",
+            [results[0], results[2]],
+        )
+    assert [r["summary"] for r in summaries] == ["row 100", "row 101"]
@@ -0,0 +1,171 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import (
+    init_db,
+    db,
+    insert_call_record,
+    insert_call_record_extended,
+    migrate_key_results,
+)
+from app.models import CallInsight, CallInsightExtended
+import app.main as main
+
+
+def extended(sentiment: str, rating: int, key_results=("promise to pay",)) -> CallInsightExtended:
+    return CallInsightExtended(
+        customer_intent="Pay next week",
+        sentiment=sentiment,
+        action_required=rating < 3,
+        summary=f"Rated {rating}.",
+        primary_purpose="Payment reminder",
+        objective_met=rating >= 3,
+        key_results=list(key_results),
+        customer_intentions="Pay next week",
+        circumstances="Salary delayed",
+        start_sentiment="Neutral",
+        end_sentiment=sentiment,
+        agent_performance_rating=rating,
+        agent_performance_notes="Polite.",
+    )
+
+
+@pytest.mark.asyncio
+async def test_calls_are_paged_by_cursor_and_projected():
+    await init_db()
+    since = datetime.now(timezone.utc).isoformat()
+
+    transcripts = [f"Customer: call {i} {uuid.uuid4()}" for i in range(3)]
+    async with db.acquire() as conn:
+        ids = [
+            await insert_call_record(
+                conn,
+                t,
+                CallInsight(
+                    customer_intent="Pay",
+                    sentiment="Positive",
+                    action_required=False,
+                    summary=f"Call {i}",
+                ),
+            )
+            for i, t in enumerate(transcripts)
+        ]
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/calls", params={"created_after": since, "limit": 2})
+        second = await client.get(
+            "/calls",
+            params={
+                "created_after": since,
+                "limit": 2,
+                "cursor": first.json()["next_cursor"],
+                "fields": "summary,transcript",
+            },
+        )
+        unknown = await client.get("/calls", params={"fields": "summary,password"})
+
+    assert first.status_code == 200
+    page = first.json()
+    assert [r["id"] for r in page["items"]] == ids[:0:-1]
+    assert "transcript" not in page["items"][0]
+    assert page["items"][0]["summary"] == "Call 2"
+
+    assert second.json() == {
+        "items": [{"id": ids[0], "summary": "Call 0", "transcript": transcripts[0]}],
+        "next_cursor": None,
+    }
+    assert unknown.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_calls_extended_filters():
+    await init_db()
+    since = datetime.now(timezone.utc).isoformat()
+
+    async with db.acquire() as conn:
+        ids = {
+            rating: await insert_call_record_extended(
+                conn, f"Customer: rated {rating} {uuid.uuid4()}", extended(sentiment, rating)
+            )
+            for sentiment, rating in (("Negative", 1), ("Neutral", 3), ("Positive", 5))
+        }
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def matching(**params) -> list:
+            resp = await client.get(
+                "/calls_extended", params={"created_after": since, "fields": "id", **params}
+            )
+            assert resp.status_code == 200
+            return [r["id"] for r in resp.json()["items"]]
+
+        assert await matching(sentiment="Negative") == [ids[1]]
+        assert await matching(objective_met="true") == [ids[5], ids[3]]
+        assert await matching(action_required="true") == [ids[1]]
+        assert await matching(min_rating=2, max_rating=4) == [ids[3]]
+        assert await matching(created_before=since) == []
+
+
+@pytest.mark.asyncio
+async def test_calls_extended_filter_by_key_result():
+    await init_db()
+    promise = f"promise to pay {uuid.uuid4()}"
+
+    async with db.acquire() as conn:
+        both = await insert_call_record_extended(
+            conn,
+            f"Customer: both {uuid.uuid4()}",
+            extended("Neutral", 4, key_results=[promise, "dispute raised"]),
+        )
+        only_promise = await insert_call_record_extended(
+            conn, f"Customer: promise {uuid.uuid4()}", extended("Neutral", 4, key_results=[promise])
+        )
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        one = await client.get(
+            "/calls_extended", params={"key_result": promise, "fields": "key_results_list"}
+        )
+        all_of = await client.get(
+            "/calls_extended", params=[("key_result", promise), ("key_result", "dispute raised")]
+        )
+
+    assert one.json()["items"] == [
+        {"id": only_promise, "key_results_list": [promise]},
+        {"id": both, "key_results_list": [promise, "dispute raised"]},
+    ]
+    assert [r["id"] for r in all_of.json()["items"]] == [both]
+
+
+@pytest.mark.asyncio
+async def test_joined_key_results_are_backfilled():
+    await init_db()
+    marker = str(uuid.uuid4())
+
+    async with db.acquire() as conn:
+        record_id = await insert_call_record_extended(
+            conn, f"Customer: legacy {marker}", extended("Neutral", 3)
+        )
+        # As stored before key_results_list existed
+        await conn.execute(
+            """
+            UPDATE call_records_extended
+            SET key_results = $2, key_results_list = NULL
+            WHERE id = $1;
+            """,
+            record_id,
+            f"promise to pay; {marker};  ",
+        )
+
+    assert await migrate_key_results(batch_size=2) >= 1
+
+    async with db.acquire() as conn:
+        backfilled = await conn.fetchval(
+            "SELECT key_results_list FROM call_records_extended WHERE id = $1", record_id
+        )
+    assert backfilled == ["promise to pay", marker]
@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.ai_client import partial_extended_model, selected_extended_fields
+from app.db import init_db, db
+from app.models import CallInsightExtended
+import app.main as main
+
+
+EXTENDED = CallInsightExtended(
+    customer_intent="Half payment today",
+    sentiment="Neutral",
+    action_required=True,
+    summary="Disputed transaction; pays half today.",
+    primary_purpose="Pre-due reminder",
+    objective_met=True,
+    key_results=["partial payment", "dispute raised"],
+    customer_intentions="Pay the rest after the dispute",
+    circumstances="Undelivered online purchase",
+    start_sentiment="Negative",
+    end_sentiment="Neutral",
+    agent_performance_rating=4,
+    agent_performance_notes="Handled the dispute calmly.",
+)
+
+
+@pytest.mark.asyncio
+async def test_one_llm_call_populates_both_tables(monkeypatch):
+    calls = []
+
+    async def fake_generate_insights_extended(transcript: str) -> CallInsightExtended:
+        calls.append(transcript)
+        return EXTENDED
+
+    async def basic_must_not_run(transcript: str):
+        raise AssertionError("basic analysis should be derived, not generated")
+
+    monkeypatch.setattr(main, "generate_insights_extended", fake_generate_insights_extended)
+    monkeypatch.setattr(main, "generate_insights", basic_must_not_run)
+
+    await init_db()
+    assert db.pool is not None
+
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/analyze_call_combined",
+            json={"transcript": f"Customer: dispute hai {uuid.uuid4()}"},
+        )
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(calls) == 1
+    assert data["insights"] == EXTENDED.model_dump(
+        include={"customer_intent", "sentiment", "action_required", "summary"}
+    )
+    assert data["insights_extended"]["key_results"] == ["partial payment", "dispute raised"]
+
+    async with db.pool.acquire() as conn:
+        basic_tid = await conn.fetchval(
+            "SELECT transcript_id FROM call_records WHERE id = $1", data["id"]
+        )
+        extended_tid = await conn.fetchval(
+            "SELECT transcript_id FROM call_records_extended WHERE id = $1",
+            data["extended_id"],
+        )
+    assert basic_tid == extended_tid
+
+
+@pytest.mark.asyncio
+async def test_field_selection_requests_only_those_fields(monkeypatch):
+    requested = []
+
+    async def fake_fields(transcript: str, fields):
+        requested.append(list(fields))
+        schema = partial_extended_model(selected_extended_fields(fields))
+        return schema.model_validate(EXTENDED.model_dump(include=set(schema.model_fields)))
+
+    monkeypatch.setattr(main, "generate_insights_extended_fields", fake_fields)
+
+    await init_db()
+    assert db.pool is not None
+
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/analyze_call_combined",
+            json={"transcript": "Customer: theek hai", "fields": ["objective_met"]},
+        )
+        bad = await client.post(
+            "/analyze_call_combined",
+            json={"transcript": "Customer: theek hai", "fields": ["shoe_size"]},
+        )
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert requested == [["objective_met"]]
+    assert set(data["insights_extended"]) == {
+        "customer_intent",
+        "sentiment",
+        "action_required",
+        "summary",
+        "objective_met",
+    }
+    assert isinstance(data["id"], int)
+    assert data["extended_id"] is None
+    assert bad.status_code == 400
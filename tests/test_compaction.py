@@ -0,0 +1,71 @@
+import re
+
+import pytest
+
+from app.compaction import compact_transcript, COMPACTION_RATIO
+from app.metrics import endpoint
+from scripts.run_additional_transcripts import SAMPLE_TRANSCRIPTS as EXTENDED_SAMPLES
+from scripts.run_sample_transcripts import SAMPLE_TRANSCRIPTS as BASIC_SAMPLES
+
+
+# Regression set: the 20 assignment transcripts
+SAMPLES = BASIC_SAMPLES + EXTENDED_SAMPLES
+
+NOISY_ASR = """[00:00:01] Agent: Hello? Hello?
+[00:00:03] Agent: Hello?
+00:00:05 Customer: Haan haan haan, umm, bolo. [inaudible]
+Customer: uh theek hai, theek hai... you know, main 5th ko ₹5,000 de dunga.
+[00:00:19] Agent: Okay, I mean, aap 3:30 pm tak pay karo. (crosstalk)"""
+
+
+def speakers(text: str) -> list:
+    return re.findall(r"^(\w+):", text, re.MULTILINE)
+
+
+def test_noisy_asr_transcript_is_compacted():
+    result = compact_transcript(NOISY_ASR)
+
+    assert result.text == (
+        "(A = Agent, C = Customer)\n"
+        "A: Hello?\n"
+        "C: Haan, bolo. theek hai, main 5th ko ₹5,000 de dunga.\n"
+        "A: Okay, aap 3:30 pm tak pay karo."
+    )
+    assert result.tokens_after < result.tokens_before * 0.6
+
+
+@pytest.mark.parametrize("index", range(len(SAMPLES)))
+def test_samples_keep_facts_and_turn_order(index):
+    transcript = SAMPLES[index]
+    result = compact_transcript(transcript)
+
+    assert result.tokens_after <= result.tokens_before
+    # Amounts, dates, days overdue: every number survives
+    assert re.findall(r"\d[\d,.]*", result.text) == re.findall(r"\d[\d,.]*", transcript)
+    # Same conversation shape, with short labels
+    original = [{"Agent": "A", "Customer": "C"}[s] for s in speakers(transcript)]
+    collapsed = [s for i, s in enumerate(original) if i == 0 or s != original[i - 1]]
+    assert speakers(result.text) == collapsed
+
+
+def test_budget_keeps_opening_and_closing_turns():
+    long_call = "\n".join(f"Agent: Question {i}?\nCustomer: Answer {i}." for i in range(200))
+    result = compact_transcript(long_call, max_tokens=120)
+
+    lines = result.text.splitlines()
+    assert result.tokens_after <= 120
+    assert lines[1] == "A: Question 0?"
+    assert lines[-1] == "C: Answer 199."
+    assert any(re.fullmatch(r"\[\.\.\. \d+ turns omitted \.\.\.\]", line) for line in lines)
+
+
+def test_savings_are_recorded_per_call_and_endpoint():
+    token = endpoint.set("/analyze_call")
+    try:
+        before = COMPACTION_RATIO.count(endpoint="/analyze_call")
+        result = compact_transcript("Agent: umm hello [inaudible]\nCustomer: haan haan haan")
+    finally:
+        endpoint.reset(token)
+
+    assert result.tokens_after < result.tokens_before
+    assert COMPACTION_RATIO.count(endpoint="/analyze_call") == before + 1
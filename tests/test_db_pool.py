@@ -0,0 +1,89 @@
+import asyncio
+import contextlib
+import uuid
+
+import pytest
+
+from app.db import init_db, db, insert_call_record, pool_stats
+from app.models import CallInsight
+import app.db as db_module
+
+
+# Pattern passed as an argument, so this query does not match itself
+PREPARED_COUNT = "SELECT count(*) FROM pg_prepared_statements WHERE statement LIKE $1"
+
+
+def insight() -> CallInsight:
+    return CallInsight(
+        customer_intent="Pay",
+        sentiment="Neutral",
+        action_required=False,
+        summary="Pool test.",
+    )
+
+
+@pytest.mark.asyncio
+async def test_pool_is_sized_from_config_and_prewarmed(monkeypatch):
+    monkeypatch.setattr(db_module, "DB_POOL_MIN_SIZE", 3)
+    monkeypatch.setattr(db_module, "DB_POOL_MAX_SIZE", 4)
+
+    await init_db()
+    stats = pool_stats()
+    assert (stats["min_size"], stats["max_size"], stats["size"]) == (3, 4, 3)
+
+    # Every connection opened at startup already has the inserts prepared
+    async with contextlib.AsyncExitStack() as stack:
+        conns = [await stack.enter_async_context(db.acquire()) for _ in range(3)]
+        counts = [
+            await conn.fetchval(PREPARED_COUNT, "%INSERT INTO call_records_extended%")
+            for conn in conns
+        ]
+    assert counts == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_pgbouncer_mode_uses_no_named_statements(monkeypatch):
+    monkeypatch.setattr(db_module, "DB_PGBOUNCER", True)
+
+    await init_db()
+    async with db.acquire() as conn:
+        await insert_call_record(conn, f"Customer: pgbouncer {uuid.uuid4()}", insight())
+        prepared = await conn.fetchval("SELECT count(*) FROM pg_prepared_statements")
+
+    assert prepared == 0
+    assert pool_stats()["statement_cache_size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_waits_are_reported_and_bounded(monkeypatch):
+    monkeypatch.setattr(db_module, "DB_POOL_MIN_SIZE", 1)
+    monkeypatch.setattr(db_module, "DB_POOL_MAX_SIZE", 1)
+    monkeypatch.setattr(db_module, "DB_POOL_ACQUIRE_TIMEOUT_SECONDS", 0.05)
+
+    await init_db()
+    before = pool_stats()
+
+    async with db.acquire():
+        with pytest.raises(asyncio.TimeoutError):
+            async with db.acquire():
+                pass
+
+    stats = pool_stats()
+    assert stats["acquires"] == before["acquires"] + 1
+    assert stats["acquire_timeouts"] == before["acquire_timeouts"] + 1
+    assert set(stats["acquire_wait_ms"]) == {"avg", "max", "p50", "p95", "p99"}
+
+
+@pytest.mark.asyncio
+async def test_startup_survives_an_asyncpg_without_private_prepare(monkeypatch):
+    async def changed_prepare(self, query, *, name=None, timeout=None, record_class=None):
+        raise AssertionError("not reached: use_cache is rejected first")
+
+    # As if a later asyncpg dropped _prepare(use_cache=...)
+    monkeypatch.setattr(db_module.InsightsConnection, "_prepare", changed_prepare)
+
+    await init_db()
+    async with db.acquire() as conn:
+        await insert_call_record(conn, f"Customer: unwarmed {uuid.uuid4()}", insight())
+
+    assert db.schema_ready
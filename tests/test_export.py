@@ -0,0 +1,121 @@
+import csv
+import io
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db, insert_call_record, insert_call_record_extended
+from app.models import CallInsight, CallInsightExtended
+import app.export as export
+import app.main as main
+
+
+@pytest.mark.asyncio
+async def test_csv_export_streams_selected_rows_and_columns():
+    await init_db()
+    since = datetime.now(timezone.utc).isoformat()
+
+    transcripts = [f'Agent: Hello, "sir".\nCustomer: Pay {i} {uuid.uuid4()}' for i in range(3)]
+    async with db.acquire() as conn:
+        ids = [
+            await insert_call_record(
+                conn,
+                t,
+                CallInsight(
+                    customer_intent="Pay",
+                    sentiment="Neutral",
+                    action_required=i == 0,
+                    summary=f"Call {i}, with a comma",
+                ),
+            )
+            for i, t in enumerate(transcripts)
+        ]
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            "/export",
+            params={"created_after": since, "fields": "transcript,action_required,summary"},
+        )
+        unknown = await client.get("/export", params={"fields": "password"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert rows == [
+        {
+            "id": str(record_id),
+            "transcript": transcript,
+            "action_required": "true" if i == 0 else "false",
+            "summary": f"Call {i}, with a comma",
+        }
+        for i, (record_id, transcript) in enumerate(zip(ids, transcripts))
+    ]
+    assert unknown.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_keeps_column_types(monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    # Several row groups for three rows
+    monkeypatch.setattr("app.export.EXPORT_PARQUET_ROW_GROUP_ROWS", 2)
+
+    await init_db()
+    since = datetime.now(timezone.utc).isoformat()
+
+    async with db.acquire() as conn:
+        for rating in (2, 4, 5):
+            await insert_call_record_extended(
+                conn,
+                f"Customer: rated {rating} {uuid.uuid4()}",
+                CallInsightExtended(
+                    customer_intent="Pay next week",
+                    sentiment="Neutral",
+                    action_required=False,
+                    summary="Reminder.",
+                    primary_purpose="Payment reminder",
+                    objective_met=rating > 3,
+                    key_results=["promise to pay", f"rating {rating}"],
+                    customer_intentions="Pay next week",
+                    circumstances="Salary delayed",
+                    start_sentiment="Neutral",
+                    end_sentiment="Positive",
+                    agent_performance_rating=rating,
+                    agent_performance_notes="Polite.",
+                ),
+            )
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            "/export",
+            params={
+                "mode": "extended",
+                "format": "parquet",
+                "created_after": since,
+                "fields": "agent_performance_rating,objective_met,key_results_list,created_at",
+            },
+        )
+
+    assert resp.status_code == 200
+    parquet = pq.ParquetFile(io.BytesIO(resp.content))
+    assert parquet.metadata.num_row_groups == 2
+
+    table = parquet.read()
+    assert table.column("agent_performance_rating").to_pylist() == [2, 4, 5]
+    assert table.column("objective_met").to_pylist() == [False, True, True]
+    assert table.column("key_results_list").to_pylist()[0] == ["promise to pay", "rating 2"]
+    assert str(table.schema.field("created_at").type) == "timestamp[us, tz=UTC]"
+
+
+@pytest.mark.asyncio
+async def test_export_needs_database_url(monkeypatch):
+    monkeypatch.setattr(export, "DATABASE_URL", None)
+    query = export.export_query("call_records", "csv")
+
+    with pytest.raises(RuntimeError, match="DATABASE_URL"):
+        async for _ in export.iter_export(query):
+            pass
@@ -0,0 +1,53 @@
+import pytest
+
+from app.ai_client import is_rate_limited, is_transient, partial_extended_model
+from app.fake_llm import FakeLLM, fake_response
+from app.models import CallInsight, CallInsightExtended
+import app.ai_client as ai_client
+
+
+def test_fake_responses_are_schema_valid_and_deterministic():
+    basic = fake_response("prompt one", CallInsight)
+    extended = fake_response("prompt one", CallInsightExtended)
+    partial = fake_response("prompt one", partial_extended_model(("summary", "key_results")))
+
+    assert isinstance(basic, CallInsight)
+    assert 1 <= extended.agent_performance_rating <= 5
+    assert extended.key_results
+    assert set(partial.model_dump()) == {"summary", "key_results"}
+
+    assert fake_response("prompt one", CallInsight) == basic
+    assert fake_response("prompt two", CallInsight) != basic
+
+
+def test_fake_answers_one_item_per_packed_transcript():
+    prompt = "Analyze:\n\n### Transcript 1\nA: hi\n\n### Transcript 2\nC: bye"
+    packed = fake_response(prompt, ai_client.PackedCallInsights)
+
+    assert [item.index for item in packed.items] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_fake_injects_rate_limits_and_outages():
+    always_429 = FakeLLM(latency_ms=0, rate_limit_rate=1.0, error_rate=0.0, seed=1)
+    always_503 = FakeLLM(latency_ms=0, rate_limit_rate=0.0, error_rate=1.0, seed=1)
+
+    with pytest.raises(Exception) as quota:
+        await always_429.generate("p", CallInsight)
+    with pytest.raises(Exception) as outage:
+        await always_503.generate("p", CallInsight)
+
+    assert is_rate_limited(quota.value)
+    assert is_transient(outage.value) and not is_rate_limited(outage.value)
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_goes_through_the_dispatcher(monkeypatch):
+    monkeypatch.setattr(ai_client, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(ai_client, "fake_llm", FakeLLM(latency_ms=0, seed=1))
+    calls_before = ai_client.dispatcher.calls
+
+    insight = await ai_client.generate_insights("Customer: hi")
+
+    assert isinstance(insight, CallInsight)
+    assert ai_client.dispatcher.calls == calls_before + 1
@@ -0,0 +1,65 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import CallInsight
+import app.ai_client as ai_client
+
+
+INSIGHT = CallInsight(
+    customer_intent="Pay next week",
+    sentiment="Neutral",
+    action_required=True,
+    summary="Promise to pay.",
+)
+
+
+def fake_client(calls: list) -> SimpleNamespace:
+    """
+    Stand-in for genai.Client recording which surface was called, and on
+    which thread.
+    """
+
+    def sync_generate_content(**kwargs):
+        calls.append(("sync", threading.get_ident()))
+        return SimpleNamespace(parsed=INSIGHT)
+
+    async def async_generate_content(**kwargs):
+        calls.append(("aio", threading.get_ident()))
+        return SimpleNamespace(parsed=INSIGHT)
+
+    return SimpleNamespace(
+        models=SimpleNamespace(generate_content=sync_generate_content),
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=async_generate_content)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_client_calls_aio_on_the_event_loop(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ai_client, "client", fake_client(calls))
+    monkeypatch.setattr(ai_client, "GEMINI_ASYNC_CLIENT", True)
+
+    assert await ai_client.generate_insights("Customer: hi") == INSIGHT
+    assert calls == [("aio", threading.get_ident())]
+
+
+@pytest.mark.asyncio
+async def test_sync_client_is_offloaded_to_a_thread(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ai_client, "client", fake_client(calls))
+    monkeypatch.setattr(ai_client, "GEMINI_ASYNC_CLIENT", False)
+
+    assert await ai_client.generate_insights("Customer: hi") == INSIGHT
+    assert [surface for surface, _ in calls] == ["sync"]
+    assert calls[0][1] != threading.get_ident()
+
+
+def test_client_is_built_on_first_use(monkeypatch):
+    monkeypatch.setattr(ai_client, "client", None)
+    monkeypatch.setattr(ai_client, "GEMINI_API_KEY", None)
+
+    with pytest.raises(RuntimeError, match="GEMINI_API_KEY"):
+        ai_client.get_client()
+    assert ai_client.client is None
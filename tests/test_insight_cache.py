@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.cache import insight_cache
+from app.db import init_db, db
+from app.models import CallInsight
+import app.main as main
+
+
+@pytest.mark.asyncio
+async def test_repeated_transcript_is_served_from_cache(monkeypatch):
+    calls = []
+
+    async def fake_generate_insights(transcript: str) -> CallInsight:
+        calls.append(transcript)
+        return CallInsight(
+            customer_intent="Will pay on the 29th",
+            sentiment="Neutral",
+            action_required=False,
+            summary="Pre-due reminder, PTP on the 29th.",
+        )
+
+    monkeypatch.setattr(main, "generate_insights", fake_generate_insights)
+
+    await init_db()
+    assert db.pool is not None
+
+    # Unique per run so the Postgres tier starts cold
+    transcript = f"Agent: Reminder {uuid.uuid4()}. Customer: Haan, 29th tak kar dunga."
+
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/analyze_call", json={"transcript": transcript})
+        # Same content, different whitespace -> same cache entry
+        second = await client.post(
+            "/analyze_call", json={"transcript": transcript.replace(" ", "  ")}
+        )
+
+        # Drop tier one: the next hit must come from Postgres
+        insight_cache.clear()
+        third = await client.post("/analyze_call", json={"transcript": transcript})
+
+        stats = (await client.get("/cache/stats")).json()
+
+    assert [r.status_code for r in (first, second, third)] == [200, 200, 200]
+    assert first.json()["cached"] is False
+    assert second.json()["cached"] is True
+    assert third.json()["cached"] is True
+    assert third.json()["insights"] == first.json()["insights"]
+
+    assert len(calls) == 1
+    assert stats["misses"] >= 1
+    assert stats["memory_hits"] >= 1
+    assert stats["db_hits"] >= 1
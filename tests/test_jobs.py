@@ -0,0 +1,149 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db
+from app.jobs import claim_jobs, enqueue_job, get_job
+from app.models import CallInsight, CallInsightExtended
+from app.worker import JobWorker
+import app.jobs as jobs
+import app.main as main
+import app.worker as worker
+
+
+@pytest.mark.asyncio
+async def test_job_is_queued_processed_and_reported(monkeypatch):
+    async def fake_generate_insights_extended(transcript: str) -> CallInsightExtended:
+        return CallInsightExtended(
+            customer_intent="Settle at 50%",
+            sentiment="Neutral",
+            action_required=True,
+            summary="Settlement inquiry.",
+            primary_purpose="Recovery",
+            objective_met=False,
+            key_results=["settlement request"],
+            customer_intentions="Pay 50% in 15 days",
+            circumstances="None stated",
+            start_sentiment="Negative",
+            end_sentiment="Neutral",
+            agent_performance_rating=4,
+            agent_performance_notes="Clear.",
+        )
+
+    monkeypatch.setattr(worker, "generate_insights_extended", fake_generate_insights_extended)
+
+    await init_db()
+    assert db.pool is not None
+
+    # Clear out jobs left by other runs so the worker picks ours
+    async with db.pool.acquire() as conn:
+        await conn.execute("UPDATE analysis_jobs SET status = 'failed' WHERE status <> 'done'")
+
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/jobs",
+            json={"mode": "extended", "transcript": f"Customer: settle {uuid.uuid4()}"},
+        )
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+
+        assert (await client.get(f"/jobs/{job_id}")).json()["status"] == "queued"
+
+        assert await JobWorker("test-worker").run_once() == 1
+
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        missing = await client.get("/jobs/0")
+
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
+    assert isinstance(job["record_id"], int)
+    assert job["insights"]["key_results"] == ["settlement request"]
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed():
+    await init_db()
+    assert db.pool is not None
+
+    async with db.pool.acquire() as conn:
+        await conn.execute("UPDATE analysis_jobs SET status = 'failed' WHERE status <> 'done'")
+        # A job a crashed worker claimed and never finished
+        job_id = await conn.fetchval(
+            """
+            INSERT INTO analysis_jobs (mode, transcript, status, attempts, locked_by, locked_until)
+            VALUES ('basic', 'Customer: hello', 'running', 1, 'dead-worker', NOW() - interval '1 minute')
+            RETURNING id;
+            """
+        )
+
+        claimed = await claim_jobs(conn, "live-worker", limit=5)
+
+    assert [j["id"] for j in claimed] == [job_id]
+    assert claimed[0]["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_storage_failure_requeues_job(monkeypatch):
+    async def fake_generate_insights(transcript: str) -> CallInsight:
+        return CallInsight(
+            customer_intent="Check balance",
+            sentiment="Neutral",
+            action_required=False,
+            summary="Balance inquiry.",
+        )
+
+    async def broken_insert(conn, transcript, insight):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(worker, "generate_insights", fake_generate_insights)
+    monkeypatch.setattr(worker, "insert_call_record", broken_insert)
+
+    await init_db()
+    assert db.pool is not None
+
+    async with db.pool.acquire() as conn:
+        await conn.execute("UPDATE analysis_jobs SET status = 'failed' WHERE status <> 'done'")
+
+    job_id = await enqueue_job("basic", f"Customer: balance {uuid.uuid4()}")
+    assert await JobWorker("test-worker").run_once() == 1
+
+    job = await get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["error"] == "Storage error: disk full"
+
+
+@pytest.mark.asyncio
+async def test_lease_is_extended_while_the_job_runs(monkeypatch):
+    claimed_meanwhile = []
+
+    async def slow_generate_insights(transcript: str) -> CallInsight:
+        # Well past the original lease: another worker must not get the job
+        await asyncio.sleep(0.6)
+        async with db.acquire() as conn:
+            claimed_meanwhile.extend(await claim_jobs(conn, "other-worker", limit=5))
+        return CallInsight(
+            customer_intent="Pay later",
+            sentiment="Neutral",
+            action_required=True,
+            summary="Will pay later.",
+        )
+
+    monkeypatch.setattr(worker, "generate_insights", slow_generate_insights)
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", 0.3)
+
+    await init_db()
+    async with db.pool.acquire() as conn:
+        await conn.execute("UPDATE analysis_jobs SET status = 'failed' WHERE status <> 'done'")
+
+    job_id = await enqueue_job("basic", f"Customer: later {uuid.uuid4()}")
+    assert await JobWorker("test-worker", heartbeat_interval=0.1).run_once() == 1
+
+    job = await get_job(job_id)
+    assert claimed_meanwhile == []
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from google.genai import errors as genai_errors
+
+from app.ai_client import LLMDispatcher, CircuitOpenError
+
+
+def quota_error() -> genai_errors.ClientError:
+    return genai_errors.ClientError(
+        429,
+        {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota"}},
+    )
+
+
+def make_dispatcher(**overrides) -> LLMDispatcher:
+    options = dict(
+        initial_limit=8,
+        min_limit=1,
+        max_limit=16,
+        max_retries=3,
+        base_delay=0.001,
+        max_delay=0.01,
+        breaker_threshold=3,
+        breaker_cooldown=60,
+    )
+    options.update(overrides)
+    return LLMDispatcher(**options)
+
+
+@pytest.mark.asyncio
+async def test_retries_resource_exhausted_and_backs_off_limit():
+    dispatcher = make_dispatcher()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise quota_error()
+        return "ok"
+
+    assert await dispatcher.run(flaky) == "ok"
+    assert len(attempts) == 3
+    assert dispatcher.retries == 2
+    assert dispatcher.rate_limited == 2
+    # Multiplicatively decreased at least once, then additively increased
+    assert dispatcher.limit < 8
+    assert dispatcher.breaker_state == "closed"
+    assert dispatcher.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_non_transient_errors_are_not_retried():
+    dispatcher = make_dispatcher()
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("bad schema")
+
+    with pytest.raises(ValueError):
+        await dispatcher.run(broken)
+    assert len(attempts) == 1
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_repeated_failures():
+    dispatcher = make_dispatcher(max_retries=0)
+
+    async def always_exhausted():
+        raise quota_error()
+
+    for _ in range(3):
+        with pytest.raises(genai_errors.ClientError):
+            await dispatcher.run(always_exhausted)
+
+    assert dispatcher.breaker_state == "open"
+
+    async def never_called():
+        raise AssertionError("breaker should short-circuit")
+
+    with pytest.raises(CircuitOpenError):
+        await dispatcher.run(never_called)
+
+    # After the cooldown, a successful probe closes the breaker again
+    dispatcher.opened_until = 1.0
+
+    async def healthy():
+        return "ok"
+
+    assert dispatcher.breaker_state == "half_open"
+    assert await dispatcher.run(healthy) == "ok"
+    assert dispatcher.breaker_state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_does_not_wedge_the_breaker():
+    dispatcher = make_dispatcher(initial_limit=1, min_limit=1, max_limit=1, max_retries=0)
+    release_slot = asyncio.Event()
+
+    async def slot_holder():
+        await release_slot.wait()
+        raise quota_error()
+
+    # Occupy the only slot while the breaker is closed
+    holder = asyncio.create_task(dispatcher.run(slot_holder))
+    await asyncio.sleep(0)
+
+    # Breaker goes half-open; the probe queues behind the holder and is cancelled
+    dispatcher.opened_until = 1.0
+    assert dispatcher.breaker_state == "half_open"
+    probe = asyncio.create_task(dispatcher.run(slot_holder))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    release_slot.set()
+    with pytest.raises(genai_errors.ClientError):
+        await holder
+
+    # Breaker reopened by the failure; after the next cooldown a probe must
+    # still be admitted
+    dispatcher.opened_until = 1.0
+
+    async def healthy():
+        return "ok"
+
+    assert await dispatcher.run(healthy) == "ok"
+    assert dispatcher.breaker_state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_hung_call_times_out_and_is_retried():
+    dispatcher = make_dispatcher(call_timeout=0.01, max_retries=1)
+    attempts = []
+
+    async def hangs_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(10)
+        return "ok"
+
+    assert await dispatcher.run(hangs_once) == "ok"
+    assert len(attempts) == 2
+    assert dispatcher.in_flight == 0
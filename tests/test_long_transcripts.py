@@ -0,0 +1,98 @@
+import pytest
+
+from app.models import CallInsightExtended
+from app.segmentation import estimate_tokens, segment_transcript, split_turns
+import app.ai_client as ai_client
+
+
+def long_call(turns: int) -> str:
+    lines = []
+    for i in range(turns):
+        lines.append(f"Agent: Sir, turn {i}, aapka EMI overdue hai, kab tak payment hoga?")
+        lines.append(f"Customer: Turn {i}, salary late hai, next week pakka kar dunga.")
+    return "\n".join(lines)
+
+
+def test_segments_are_cut_between_turns_within_budget():
+    transcript = long_call(40)
+    segments = segment_transcript(transcript, max_tokens=100)
+
+    assert len(segments) > 1
+    assert all(estimate_tokens(s) <= 100 for s in segments)
+    # Nothing lost or reordered, and no turn cut in half
+    assert [t for s in segments for t in split_turns(s)] == split_turns(transcript)
+
+
+def test_turn_over_budget_is_split_at_sentences():
+    turn = "Customer: " + " ".join(f"Sentence number {i} is here." for i in range(50))
+    segments = segment_transcript(turn, max_tokens=40)
+
+    assert len(segments) > 1
+    assert all(estimate_tokens(s) <= 40 for s in segments)
+
+
+def extended(**overrides) -> CallInsightExtended:
+    fields = dict(
+        customer_intent="Pay next week",
+        sentiment="Neutral",
+        action_required=True,
+        summary="Segment.",
+        primary_purpose="Recovery",
+        objective_met=False,
+        key_results=["promise to pay"],
+        customer_intentions="Pay next week",
+        circumstances="Salary delay",
+        start_sentiment="Neutral",
+        end_sentiment="Neutral",
+        agent_performance_rating=3,
+        agent_performance_notes="Ok.",
+    )
+    fields.update(overrides)
+    return CallInsightExtended(**fields)
+
+
+@pytest.mark.asyncio
+async def test_long_transcript_is_map_reduced(monkeypatch):
+    prompts = []
+
+    async def fake_generate_structured(prompt: str, schema: type):
+        prompts.append(prompt)
+        if prompt.startswith(ai_client.REDUCE_INSTRUCTIONS_EXTENDED):
+            # The reducer's own sentiments must not win
+            return extended(
+                summary="Merged.", start_sentiment="Positive", end_sentiment="Positive"
+            )
+        if "segment 1 of" in prompt:
+            return extended(start_sentiment="Negative", end_sentiment="Neutral")
+        last = "turn 39" in prompt.lower()
+        return extended(end_sentiment="Positive" if last else "Neutral")
+
+    monkeypatch.setattr(ai_client, "generate_structured", fake_generate_structured)
+    monkeypatch.setattr(ai_client, "LONG_TRANSCRIPT_THRESHOLD_TOKENS", 200)
+    monkeypatch.setattr(ai_client, "LONG_TRANSCRIPT_SEGMENT_TOKENS", 150)
+
+    result = await ai_client.generate_insights_extended(long_call(40))
+
+    map_prompts = [p for p in prompts if "segment" in p and "of one long call" in p]
+    assert len(map_prompts) > 1
+    assert len(prompts) == len(map_prompts) + 1
+    assert result.summary == "Merged."
+    assert result.start_sentiment == "Negative"
+    assert result.end_sentiment == "Positive"
+
+
+@pytest.mark.asyncio
+async def test_short_transcript_uses_single_call(monkeypatch):
+    prompts = []
+
+    async def fake_generate_structured(prompt: str, schema: type):
+        prompts.append(prompt)
+        return extended()
+
+    monkeypatch.setattr(ai_client, "generate_structured", fake_generate_structured)
+    monkeypatch.setattr(ai_client, "LONG_TRANSCRIPT_THRESHOLD_TOKENS", 200)
+
+    await ai_client.generate_insights_extended(long_call(2))
+
+    assert len(prompts) == 1
+    assert prompts[0].startswith(ai_client.SYSTEM_INSTRUCTIONS_EXTENDED)
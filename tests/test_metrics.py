@@ -0,0 +1,82 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db
+from app.fake_llm import FakeLLM
+from app.metrics import (
+    endpoint,
+    record_llm_error,
+    record_usage,
+    Histogram,
+    LLM_ERRORS,
+    LLM_TOKENS,
+    STAGE_SECONDS,
+)
+from app.models import CallInsightExtended
+import app.ai_client as ai_client
+import app.main as main
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="x")
+
+    lines = list(histogram.collect())
+
+    assert 'demo_seconds_bucket{stage="x",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="x",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="x"} 4' in lines
+
+
+@pytest.mark.asyncio
+async def test_analyze_call_records_stage_timings(monkeypatch):
+    monkeypatch.setattr(ai_client, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(ai_client, "fake_llm", FakeLLM(latency_ms=0, seed=1))
+
+    await init_db()
+    assert db.pool is not None
+
+    before = {
+        stage: STAGE_SECONDS.count(endpoint="/analyze_call", stage=stage)
+        for stage in ("llm_slot_wait", "llm_call", "llm_total", "db_acquire", "db_insert")
+    }
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/analyze_call", json={"transcript": f"Customer: metrics {uuid.uuid4()}"}
+        )
+        scrape = await client.get("/metrics")
+
+    assert resp.status_code == 200
+    for stage, count in before.items():
+        assert STAGE_SECONDS.count(endpoint="/analyze_call", stage=stage) > count, stage
+
+    body = scrape.text
+    assert scrape.headers["content-type"].startswith("text/plain")
+    assert (
+        'insights_request_seconds_count{endpoint="/analyze_call",method="POST",status="200"}'
+        in body
+    )
+    assert 'insights_db_pool_connections{state="max_size"}' in body
+    assert 'insights_llm_dispatcher{state="limit"}' in body
+
+
+def test_llm_errors_and_tokens_are_labelled_by_endpoint():
+    usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+    token = endpoint.set("/analyze_call_extended")
+    try:
+        record_usage(CallInsightExtended, SimpleNamespace(usage_metadata=usage))
+        record_llm_error("RESOURCE_EXHAUSTED")
+    finally:
+        endpoint.reset(token)
+
+    labels = {"endpoint": "/analyze_call_extended", "schema": "CallInsightExtended"}
+    assert LLM_TOKENS.value(kind="prompt", **labels) >= 120
+    assert LLM_TOKENS.value(kind="response", **labels) >= 30
+    assert LLM_ERRORS.value(endpoint="/analyze_call_extended", type="RESOURCE_EXHAUSTED") >= 1
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import subprocess
+import sys
+import uuid
+
+import asyncpg
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import (
+    init_db,
+    db,
+    applied_migrations,
+    insert_call_record,
+    migrate,
+    MIGRATIONS,
+    _create_read_indexes,
+)
+from app.models import CallInsight
+import app.main as main
+
+
+# Far above any real migration, and removed again by each test
+TEST_VERSION = 1_000_000
+
+INSIGHT = CallInsight(
+    customer_intent="Pay later", sentiment="Neutral", action_required=True, summary="Later."
+)
+
+
+def test_import_needs_no_settings_or_gemini_sdk():
+    env = {k: v for k, v in os.environ.items() if k not in ("DATABASE_URL", "GEMINI_API_KEY")}
+    script = (
+        "import sys, app.main, app.ai_client as ai;"
+        "assert ai.client is None;"
+        "assert 'google.genai' not in sys.modules"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.asyncio
+async def test_pool_and_schema_are_set_up_on_first_use():
+    assert db.pool is None
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        # Concurrent first requests share one pool and one migration check
+        pages = await asyncio.gather(
+            *(client.get("/calls", params={"limit": 1}) for _ in range(5))
+        )
+
+    assert [p.status_code for p in pages] == [200] * 5
+    assert db.pool is not None and db.schema_ready
+
+    async with db.acquire() as conn:
+        assert set(MIGRATIONS) <= set(await applied_migrations(conn))
+
+
+@pytest.mark.asyncio
+async def test_new_migration_runs_once(monkeypatch):
+    await init_db()
+    calls = []
+
+    async def add_test_marker(conn) -> None:
+        await asyncio.sleep(0.05)  # let the other worker reach the lock
+        calls.append(await conn.fetchval("SELECT txid_current();"))
+
+    monkeypatch.setitem(MIGRATIONS, TEST_VERSION, add_test_marker)
+    async with db.acquire() as conn, db.acquire() as other:
+        try:
+            # Two workers starting at once: one applies it, the other skips it
+            results = await asyncio.gather(migrate(conn), migrate(other))
+            assert sorted(results) == [[], [TEST_VERSION]]
+            assert await migrate(conn) == []
+            name = await conn.fetchval(
+                "SELECT name FROM schema_migrations WHERE version = $1", TEST_VERSION
+            )
+            # Transaction-scoped: nothing is left held on the session
+            assert not await conn.fetchval(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory';"
+            )
+        finally:
+            await conn.execute("DELETE FROM schema_migrations WHERE version = $1", TEST_VERSION)
+
+    assert len(calls) == 1
+    assert name == "add_test_marker"
+
+
+@pytest.mark.asyncio
+async def test_failed_migration_is_not_recorded(monkeypatch):
+    await init_db()
+
+    async def broken(conn) -> None:
+        await conn.execute("CREATE TABLE migration_test_never_created (id INT);")
+        raise RuntimeError("boom")
+
+    async def fixed(conn) -> None:
+        pass
+
+    monkeypatch.setitem(MIGRATIONS, TEST_VERSION, broken)
+    async with db.acquire() as conn:
+        with pytest.raises(RuntimeError):
+            await migrate(conn)
+
+        assert TEST_VERSION not in await applied_migrations(conn)
+        assert await conn.fetchval("SELECT to_regclass('migration_test_never_created')") is None
+        assert not await conn.fetchval(
+            """
+            SELECT count(*) FROM pg_locks
+            WHERE locktype = 'advisory' AND pid = pg_backend_pid();
+            """
+        )
+
+        monkeypatch.setitem(MIGRATIONS, TEST_VERSION, fixed)
+        try:
+            assert await migrate(conn) == [TEST_VERSION]
+        finally:
+            await conn.execute("DELETE FROM schema_migrations WHERE version = $1", TEST_VERSION)
+
+
+@pytest.mark.asyncio
+async def test_interrupted_concurrent_index_build_is_redone():
+    await init_db()
+    name = "call_records_sentiment_idx"
+    async with db.acquire() as conn:
+        for _ in range(2):
+            await insert_call_record(conn, f"Customer: index {uuid.uuid4()}", INSIGHT)
+
+        # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind
+        await conn.execute(f"DROP INDEX {name};")
+        with pytest.raises(asyncpg.UniqueViolationError):
+            await conn.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON call_records (sentiment);"
+            )
+        valid = "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1);"
+        assert await conn.fetchval(valid, name) is False
+
+        await _create_read_indexes(conn)
+
+        assert await conn.fetchval(valid, name) is True
+        definition = await conn.fetchval("SELECT pg_get_indexdef($1::regclass);", name)
+        assert "(sentiment, id)" in definition
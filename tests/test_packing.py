@@ -0,0 +1,114 @@
+import asyncio
+import re
+
+import pytest
+
+from app.compaction import compact_transcript
+from app.models import CallInsight
+from app.packing import InsightPacker
+import app.ai_client as ai_client
+import app.packing as packing
+
+
+def insight(summary: str) -> CallInsight:
+    return CallInsight(
+        customer_intent="Pay on time",
+        sentiment="Neutral",
+        action_required=False,
+        summary=summary,
+    )
+
+
+def fake_packed_llm(calls: list, drop: int = 0):
+    async def fake_generate_structured(prompt: str, schema: type):
+        calls.append(prompt)
+        n = len(re.findall(r"^### Transcript \d+$", prompt, re.MULTILINE))
+        # Answer out of order, optionally skipping the last `drop` items
+        items = [
+            ai_client.PackedCallInsight(index=i, **insight(f"packed {i}").model_dump())
+            for i in range(n - drop, 0, -1)
+        ]
+        return ai_client.PackedCallInsights(items=items)
+
+    return fake_generate_structured
+
+
+@pytest.mark.asyncio
+async def test_short_transcripts_share_one_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ai_client, "generate_structured", fake_packed_llm(calls))
+
+    packer = InsightPacker(enabled=True, max_items=4, max_item_tokens=200, max_wait=60)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(packer.generate(f"Customer: reminder {i}") for i in range(4))),
+        timeout=5,
+    )
+
+    assert len(calls) == 1
+    assert [r.summary for r in results] == ["packed 1", "packed 2", "packed 3", "packed 4"]
+    assert packer.stats()["calls_saved"] == 3
+
+
+@pytest.mark.asyncio
+async def test_items_the_model_skipped_fall_back_to_single_calls(monkeypatch):
+    calls = []
+    singles = []
+
+    async def fake_generate_insights(transcript: str, prepared: bool = False) -> CallInsight:
+        singles.append(transcript)
+        return insight("single")
+
+    monkeypatch.setattr(ai_client, "generate_structured", fake_packed_llm(calls, drop=1))
+    monkeypatch.setattr(ai_client, "generate_insights_llm", fake_generate_insights)
+
+    packer = InsightPacker(enabled=True, max_items=3, max_item_tokens=200, max_wait=60)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(packer.generate(f"Customer: reminder {i}") for i in range(3))),
+        timeout=5,
+    )
+
+    assert [r.summary for r in results] == ["packed 1", "packed 2", "single"]
+    assert singles == ["Customer: reminder 2"]
+
+
+@pytest.mark.asyncio
+async def test_long_transcripts_are_not_packed(monkeypatch):
+    singles = []
+
+    async def fake_generate_insights(transcript: str, prepared: bool = False) -> CallInsight:
+        singles.append(transcript)
+        return insight("single")
+
+    monkeypatch.setattr(packing, "generate_insights_llm", fake_generate_insights)
+
+    packer = InsightPacker(enabled=True, max_items=10, max_item_tokens=5, max_wait=60)
+    result = await asyncio.wait_for(
+        packer.generate("Customer: this one is too long to pack"), timeout=5
+    )
+
+    assert result.summary == "single"
+    assert packer.stats()["packed_calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_each_transcript_is_compacted_once(monkeypatch):
+    calls = []
+    compacted = []
+
+    def counting_compact(transcript: str, max_tokens: int = 0):
+        compacted.append(transcript)
+        return compact_transcript(transcript, max_tokens)
+
+    monkeypatch.setattr(ai_client, "COMPACTION_ENABLED", True)
+    monkeypatch.setattr(ai_client, "compact_transcript", counting_compact)
+    monkeypatch.setattr(ai_client, "generate_structured", fake_packed_llm(calls, drop=1))
+
+    packer = InsightPacker(enabled=True, max_items=3, max_item_tokens=200, max_wait=60)
+    await asyncio.wait_for(
+        asyncio.gather(*(packer.generate(f"Agent: umm reminder {i}") for i in range(3))),
+        timeout=5,
+    )
+
+    # Including the item the model skipped, which is retried on its own
+    assert sorted(compacted) == [f"Agent: umm reminder {i}" for i in range(3)]
+    assert "umm reminder" not in calls[0]
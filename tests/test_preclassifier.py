@@ -0,0 +1,112 @@
+import pytest
+
+import app.ai_client as ai_client
+import app.preclassifier as preclassifier
+from app.models import CallInsight
+from app.preclassifier import classify, preclassify
+from scripts.preclassifier_agreement import agreement
+from scripts.run_sample_transcripts import SAMPLE_TRANSCRIPTS
+
+
+PRE_DUE = SAMPLE_TRANSCRIPTS[0]
+DISPUTE = SAMPLE_TRANSCRIPTS[8]
+SETTLEMENT_AND_LEGAL = SAMPLE_TRANSCRIPTS[6]
+
+
+def test_scripted_reminder_is_answered_without_llm():
+    insight = preclassify(PRE_DUE, min_confidence=0.8)
+
+    assert insight is not None
+    assert (insight.sentiment, insight.action_required) == ("Positive", False)
+
+
+def test_dispute_is_not_contradicted_by_the_refusal_to_pay():
+    result = classify(DISPUTE)
+
+    assert result.signal == "dispute"
+    assert result.evidence["refusal"] > 0
+    assert result.confidence >= 0.8
+    assert (result.insight.sentiment, result.insight.action_required) == ("Negative", True)
+
+
+def test_mixed_and_negated_calls_fall_through():
+    # Settlement talk plus a legal threat: no single dominant signal
+    assert preclassify(SETTLEMENT_AND_LEGAL, min_confidence=0.5) is None
+
+    broken_promise = "Agent: EMI 10 din se overdue hai.\nCustomer: Main payment nahi karunga."
+    result = classify(broken_promise)
+    assert result.signal == "refusal"
+    assert result.insight is None
+
+    conflicting = "Customer: I will pay, but I can't pay the full amount."
+    assert classify(conflicting).confidence < 0.5
+
+
+def test_overdue_promise_needs_follow_up():
+    result = classify(
+        "Agent: Aapka EMI 7 days se overdue hai.\n"
+        "Customer: Wednesday ko pakka kar dunga. Promise to pay le lo."
+    )
+
+    assert result.signal == "ptp"
+    assert result.insight.action_required is True
+    assert result.insight.customer_intent == "Pay the overdue amount by Wednesday"
+
+
+def test_long_calls_go_to_the_llm(monkeypatch):
+    monkeypatch.setattr(preclassifier, "PRECLASSIFIER_MAX_TOKENS", 10)
+
+    assert classify(PRE_DUE).confidence == 0.0
+
+
+@pytest.mark.asyncio
+async def test_generate_insights_skips_the_llm_when_confident(monkeypatch):
+    prompts = []
+
+    async def fake_generate_structured(prompt: str, schema: type) -> CallInsight:
+        prompts.append(prompt)
+        return CallInsight(
+            customer_intent="From LLM", sentiment="Neutral", action_required=True, summary="LLM"
+        )
+
+    monkeypatch.setattr(ai_client, "generate_structured", fake_generate_structured)
+    monkeypatch.setattr(ai_client, "PRECLASSIFIER_ENABLED", True)
+
+    fast = await ai_client.generate_insights(PRE_DUE)
+    unclear = await ai_client.generate_insights("Customer: Haan, bolo.")
+
+    assert fast.sentiment == "Positive"
+    assert unclear.summary == "LLM"
+    assert len(prompts) == 1
+
+
+def test_agreement_report():
+    rows = [
+        # The LLM agrees with the fast path
+        {"transcript": PRE_DUE, "sentiment": "Positive", "action_required": False},
+        # ... and disagrees
+        {"transcript": DISPUTE, "sentiment": "Neutral", "action_required": True},
+        # Not confident: counted for coverage only
+        {"transcript": SETTLEMENT_AND_LEGAL, "sentiment": "Negative", "action_required": True},
+        # Stored by the fast path itself: skipped
+        {
+            "transcript": PRE_DUE,
+            "intent": classify(PRE_DUE).insight.customer_intent,
+            "summary": classify(PRE_DUE).insight.summary,
+            "sentiment": "Positive",
+            "action_required": False,
+        },
+    ]
+
+    report = agreement(rows, [0.8, 0.99])
+
+    assert report[0.8]["calls"] == 3
+    assert report[0.8]["coverage"] == pytest.approx(2 / 3)
+    assert report[0.8]["action_required"] == 1.0
+    assert report[0.8]["agreement"] == 0.5
+    assert report[0.8]["signals"] == {
+        "ptp": {"calls": 1, "agree": 1},
+        "dispute": {"calls": 1, "agree": 0},
+    }
+    assert report[0.99]["answered"] == 0
+    assert report[0.99]["agreement"] is None
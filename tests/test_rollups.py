@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import (
+    init_db,
+    db,
+    insert_call_record_extended,
+    insert_insight_rows,
+    call_record_extended_row,
+)
+from app.models import CallInsightExtended
+from app.rollups import rollup_merger
+import app.main as main
+
+
+def extended(sentiment: str, rating: int, objective_met: bool) -> CallInsightExtended:
+    return CallInsightExtended(
+        customer_intent="Pay next week",
+        sentiment=sentiment,
+        action_required=not objective_met,
+        summary="Reminder call.",
+        primary_purpose="Payment reminder",
+        objective_met=objective_met,
+        key_results=["promise to pay"],
+        customer_intentions="Pay next week",
+        circumstances="Salary delayed",
+        start_sentiment="Neutral",
+        end_sentiment=sentiment,
+        agent_performance_rating=rating,
+        agent_performance_notes="Polite.",
+    )
+
+
+async def hourly_totals(client: AsyncClient) -> dict:
+    resp = await client.get("/stats", params={"mode": "extended", "granularity": "hour"})
+    assert resp.status_code == 200
+    return resp.json()["totals"]
+
+
+@pytest.mark.asyncio
+async def test_inserts_and_copy_batches_update_rollups():
+    await init_db()
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        before = await hourly_totals(client)
+
+        async with db.acquire() as conn:
+            await insert_call_record_extended(
+                conn, f"Customer: single {uuid.uuid4()}", extended("Negative", 2, False)
+            )
+            # COPY path used by the batch endpoint and the write-behind writer
+            await insert_insight_rows(
+                conn,
+                "call_records_extended",
+                [
+                    call_record_extended_row(
+                        f"Customer: batch {i} {uuid.uuid4()}", extended("Positive", 5, True)
+                    )
+                    for i in range(2)
+                ],
+            )
+
+        after = await hourly_totals(client)
+        daily = await client.get("/stats", params={"mode": "extended"})
+
+    assert after["calls"] == before["calls"] + 3
+    assert after["sentiment"]["Negative"] == before["sentiment"]["Negative"] + 1
+    assert after["sentiment"]["Positive"] == before["sentiment"]["Positive"] + 2
+    assert daily.json()["buckets"][-1]["calls"] >= 3
+
+    # Counted before any merge: /stats reads the pending deltas too
+    assert await rollup_merger.merge() > 0
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        assert await hourly_totals(client) == after
+
+    async with db.acquire() as conn:
+        assert await conn.fetchval("SELECT count(*) FROM insight_rollup_deltas;") == 0
+        # Rollups agree with a full scan of the table
+        scanned = await conn.fetchrow(
+            """
+            SELECT count(*) AS calls,
+                   count(*) FILTER (WHERE objective_met) AS objective_met,
+                   sum(agent_performance_rating) AS rating_sum
+            FROM call_records_extended;
+            """
+        )
+        rolled = await conn.fetchrow(
+            """
+            SELECT sum(calls) AS calls, sum(objective_met) AS objective_met,
+                   sum(rating_sum) AS rating_sum
+            FROM insight_rollups
+            WHERE source = 'call_records_extended' AND granularity = 'day';
+            """
+        )
+    assert dict(rolled) == dict(scanned)
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db, insert_call_record
+from app.models import CallInsight
+import app.main as main
+
+
+def insight(summary: str) -> CallInsight:
+    return CallInsight(
+        customer_intent="Avoid legal action",
+        sentiment="Negative",
+        action_required=True,
+        summary=summary,
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_pages_transcript_and_summary_matches():
+    await init_db()
+    # A made-up surname no other test row contains
+    surname = f"Kulkarni{uuid.uuid4().hex[:8]}"
+
+    async with db.acquire() as conn:
+        in_transcript = await insert_call_record(
+            conn,
+            f"Agent: Am I speaking with Mr. {surname}?\nCustomer: Haan, theek hai.",
+            insight("Customer agreed to pay."),
+        )
+        in_both = await insert_call_record(
+            conn,
+            f"Agent: Mr. {surname}, a legal notice was sent.\nCustomer: Main settle karunga.",
+            insight(f"{surname} received a legal notice and asked for settlement."),
+        )
+        await insert_call_record(
+            conn, f"Customer: unrelated {uuid.uuid4()}", insight("Nothing to see.")
+        )
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/search", params={"q": surname, "limit": 1})
+        second = await client.get(
+            "/search", params={"q": surname, "limit": 1, "cursor": first.json()["next_cursor"]}
+        )
+        phrase = await client.get("/search", params={"q": f'"legal notice" {surname}'})
+        bad_cursor = await client.get("/search", params={"q": surname, "cursor": "x"})
+
+    assert first.status_code == 200
+    top = first.json()["items"][0]
+    assert top["id"] == in_both
+    assert surname.lower() in top["snippet"].lower()
+
+    assert [r["id"] for r in second.json()["items"]] == [in_transcript]
+    assert second.json()["next_cursor"] is None
+
+    assert [r["id"] for r in phrase.json()["items"]] == [in_both]
+    assert bad_cursor.status_code == 400
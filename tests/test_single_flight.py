@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db
+from app.models import CallInsight
+import app.main as main
+
+
+async def post_concurrently(transcript: str, copies: int) -> list:
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(
+            *(
+                client.post("/analyze_call", json={"transcript": transcript})
+                for _ in range(copies)
+            )
+        )
+
+
+def slow_fake_llm(calls: list):
+    async def fake_generate_insights(transcript: str) -> CallInsight:
+        calls.append(transcript)
+        # Hold the call open so the other copies arrive while it is in flight
+        await asyncio.sleep(0.05)
+        return CallInsight(
+            customer_intent="Retrying after a timeout",
+            sentiment="Neutral",
+            action_required=True,
+            summary="Duplicate submission.",
+        )
+
+    return fake_generate_insights
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_llm_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "generate_insights", slow_fake_llm(calls))
+
+    await init_db()
+    assert db.pool is not None
+
+    responses = await post_concurrently(f"Customer: retry {uuid.uuid4()}", copies=4)
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert len(calls) == 1
+
+    bodies = [r.json() for r in responses]
+    assert sum(b["deduplicated"] for b in bodies) == 3
+    # per_request (default): every request still gets its own row
+    assert len({b["id"] for b in bodies}) == 4
+
+
+@pytest.mark.asyncio
+async def test_shared_rows_mode_returns_one_record(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "generate_insights", slow_fake_llm(calls))
+    monkeypatch.setattr(main, "SINGLE_FLIGHT_ROWS", "shared")
+
+    await init_db()
+    assert db.pool is not None
+
+    responses = await post_concurrently(f"Customer: replay {uuid.uuid4()}", copies=3)
+
+    assert [r.status_code for r in responses] == [200] * 3
+    assert len(calls) == 1
+    assert len({r.json()["id"] for r in responses}) == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_rows_mode_does_not_collide_with_batch_flight(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "generate_insights", slow_fake_llm(calls))
+    monkeypatch.setattr(main, "SINGLE_FLIGHT_ROWS", "shared")
+
+    await init_db()
+    assert db.pool is not None
+
+    transcript = f"Customer: mixed {uuid.uuid4()}"
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        single, batch = await asyncio.gather(
+            client.post("/analyze_call", json={"transcript": transcript}),
+            client.post("/analyze_calls_batch", json={"transcripts": [transcript]}),
+        )
+
+    # The shared flight returns (id, insight, cached), the batch one
+    # (insight, cached); each caller must get the shape it expects
+    assert single.status_code == 200
+    assert batch.status_code == 200
+    assert batch.json()["results"][0]["ok"] is True
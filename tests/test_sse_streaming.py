@@ -0,0 +1,133 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import db
+from app.fake_llm import FakeLLM
+from app.models import CallInsight
+from app.streaming import PartialJSONObject
+import app.ai_client as ai_client
+import app.main as main
+
+
+def parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_partial_json_reports_each_field_once_complete():
+    text = json.dumps(
+        {"sentiment": "Negative", "action_required": True, "rating": 125, "summary": "a, \"b\""}
+    )
+    for size in (1, 3, 7):
+        parser = PartialJSONObject()
+        seen = []
+        for i in range(0, len(text), size):
+            seen.extend(parser.feed(text[i : i + size]))
+
+        assert seen == [
+            ("sentiment", "Negative"),
+            ("action_required", True),
+            ("rating", 125),
+            ("summary", 'a, "b"'),
+        ]
+
+    # A number is not complete until something follows it
+    assert PartialJSONObject().feed('{"rating": 12') == []
+
+
+@pytest.mark.asyncio
+async def test_fields_are_sent_before_the_summary_is_generated(monkeypatch):
+    insight = CallInsight(
+        customer_intent="Pay on Friday",
+        sentiment="Neutral",
+        action_required=True,
+        summary="The customer promised to pay on Friday.",
+    )
+    text = insight.model_dump_json()
+    cut = text.index("The customer") + len("The customer")
+    release = asyncio.Event()
+
+    class GatedLLM:
+        async def stream(self, prompt: str, schema: type):
+            # Stops in the middle of the summary until the test lets it go on
+            yield text[:cut]
+            await release.wait()
+            yield text[cut:]
+
+    monkeypatch.setattr(ai_client, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(ai_client, "fake_llm", GatedLLM())
+
+    transcript = f"Customer: I will pay on Friday. {uuid.uuid4()}"
+    events = main.iter_insight_events("basic", transcript)
+    early = [await anext(events) for _ in range(3)]
+    assert [json.loads(e.split("data: ")[1])["field"] for e in early] == [
+        "customer_intent",
+        "sentiment",
+        "action_required",
+    ]
+
+    release.set()
+    rest = parse_events("".join([e async for e in events]))
+    assert [name for name, _ in rest] == ["field", "done"]
+    assert rest[0][1] == {"field": "summary", "value": insight.summary}
+
+    done = rest[1][1]
+    assert done["insights"] == insight.model_dump()
+    async with db.acquire() as conn:
+        stored = await conn.fetchrow("SELECT * FROM call_records WHERE id = $1", done["id"])
+    assert stored["summary"] == insight.summary
+
+
+@pytest.mark.asyncio
+async def test_extended_stream_endpoint(monkeypatch):
+    monkeypatch.setattr(ai_client, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(ai_client, "fake_llm", FakeLLM(latency_ms=0, seed=1))
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/analyze_call_extended/stream",
+            json={"transcript": f"Agent: Hello. Customer: Kal pay karunga. {uuid.uuid4()}"},
+        )
+        empty = await client.post("/analyze_call_extended/stream", json={"transcript": " "})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert empty.status_code == 400
+
+    events = parse_events(resp.text)
+    fields = [data["field"] for name, data in events if name == "field"]
+    done = events[-1][1]
+    assert events[-1][0] == "done" and done["cached"] is False
+    assert fields == list(done["insights"])
+    assert fields.index("sentiment") < fields.index("summary")
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_after_output_is_not_retried(monkeypatch):
+    attempts = []
+
+    class BrokenLLM:
+        async def stream(self, prompt: str, schema: type):
+            attempts.append(prompt)
+            yield '{"customer_intent": "Pay", "sentiment": "Neu'
+            raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(ai_client, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(ai_client, "fake_llm", BrokenLLM())
+
+    transcript = f"Customer: Haan. {uuid.uuid4()}"
+    body = "".join([e async for e in main.iter_insight_events("basic", transcript)])
+    events = parse_events(body)
+
+    assert events[:-1] == [("field", {"field": "customer_intent", "value": "Pay"})]
+    assert events[-1][0] == "error" and events[-1][1]["status"] == 500
+    assert "partial output" in events[-1][1]["detail"]
+    assert len(attempts) == 1
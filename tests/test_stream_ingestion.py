@@ -0,0 +1,116 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.db import init_db, db
+from app.models import CallInsight
+from app.streaming import bounded_unordered, iter_ndjson_lines, LineTooLong
+import app.main as main
+
+
+@pytest.mark.asyncio
+async def test_ndjson_stream_returns_tagged_results(monkeypatch):
+    async def fake_generate_insights(transcript: str) -> CallInsight:
+        # Later lines finish first, so output order differs from input order
+        await asyncio.sleep(0.03 if "first" in transcript else 0)
+        return CallInsight(
+            customer_intent="Pay",
+            sentiment="Neutral",
+            action_required=False,
+            summary=transcript,
+        )
+
+    monkeypatch.setattr(main, "generate_insights", fake_generate_insights)
+
+    await init_db()
+    assert db.pool is not None
+
+    # Unique per run so neither line is answered from the Postgres cache
+    run = uuid.uuid4()
+    lines = [
+        json.dumps({"id": "a-1", "transcript": f"Customer: first call {run}"}),
+        "not json",
+        json.dumps({"id": "a-3", "transcript": f"Customer: third call {run}"}),
+        json.dumps({"transcript": ""}),
+    ]
+
+    async def body():
+        for line in lines:
+            yield (line + "\n").encode()
+
+    transport = ASGITransport(app=main.app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/analyze_calls_stream?mode=basic&concurrency=4", content=body()
+        )
+
+    assert resp.status_code == 200
+    results = [json.loads(line) for line in resp.text.splitlines()]
+    by_id = {r["id"]: r for r in results}
+
+    assert set(by_id) == {"a-1", 2, "a-3", 4}
+    assert by_id["a-1"]["ok"] and by_id["a-1"]["insights"]["summary"].startswith("Customer: first call")
+    assert isinstance(by_id["a-3"]["record_id"], int)
+    assert by_id[2] == {"id": 2, "ok": False, "error": "Invalid JSON line"}
+    assert by_id[4]["ok"] is False
+    # Completion order: the slow first line comes out last
+    assert results[-1]["id"] == "a-1"
+
+
+@pytest.mark.asyncio
+async def test_bounded_unordered_limits_in_flight_items():
+    in_flight = 0
+    peak = 0
+
+    async def numbers():
+        for n in range(50):
+            yield n
+
+    async def handle(n: int) -> int:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return n * 2
+
+    results = [r async for r in bounded_unordered(numbers(), handle, concurrency=5)]
+
+    assert sorted(results) == [n * 2 for n in range(50)]
+    assert peak <= 5
+
+
+@pytest.mark.asyncio
+async def test_bounded_unordered_drains_in_flight_items_on_input_error():
+    async def broken_input():
+        for n in range(3):
+            yield n
+        raise ConnectionError("client went away")
+
+    async def handle(n: int) -> int:
+        await asyncio.sleep(0.01)
+        return n
+
+    results = []
+    with pytest.raises(ConnectionError):
+        async for result in bounded_unordered(broken_input(), handle, concurrency=5):
+            results.append(result)
+
+    assert sorted(results) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_oversized_line_is_rejected_even_when_complete():
+    async def chunks():
+        yield b'{"transcript": "short"}\n' + b"x" * 50 + b"\n"
+
+    lines = []
+    with pytest.raises(LineTooLong):
+        async for line in iter_ndjson_lines(chunks(), max_line_bytes=30):
+            lines.append(line)
+
+    assert lines == [b'{"transcript": "short"}']
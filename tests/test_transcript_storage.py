@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+
+from app.db import (
+    init_db,
+    db,
+    insert_call_record,
+    insert_call_record_extended,
+    migrate_transcripts,
+)
+from app.models import CallInsight, CallInsightExtended
+
+
+BASIC = CallInsight(
+    customer_intent="Pay Friday",
+    sentiment="Neutral",
+    action_required=True,
+    summary="PTP Friday.",
+)
+
+EXTENDED = CallInsightExtended(
+    **BASIC.model_dump(),
+    primary_purpose="Collect EMI",
+    objective_met=True,
+    key_results=["promise to pay"],
+    customer_intentions="Pay Friday",
+    circumstances="Salary delay",
+    start_sentiment="Negative",
+    end_sentiment="Neutral",
+    agent_performance_rating=3,
+    agent_performance_notes="Pushy.",
+)
+
+
+@pytest.mark.asyncio
+async def test_same_transcript_is_stored_once_across_tables():
+    await init_db()
+    assert db.pool is not None
+
+    transcript = f"Agent: EMI due. Customer: Friday pakka. {uuid.uuid4()}"
+
+    async with db.pool.acquire() as conn:
+        basic_id = await insert_call_record(conn, transcript, BASIC)
+        extended_id = await insert_call_record_extended(conn, transcript, EXTENDED)
+        again_id = await insert_call_record(conn, transcript, BASIC)
+
+        ids = await conn.fetch(
+            """
+            SELECT transcript_id FROM call_records WHERE id = ANY($1::int[])
+            UNION ALL
+            SELECT transcript_id FROM call_records_extended WHERE id = $2
+            """,
+            [basic_id, again_id],
+            extended_id,
+        )
+        text = await conn.fetchval(
+            "SELECT transcript FROM call_records_full WHERE id = $1", basic_id
+        )
+        extended_text = await conn.fetchval(
+            "SELECT transcript FROM call_records_extended_full WHERE id = $1", extended_id
+        )
+
+    assert len({r["transcript_id"] for r in ids}) == 1
+    assert text == transcript
+    assert extended_text == transcript
+
+
+@pytest.mark.asyncio
+async def test_legacy_inline_transcripts_are_migrated():
+    await init_db()
+    assert db.pool is not None
+
+    transcript = f"Customer: legacy row {uuid.uuid4()}"
+
+    async with db.pool.acquire() as conn:
+        legacy_id = await conn.fetchval(
+            """
+            INSERT INTO call_records (transcript, intent, sentiment, action_required, summary)
+            VALUES ($1, 'x', 'Neutral', false, 'x')
+            RETURNING id;
+            """,
+            transcript,
+        )
+
+    assert await migrate_transcripts("call_records") >= 1
+
+    async with db.pool.acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT transcript, transcript_id FROM call_records WHERE id = $1", legacy_id
+        )
+        text = await conn.fetchval(
+            "SELECT transcript FROM call_records_full WHERE id = $1", legacy_id
+        )
+
+    assert row["transcript"] is None
+    assert row["transcript_id"] is not None
+    assert text == transcript